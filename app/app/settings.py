@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it compresses the response once every other middleware wrote it
+    'notes.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,11 +82,101 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# The database is picked by NOTES_DB_ENGINE:
+#   sqlite      the NOTES_DB_NAME file, db.sqlite3 by default
+#   postgresql  NOTES_DB_NAME on NOTES_DB_HOST:NOTES_DB_PORT as NOTES_DB_USER
+#               with NOTES_DB_PASSWORD (needs the psycopg2 package)
+# NOTES_DB_CONN_MAX_AGE keeps the connections open between the requests
+# (in seconds, None for ever) and NOTES_DB_HEALTH_CHECKS checks a reused
+# connection before the request using it. NOTES_DB_POOLER=1 is for a
+# transaction pooler like PgBouncer in front of PostgreSQL, the pooler
+# owns the connections so the server side cursors are disabled.
+NOTES_DB_ENGINE = os.environ.get('NOTES_DB_ENGINE', 'sqlite')
+NOTES_DB_CONN_MAX_AGE = os.environ.get('NOTES_DB_CONN_MAX_AGE', '0' if NOTES_DB_ENGINE == 'sqlite' else '60')
+
+if NOTES_DB_ENGINE == 'postgresql':
+    DEFAULT_DATABASE = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('NOTES_DB_NAME', 'notes'),
+        'USER': os.environ.get('NOTES_DB_USER', 'notes'),
+        'PASSWORD': os.environ.get('NOTES_DB_PASSWORD', ''),
+        'HOST': os.environ.get('NOTES_DB_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('NOTES_DB_PORT', '5432'),
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('NOTES_DB_POOLER', '0') == '1',
+    }
+else:
+    DEFAULT_DATABASE = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('NOTES_DB_NAME', BASE_DIR / 'db.sqlite3'),
     }
+DEFAULT_DATABASE['CONN_MAX_AGE'] = None if NOTES_DB_CONN_MAX_AGE == 'None' else int(NOTES_DB_CONN_MAX_AGE)
+DEFAULT_DATABASE['CONN_HEALTH_CHECKS'] = os.environ.get('NOTES_DB_HEALTH_CHECKS', '1') == '1'
+
+DATABASES = {'default': DEFAULT_DATABASE}
+
+# NOTES_SQLITE_TUNED=1 sets the pragmas below on every new SQLite connection
+# (see notes.signals): with the WAL journal the readers never block the
+# writer, synchronous=NORMAL only syncs at the checkpoints, the memory map
+# and the page cache (in KiB when negative) save reads, and a writer finding
+# the database locked waits busy_timeout milliseconds instead of failing
+SQLITE_TUNED_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 10000,
+}
+NOTES_SQLITE_PRAGMAS = SQLITE_TUNED_PRAGMAS if os.environ.get('NOTES_SQLITE_TUNED', '0') == '1' else {}
+
+# Read replicas, the notes lists and the users list read from one of them
+# and every other query goes to the primary (see notes.routers):
+#   NOTES_DB_REPLICA_HOSTS=host1,host2  PostgreSQL replicas of the primary
+#   NOTES_DB_REPLICAS=2                 SQLite stand-ins opening the primary
+#                                       file, to run the routing locally
+if NOTES_DB_ENGINE == 'postgresql':
+    REPLICA_DATABASES = [dict(DEFAULT_DATABASE, HOST=host)
+                         for host in os.environ.get('NOTES_DB_REPLICA_HOSTS', '').split(',') if host]
+else:
+    REPLICA_DATABASES = [dict(DEFAULT_DATABASE) for _ in range(int(os.environ.get('NOTES_DB_REPLICAS', 0)))]
+for index, replica in enumerate(REPLICA_DATABASES, 1):
+    # The tests read the replicas through the test database of the primary
+    DATABASES['replica_%d' % index] = dict(replica, TEST={'MIRROR': 'default'})
+NOTES_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# A list changed less than NOTES_DB_REPLICA_LAG seconds ago is read from the
+# primary, the replicas could still miss the change
+NOTES_DB_REPLICA_LAG = float(os.environ.get('NOTES_DB_REPLICA_LAG', 5))
+DATABASE_ROUTERS = ['notes.routers.ReplicaRouter']
+
+
+# Password hashing
+# NOTES_PASSWORD_HASHER picks the hasher of the new passwords (pbkdf2, scrypt
+# or argon2 which needs argon2-cffi), the others still verify the old hashes
+# and every hash is upgraded on the next successful login
+
+NOTES_PASSWORD_HASHER = os.environ.get('NOTES_PASSWORD_HASHER', 'pbkdf2')
+NOTES_PBKDF2_ITERATIONS = int(os.environ.get('NOTES_PBKDF2_ITERATIONS', 320000))
+NOTES_SCRYPT_WORK_FACTOR = int(os.environ.get('NOTES_SCRYPT_WORK_FACTOR', 2 ** 14))
+NOTES_ARGON2_TIME_COST = int(os.environ.get('NOTES_ARGON2_TIME_COST', 2))
+NOTES_ARGON2_MEMORY_COST = int(os.environ.get('NOTES_ARGON2_MEMORY_COST', 102400))
+
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'notes.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'notes.hashers.ScryptPasswordHasher',
+    'argon2': 'notes.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[NOTES_PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != NOTES_PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# The number of processes hashing and checking the passwords, 0 hashes
+# them inside the request thread
+NOTES_HASHING_WORKERS = int(os.environ.get('NOTES_HASHING_WORKERS', os.cpu_count() or 1))
+
+# Login attempts allowed by client ip address and by email over a sliding
+# period, counted like the API throttles
+NOTES_LOGIN_THROTTLE_RATES = {
+    'ip': os.environ.get('NOTES_LOGIN_THROTTLE_IP_RATE', '30/min'),
+    'email': os.environ.get('NOTES_LOGIN_THROTTLE_EMAIL_RATE', '5/min'),
 }
 
 
@@ -142,4 +235,144 @@ ACCOUNT_LOGOUT_ON_GET = True
 
 AUTHENTICATION_BACKENDS = ['notes.authentication.EmailBackendModel']
 
+REST_FRAMEWORK = {
+    # A request without session cookie checks its token without reading
+    # the session, the session stays first so anonymous requests keep
+    # being answered with a 403
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'notes.authentication.TokenAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'notes.throttling.UserRateThrottle',
+        'notes.throttling.IPRateThrottle',
+    ],
+    # The throttles identify the clients by REMOTE_ADDR, X-Forwarded-For is
+    # only read behind NOTES_NUM_PROXIES trusted proxies, a client could
+    # otherwise send any address and get a fresh budget every request
+    'NUM_PROXIES': int(os.environ.get('NOTES_NUM_PROXIES', 0)),
+    'DEFAULT_RENDERER_CLASSES': [
+        'notes.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# The JSON responses are encoded by orjson when it is installed, unless
+# NOTES_FAST_JSON=0 which keeps the encoder of the REST framework
+NOTES_FAST_JSON = os.environ.get('NOTES_FAST_JSON', '1') == '1'
+
+# The responses of at least NOTES_COMPRESSION_MIN_SIZE bytes are compressed
+# with the first of NOTES_COMPRESSION_ENCODINGS accepted by the client (br
+# needs the brotli package), the streamed exports whatever their size
+NOTES_COMPRESSION_ENCODINGS = os.environ.get('NOTES_COMPRESSION_ENCODINGS', 'br,gzip').split(',')
+NOTES_COMPRESSION_MIN_SIZE = int(os.environ.get('NOTES_COMPRESSION_MIN_SIZE', 1024))
+NOTES_GZIP_LEVEL = int(os.environ.get('NOTES_GZIP_LEVEL', 6))
+NOTES_BROTLI_QUALITY = int(os.environ.get('NOTES_BROTLI_QUALITY', 4))
+
+# The sessions are kept in the database, NOTES_SESSION_ENGINE=notes.sessions
+# keeps them inside the cache and only saves them when they change, it needs
+# a NOTES_CACHE_URL shared by every worker. NOTES_SESSION_WRITE_BEHIND also
+# copies them to the database after the responses are sent, at most every
+# NOTES_SESSION_FLUSH_INTERVAL seconds
+SESSION_ENGINE = os.environ.get('NOTES_SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+NOTES_SESSION_WRITE_BEHIND = os.environ.get('NOTES_SESSION_WRITE_BEHIND', '0') == '1'
+NOTES_SESSION_FLUSH_INTERVAL = float(os.environ.get('NOTES_SESSION_FLUSH_INTERVAL', 5))
+
+# Lifetime in seconds of the tokens given by the login with {"token": true}
+NOTES_TOKEN_MAX_AGE = int(os.environ.get('NOTES_TOKEN_MAX_AGE', 3600))
+
+# Sliding window limits of the API, by authenticated user and by ip address,
+# for the reads, the writes and the login and registration (auth)
+NOTES_THROTTLE_RATES = {
+    'user-read': '1200/min',
+    'user-write': '300/min',
+    'user-auth': '30/min',
+    'ip-read': '3000/min',
+    'ip-write': '600/min',
+    'ip-auth': '60/min',
+}
+
 AUTH_USER_MODEL = 'notes.UserModel'
+
+# Notes API
+# Page size used by the keyset pagination of the notes list, clients can ask
+# for a different one through ?page_size= up to NOTES_MAX_PAGE_SIZE
+NOTES_PAGE_SIZE = 100
+NOTES_MAX_PAGE_SIZE = 1000
+# The lists leave the body out, ?fields=...,preview adds its first
+# NOTES_PREVIEW_LENGTH characters
+NOTES_PREVIEW_LENGTH = 200
+
+# Bulk notes endpoint: maximum number of items per request and number of
+# notes written per transaction
+NOTES_BULK_MAX_ITEMS = 10000
+NOTES_BULK_CHUNK_SIZE = 500
+
+# Number of notes fetched per database round-trip (and written per response
+# fragment) by the streaming export
+NOTES_EXPORT_CHUNK_SIZE = 2000
+
+
+# Cache
+# The default cache keeps a small in-process LRU in front of the shared cache
+# selected by NOTES_CACHE_URL, the one seen by every worker:
+#   locmem://                  only shared inside one process (default)
+#   file:///var/tmp/notes      shared by the workers of one host, its
+#                              increments are not atomic so concurrent
+#                              requests can slip past the throttles
+#   redis://127.0.0.1:6379/0   shared by every host (needs the redis package)
+NOTES_CACHE_URL = os.environ.get('NOTES_CACHE_URL', 'locmem://')
+
+if NOTES_CACHE_URL.startswith(('redis://', 'rediss://')):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': NOTES_CACHE_URL,
+    }
+elif NOTES_CACHE_URL.startswith('file://'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': NOTES_CACHE_URL[len('file://'):],
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes',
+    }
+SHARED_CACHE['KEY_PREFIX'] = 'notes'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'notes.caching.TieredCache',
+        'LOCATION': 'notes',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            # TIMEOUT is the default timeout of the namespace inside the shared
+            # cache, LOCAL_TIMEOUT how long values stay inside the process
+            'NAMESPACES': {
+                # The authenticated users, dropped whenever they are saved or deleted
+                'user': {'TIMEOUT': 600, 'LOCAL_TIMEOUT': 0},
+                # The version of the notes of each owner, changed on every write
+                'notes-version': {'TIMEOUT': None, 'LOCAL_TIMEOUT': 0},
+                # The version of the users, changed whenever a user is saved or deleted
+                'users-version': {'TIMEOUT': None, 'LOCAL_TIMEOUT': 0},
+                # The list responses, keyed by version so they never go stale
+                'notes-list': {'TIMEOUT': 300, 'LOCAL_TIMEOUT': 60},
+                # The number of notes by tags, keyed by version like the lists
+                'notes-stats': {'TIMEOUT': 300, 'LOCAL_TIMEOUT': 60},
+                # The request counters of the API and login throttles, incremented
+                # atomically across the workers by redis only
+                'throttle': {'LOCAL_TIMEOUT': 0},
+                # The sessions, their timeout is the expiry of each session
+                'session': {'LOCAL_TIMEOUT': 0},
+            },
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
+# Long polling of the asynchronous notes list: the longest ?wait= accepted
+# (in seconds) and how often the notes version is checked meanwhile
+NOTES_LONG_POLL_MAX_WAIT = 30
+NOTES_LONG_POLL_INTERVAL = 0.5
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        """
+            Connect the signal receivers of the application
+        """
+        from . import signals  # noqa: F401
@@ -0,0 +1,315 @@
+"""
+    Asynchronous counterparts of the notes list, notes detail, login,
+    logout and registration views, meant to be served by app.asgi. The cache reads are awaited
+    and only the session, the ORM and the serializers run inside a worker
+    thread, so a client long-polling the notes list with ?wait= does not
+    hold any thread while it waits
+"""
+import asyncio
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import authentication
+from . import constants
+from . import notes_cache
+from . import registration_views
+from . import renderers
+from . import request_utils
+from . import throttling
+from . import user_cache
+from . import versions
+from .models import Notes
+from .pagination import NotesCursorPagination
+from .serializers import NotesSerializer, NotesSummarySerializer
+
+NOT_AUTHENTICATED = 'Authentication credentials were not provided.'
+PERMISSION_DENIED = 'You do not have permission to perform this action.'
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """
+        Render data the same way the JSON renderer of the API does
+        :param data: The data to render
+        :param status_code: The status of the response
+    """
+    return HttpResponse(renderers.dumps(data), status=status_code, content_type='application/json')
+
+
+def exception_response(api_exception):
+    """
+        Render an API exception like the exception handler of the API views
+        :param api_exception: The raised exception
+    """
+    response = json_response({'detail': str(api_exception.detail)}, api_exception.status_code)
+    if getattr(api_exception, 'wait', None):
+        response['Retry-After'] = '%d' % math.ceil(api_exception.wait)
+    return response
+
+
+def wrap_request(request):
+    """
+        Wrap the django request to read its query parameters and its
+        body like inside the API views
+        :param request: The django request
+    """
+    return Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+
+
+async def get_active_user(request):
+    """
+        Resolve the user of the token or of the session inside a worker
+        thread, the csrf token is required with the session
+        :param request: The django request
+        :return: A (user, error response) tuple
+    """
+    def resolve():
+        authenticated = authentication.TokenAuthentication().authenticate(request)
+        if authenticated is not None:
+            # The throttles then count the requests of the token user
+            request.user = authenticated[0]
+        user = request.user
+        if authenticated is None and user.is_authenticated:
+            # The views are csrf exempt for the tokens, only the session
+            # is checked, like by the session authentication of the API
+            SessionAuthentication().enforce_csrf(request)
+        return (user if user.is_authenticated else None), getattr(user, 'is_ban', False)
+    try:
+        user, is_ban = await sync_to_async(resolve)()
+    except APIException as api_exception:
+        return None, exception_response(api_exception)
+    if user is None:
+        return None, json_response({'detail': NOT_AUTHENTICATED}, status.HTTP_403_FORBIDDEN)
+    if is_ban:
+        return None, json_response({'detail': PERMISSION_DENIED}, status.HTTP_403_FORBIDDEN)
+    return user, None
+
+
+def method_not_allowed(request):
+    """
+        :param request: The django request
+    """
+    return json_response({'detail': 'Method "%s" not allowed.' % request.method}, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+def build_notes_page(request, owner):
+    """
+        Fetch and serialize one page of the notes
+        :param request: The wrapped request
+        :param owner: The owner the notes are restricted to, None for every notes
+    """
+    queryset = Notes.objects.summaries()
+    if owner is not None:
+        queryset = queryset.filter(owner=owner)
+    fields = NotesSummarySerializer.get_fields(request)
+    paginator = NotesCursorPagination()
+    page = paginator.paginate_queryset(NotesSummarySerializer.project(queryset, fields), request)
+    return paginator.get_paginated_response(NotesSummarySerializer(page, fields).data).data
+
+
+def create_notes(data, owner):
+    """
+        Validate and save a new notes
+        :param data: The data sent by the client
+        :param owner: The owner of the new notes
+        :return: A (data, status) tuple
+    """
+    serializer = NotesSerializer(data=data)
+    if not serializer.is_valid():
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+    serializer.save(owner=owner)
+    return serializer.data, status.HTTP_201_CREATED
+
+
+async def list_notes(request):
+    """
+        List the notes of the user, or create one with a post request.
+        A get request carrying If-None-Match can add ?wait=<seconds> to
+        be answered as soon as the notes change, or with a 304 once the
+        delay is over. Last-Modified only has a one second resolution,
+        so If-Modified-Since alone is answered at once
+        :param request: The django request
+    """
+    user, error = await get_active_user(request)
+    if error is not None:
+        return error
+    try:
+        await sync_to_async(throttling.check_throttles)(request, list_notes)
+    except APIException as api_exception:
+        return exception_response(api_exception)
+    api_request = wrap_request(request)
+    if request.method == 'POST':
+        try:
+            data = api_request.data
+        except APIException as api_exception:
+            return exception_response(api_exception)
+        data, response_status = await sync_to_async(create_notes)(data, user)
+        return json_response(data, response_status)
+    if request.method != 'GET':
+        return method_not_allowed(request)
+
+    scope = api_request.query_params.get(constants.SCOPE_QUERY_PARAM)
+    owner = None if scope == constants.SCOPE_ALL and user.is_superuser else user
+    try:
+        wait = float(api_request.query_params.get(constants.WAIT_QUERY_PARAM, 0))
+    except ValueError:
+        wait = 0
+    # A nan or infinite wait would never reach its deadline
+    if not math.isfinite(wait) or 'HTTP_IF_NONE_MATCH' not in request.META:
+        wait = 0
+    deadline = time.monotonic() + min(max(wait, 0), getattr(settings, 'NOTES_LONG_POLL_MAX_WAIT', 30))
+    while True:
+        version = await notes_cache.aget_notes_version(owner)
+        users_version = await versions.aget_version(user_cache.USERS_VERSION_KEY)
+        key = notes_cache.get_list_cache_key(owner, request, version, users_version)
+        etag, last_modified = versions.get_etag(key), versions.get_last_modified(version, users_version)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is None or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(getattr(settings, 'NOTES_LONG_POLL_INTERVAL', 0.5))
+    if not_modified is not None:
+        return not_modified
+
+    data = await cache.aget(key)
+    if data is None:
+        try:
+            data = await sync_to_async(build_notes_page)(api_request, owner)
+        except NotFound as not_found:
+            return json_response({'detail': str(not_found.detail)}, status.HTTP_404_NOT_FOUND)
+        except ValidationError as invalid:
+            return json_response(invalid.detail, status.HTTP_400_BAD_REQUEST)
+        await cache.aset(key, data)
+    response = json_response(data)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+# Like the API views, the csrf token is only required with the session and
+# is checked by get_active_user, the token clients never send one
+list_notes.csrf_exempt = True
+
+
+async def notes_detail(request, pk):
+    """
+        Retrieve a notes owned by the user, or any notes for an administrator
+        :param request: The django request
+        :param pk: The id of the notes
+    """
+    user, error = await get_active_user(request)
+    if error is not None:
+        return error
+    if request.method != 'GET':
+        return method_not_allowed(request)
+    try:
+        await sync_to_async(throttling.check_throttles)(request, notes_detail)
+    except APIException as api_exception:
+        return exception_response(api_exception)
+    notes = await sync_to_async(Notes.objects.with_owner().filter(pk=pk).first)()
+    if notes is None:
+        return json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+    if notes.owner_id != user.pk and not user.is_superuser:
+        return json_response({'detail': PERMISSION_DENIED}, status.HTTP_403_FORBIDDEN)
+    notes_version = await notes_cache.aget_notes_version(notes.owner)
+    users_version = await versions.aget_version(user_cache.USERS_VERSION_KEY)
+    etag = versions.get_etag('notes-detail:%s:%s:%s:%s' % (notes.pk, notes_version, users_version,
+                                                           notes_cache.get_url_hash(request)))
+    last_modified = versions.get_last_modified(notes_version, users_version)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+    response = json_response(NotesSerializer(notes).data)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+async def login(request):
+    """
+        Authenticate the user and open its session
+        :param request: The django request
+    """
+    if request.method != 'POST':
+        return method_not_allowed(request)
+    if await sync_to_async(request_utils.is_user_authenticated)(request):
+        await sync_to_async(request.session.cycle_key)()
+    api_request = wrap_request(request)
+    try:
+        await sync_to_async(throttling.check_throttles)(request, login)
+        email, password = registration_views.retrieve_email_and_password(api_request)
+        data, response_status = await sync_to_async(registration_views.authenticate_and_login)(
+            request, email, password, registration_views.is_token_requested(api_request))
+    except APIException as api_exception:
+        return exception_response(api_exception)
+    return json_response(data, response_status)
+
+
+# The login view is csrf exempt like the API views, the session it opens
+# is protected by get_active_user on the next requests
+login.csrf_exempt = True
+login.throttle_scope = throttling.AUTH_SCOPE
+
+
+def empty_or_json_response(data, status_code):
+    """
+        Answer without body when there is no data, like the API views
+        :param data: The data to render, None for no body
+        :param status_code: The status of the response
+    """
+    if data is None:
+        return HttpResponse(status=status_code)
+    return json_response(data, status_code)
+
+
+async def logout(request):
+    """
+        Revoke the token of the request, or close its session
+        :param request: The django request
+    """
+    if request.method != 'GET':
+        return method_not_allowed(request)
+    try:
+        authenticated = await sync_to_async(authentication.TokenAuthentication().authenticate)(request)
+        if authenticated is not None:
+            request.user = authenticated[0]
+        await sync_to_async(throttling.check_throttles)(request, logout)
+        data, response_status = await sync_to_async(registration_views.logout_user)(
+            request, authenticated[1] if authenticated is not None else None)
+    except APIException as api_exception:
+        return exception_response(api_exception)
+    return empty_or_json_response(data, response_status)
+
+
+async def register(request):
+    """
+        Register a new user, refused to a client with an open session
+        :param request: The django request
+    """
+    if request.method != 'POST':
+        return method_not_allowed(request)
+    if await sync_to_async(request_utils.is_user_authenticated)(request):
+        return json_response({'errors': 'User is authenticated'}, status.HTTP_400_BAD_REQUEST)
+    api_request = wrap_request(request)
+    try:
+        await sync_to_async(throttling.check_throttles)(request, register)
+        email, password = registration_views.retrieve_email_and_password(api_request)
+    except APIException as api_exception:
+        return exception_response(api_exception)
+    data, response_status = await sync_to_async(registration_views.register_user)(email, password)
+    return empty_or_json_response(data, response_status)
+
+
+# Like the registration API view, nobody is authenticated by the session yet
+register.csrf_exempt = True
+register.throttle_scope = throttling.AUTH_SCOPE
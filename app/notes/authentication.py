@@ -1,5 +1,9 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from rest_framework import authentication, exceptions
+from . import hashing
+from . import tokens
+from . import user_cache
 
 
 class EmailBackendModel(ModelBackend):
@@ -7,10 +11,11 @@ class EmailBackendModel(ModelBackend):
         Backend used to authenticate users and
         helps generate the session id
     """
-    def authenticate(self, username=None, password=None, **kwargs):
+    def authenticate(self, request=None, username=None, password=None, **kwargs):
         """
             authenticate the user by retrieving it from the
-            database
+            database and checking its password
+            :param request: The login request
             :param username: The username of the user
             :param password: The password of the user
             :param kwargs: Other cool stuff you can add
@@ -18,6 +23,56 @@ class EmailBackendModel(ModelBackend):
         UserModel = get_user_model()
         try:
             user = UserModel.objects.get(email=username)
-            return user
         except UserModel.DoesNotExist:
+            # Hash the password anyway so that an unknown email takes as
+            # long as a wrong password and does not reveal the accounts
+            hashing.make_password(password or '')
             return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        """
+            Load the user of the session, from the cache when possible
+            so that authenticated requests skip the user query
+            :param user_id: The primary key stored inside the session
+        """
+        user = user_cache.get_cached_user(user_id)
+        if user is not None:
+            return user
+        user = super().get_user(user_id)
+        if user is not None:
+            user_cache.cache_user(user)
+        return user
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """
+        Authenticate the API calls sending 'Authorization: Bearer <token>'
+        with a token made by the login. The token is signed and carries
+        the user id and flags, so the request reads neither the session
+        nor the user, only the revocation list with one indexed query
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        """
+            :param request: The request being authenticated
+            :return: A (user, token payload) tuple, None without token
+        """
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header')
+        payload = tokens.read_token(header[1].decode('latin-1'))
+        if payload is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token')
+        return tokens.get_token_user(payload), payload
+
+    def authenticate_header(self, request):
+        """
+            :param request: The request being authenticated
+        """
+        return self.keyword
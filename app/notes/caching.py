@@ -0,0 +1,206 @@
+import pickle
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+NAMESPACE_SEPARATOR = ':'
+STATS_KEYS = ('local_hits', 'local_misses', 'shared_hits', 'shared_misses')
+MISSING = object()
+
+# The local tiers, their stats and their locks by location, shared by every
+# thread of the process like the caches of LocMemCache: django builds one
+# cache handler per thread
+_local_tiers = {}
+_local_stats = {}
+_local_locks = {}
+
+
+class TieredCache(BaseCache):
+    """
+        Cache backend keeping a small in-process LRU in front of a
+        shared cache (file based, redis, ...) seen by every worker.
+
+        Keys are namespaced by their first segment ('user:42' belongs
+        to the 'user' namespace) and every namespace can set:
+            TIMEOUT: the default timeout inside the shared cache
+            LOCAL_TIMEOUT: how long a value is kept inside the process,
+                0 (the default) never keeps it locally
+        Only values that cannot go stale, like versioned keys, should be
+        kept locally: a delete made by another worker only reaches the
+        shared cache.
+
+        incr() is atomic across the workers only when the shared cache
+        increments atomically: redis does, the file based cache reads
+        and writes the value back and can lose concurrent increments
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        """
+            :param location: The name of the in-process tier, the caches
+                of one process with the same location share it
+            :param params: The cache settings
+        """
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self._local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self._namespaces = options.get('NAMESPACES', {})
+        self._shared = None
+        self._local = _local_tiers.setdefault(location, OrderedDict())
+        self._stats = _local_stats.setdefault(location, Counter())
+        self._lock = _local_locks.setdefault(location, Lock())
+
+    @property
+    def shared(self):
+        """
+            Return the shared cache of the current thread. The tiered cache
+            is itself created once per thread by django, so the lookup is
+            only made once
+        """
+        if self._shared is None:
+            self._shared = caches[self._shared_alias]
+        return self._shared
+
+    def get_namespace(self, key):
+        """
+            Return the namespace of a key
+            :param key: The key without prefix nor version
+        """
+        return key.partition(NAMESPACE_SEPARATOR)[0]
+
+    def get_namespace_timeout(self, key, timeout=DEFAULT_TIMEOUT):
+        """
+            Resolve the default timeout of a key from its namespace
+            :param key: The key without prefix nor version
+            :param timeout: The timeout given by the caller
+        """
+        if timeout is not DEFAULT_TIMEOUT:
+            return timeout
+        return self._namespaces.get(self.get_namespace(key), {}).get('TIMEOUT', DEFAULT_TIMEOUT)
+
+    def get_local_timeout(self, key, timeout):
+        """
+            Return the number of seconds the key is kept inside the process
+            :param key: The key without prefix nor version
+            :param timeout: The timeout of the key inside the shared cache
+        """
+        local_timeout = self._namespaces.get(self.get_namespace(key), {}).get('LOCAL_TIMEOUT', 0)
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+        return local_timeout
+
+    def get_stats(self):
+        """
+            Return the hit and miss counters of this process by namespace
+        """
+        with self._lock:
+            namespaces = {namespace for namespace, _ in self._stats}
+            return {namespace: {stat: self._stats[(namespace, stat)] for stat in STATS_KEYS}
+                    for namespace in namespaces}
+
+    def _local_key(self, key, version):
+        # The shared cache validates the same key, checking it twice
+        # costs more than the rest of a cached read
+        return self.make_key(key, version=version)
+
+    def _local_get(self, local_key):
+        with self._lock:
+            expiry, pickled = self._local.get(local_key, (None, None))
+            if pickled is None:
+                return MISSING
+            if expiry <= time.monotonic():
+                del self._local[local_key]
+                return MISSING
+            self._local.move_to_end(local_key)
+        return pickle.loads(pickled)
+
+    def _local_set(self, key, local_key, value, timeout):
+        local_timeout = self.get_local_timeout(key, timeout)
+        if local_timeout <= 0:
+            return
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._lock:
+            self._local[local_key] = (time.monotonic() + local_timeout, pickled)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, local_key):
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def _count(self, key, stat):
+        with self._lock:
+            self._stats[(self.get_namespace(key), stat)] += 1
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self._local_get(local_key)
+        if value is not MISSING:
+            self._count(key, 'local_hits')
+            return value
+        self._count(key, 'local_misses')
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            self._count(key, 'shared_misses')
+            return default
+        self._count(key, 'shared_hits')
+        self._local_set(key, local_key, value, self.get_namespace_timeout(key))
+        return value
+
+    async def aget(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self._local_get(local_key)
+        if value is not MISSING:
+            self._count(key, 'local_hits')
+            return value
+        self._count(key, 'local_misses')
+        value = await self.shared.aget(key, MISSING, version=version)
+        if value is MISSING:
+            self._count(key, 'shared_misses')
+            return default
+        self._count(key, 'shared_hits')
+        self._local_set(key, local_key, value, self.get_namespace_timeout(key))
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_namespace_timeout(key, timeout)
+        local_key = self._local_key(key, version)
+        self.shared.set(key, value, timeout, version=version)
+        self._local_delete(local_key)
+        self._local_set(key, local_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_namespace_timeout(key, timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(key, self._local_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, self.get_namespace_timeout(key, timeout), version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        if self._local_get(self._local_key(key, version)) is not MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,123 @@
+"""
+    Compression of the responses negotiated through Accept-Encoding.
+    Brotli is offered when the brotli package is installed, gzip
+    always. The responses shorter than NOTES_COMPRESSION_MIN_SIZE are
+    sent as they are, their compression would cost more than it saves
+"""
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_ENCODINGS = ('br', 'gzip')
+
+
+def get_encodings():
+    """
+        Return the available encodings of NOTES_COMPRESSION_ENCODINGS, by order of preference
+    """
+    encodings = getattr(settings, 'NOTES_COMPRESSION_ENCODINGS', DEFAULT_ENCODINGS)
+    return [encoding for encoding in encodings if encoding != 'br' or brotli is not None]
+
+
+def negotiate_encoding(accept_encoding, encodings):
+    """
+        Pick the encoding of the response: the one with the highest
+        quality inside Accept-Encoding, ties are won by the first one
+        of encodings
+        :param accept_encoding: The Accept-Encoding header of the request
+        :param encodings: The encodings supported, by order of preference
+        :return: The encoding, None for the identity
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    chosen, chosen_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > chosen_quality:
+            chosen, chosen_quality = encoding, quality
+    return chosen
+
+
+def compress(content, encoding):
+    """
+        :param content: The bytes to compress
+        :param encoding: The encoding, br or gzip
+    """
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'NOTES_BROTLI_QUALITY', 4))
+    return gzip.compress(content, compresslevel=getattr(settings, 'NOTES_GZIP_LEVEL', 6), mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """
+        Compress a streamed response chunk by chunk, every chunk is
+        flushed so the client receives it without waiting for the end
+        :param chunks: The iterable of bytes
+        :param encoding: The encoding, br or gzip
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=getattr(settings, 'NOTES_BROTLI_QUALITY', 4))
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(getattr(settings, 'NOTES_GZIP_LEVEL', 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+        Compress the responses with the best encoding accepted by the
+        client. Like the GZipMiddleware of django, the strong ETags
+        become weak ones since the bytes sent depend on the encoding
+    """
+
+    def process_response(self, request, response):
+        """
+            :param request: The request
+            :param response: The response to compress
+        """
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'NOTES_COMPRESSION_MIN_SIZE', 1024):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), get_encodings())
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
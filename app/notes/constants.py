@@ -9,5 +9,17 @@ USER_LIST_URI_INFO = 'user_list'
 LOGOUT_URI_INFO = 'logout'
 LOGIN_URI_INFO = 'login'
 REGISTRATION_URI_INFO = 'register'
-
-
+SCOPE_QUERY_PARAM = 'scope'
+SCOPE_ALL = 'all'
+EXPORT_FORMAT_QUERY_PARAM = 'export_format'
+EXPORT_FORMAT_JSON = 'json'
+EXPORT_FORMAT_NDJSON = 'ndjson'
+SEARCH_QUERY_PARAM = 'q'
+WAIT_QUERY_PARAM = 'wait'
+TOKEN_PARAM = 'token'
+TAGS_QUERY_PARAM = 'tags'
+LEGACY_TAGS_QUERY_PARAM = 'search'
+CREATED_AFTER_QUERY_PARAM = 'created_after'
+CREATED_BEFORE_QUERY_PARAM = 'created_before'
+OWNER_QUERY_PARAM = 'owner'
+FIELDS_QUERY_PARAM = 'fields'
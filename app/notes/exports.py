@@ -0,0 +1,54 @@
+from . import renderers
+
+JSON_CONTENT_TYPE = 'application/json'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def encode(item):
+    """
+        Encode an item the same way the JSON renderer of the API does
+        :param item: The serialized item
+    """
+    return renderers.dumps(item)
+
+
+def batched(items, batch_size):
+    """
+        Group the encoded items so that the response is not written
+        one tiny fragment at a time
+        :param items: The iterable of encoded items
+        :param batch_size: The number of items per fragment
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_json_array(items, batch_size):
+    """
+        Yield the fragments of a JSON array holding the items
+        :param items: The iterable of serialized items
+        :param batch_size: The number of items per fragment
+    """
+    yield b'['
+    separator = b''
+    for batch in batched((encode(item) for item in items), batch_size):
+        yield separator + b','.join(batch)
+        separator = b','
+    yield b']'
+
+
+def stream_ndjson(items, batch_size):
+    """
+        Yield the fragments of a newline delimited JSON document,
+        one item per line
+        :param items: The iterable of serialized items
+        :param batch_size: The number of items per fragment
+    """
+    for batch in batched((encode(item) for item in items), batch_size):
+        yield b'\n'.join(batch) + b'\n'
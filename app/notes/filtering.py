@@ -0,0 +1,86 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from . import constants
+from .models import STATUS_CODES
+
+
+def parse_created(value, end_of_day):
+    """
+        Parse a bound of the created range, a date stands for the
+        start of the day or, for an upper bound, its end
+        :param value: An ISO 8601 date or date and time
+        :param end_of_day: True for an upper bound
+        :return: An aware datetime, None when the value is not valid
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.datetime.combine(day, datetime.time.max if end_of_day else datetime.time.min)
+    except ValueError:
+        return None
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class NotesFilterBackend(BaseFilterBackend):
+    """
+        Filter the notes on exact values only, so that every filter is
+        served by the (tags, created, id) and (owner, tags, created, id)
+        indexes instead of a LIKE scan:
+            ?tags=done,progress     the notes having one of the tags
+            ?created_after=<date>   created from this date or time
+            ?created_before=<date>  created until this date or time
+            ?owner=<email>          the notes of one owner
+        ?search= is still accepted as a single tags value, unknown tags match
+        no notes
+    """
+
+    def get_tags(self, request):
+        """
+            Return the tags asked by the request, an empty list for every tags
+            :param request: The request being filtered
+        """
+        value = request.query_params.get(constants.TAGS_QUERY_PARAM)
+        if value is None:
+            value = request.query_params.get(constants.LEGACY_TAGS_QUERY_PARAM, '')
+        return [tags for tags in (tags.strip() for tags in value.split(',')) if tags]
+
+    def filter_queryset(self, request, queryset, view):
+        """
+            :param request: The request being filtered
+            :param queryset: The notes of the view
+            :param view: The view of the request
+            :raise ValidationError: When a date of the range is not valid
+        """
+        tags = self.get_tags(request)
+        known_tags = [name for name in tags if name in STATUS_CODES]
+        if tags and not known_tags:
+            queryset = queryset.none()
+        elif len(known_tags) == 1:
+            queryset = queryset.filter(tags=known_tags[0])
+        elif known_tags:
+            queryset = queryset.filter(tags__in=known_tags)
+        errors = {}
+        for param, lookup, end_of_day in ((constants.CREATED_AFTER_QUERY_PARAM, 'created__gte', False),
+                                          (constants.CREATED_BEFORE_QUERY_PARAM, 'created__lte', True)):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            moment = parse_created(value, end_of_day)
+            if moment is None:
+                errors[param] = ['Expected an ISO 8601 date or date and time']
+            else:
+                queryset = queryset.filter(**{lookup: moment})
+        if errors:
+            raise ValidationError(errors)
+        owner = request.query_params.get(constants.OWNER_QUERY_PARAM)
+        if owner:
+            queryset = queryset.filter(owner__email=owner)
+        return queryset
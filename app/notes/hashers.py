@@ -0,0 +1,43 @@
+"""
+    Password hashers whose cost is read from the settings, so every
+    environment can tune it without a new algorithm name: the hashes
+    made with a previous cost keep verifying and are upgraded on the
+    next successful login (see UserModel.check_password)
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+        PBKDF2 with the NOTES_PBKDF2_ITERATIONS iteration count
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'NOTES_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """
+        Scrypt with the NOTES_SCRYPT_WORK_FACTOR work factor (a power of 2)
+    """
+
+    @property
+    def work_factor(self):
+        return getattr(settings, 'NOTES_SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+        Argon2 with the NOTES_ARGON2_TIME_COST and NOTES_ARGON2_MEMORY_COST
+        (in KiB) costs, it needs the argon2-cffi package
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'NOTES_ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'NOTES_ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
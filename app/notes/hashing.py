@@ -0,0 +1,204 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+HASHING_SETTINGS_PREFIXES = ('NOTES_PBKDF2', 'NOTES_SCRYPT', 'NOTES_ARGON2')
+
+_executor = None
+_executor_lock = Lock()
+
+
+def is_hashing_setting(name):
+    """
+        Check if a setting changes how the passwords are hashed
+        :param name: The name of the setting
+    """
+    return name == 'PASSWORD_HASHERS' or name.startswith(HASHING_SETTINGS_PREFIXES)
+
+
+def get_hashing_settings():
+    """
+        Return the current hashing settings, sent to the workers which
+        would otherwise only see the ones of the settings module
+    """
+    return {name: getattr(settings, name) for name in dir(settings) if is_hashing_setting(name)}
+
+
+def _setup_worker(settings_module, hashing_settings):
+    """
+        Configure django inside a worker process started without fork
+        :param settings_module: The settings module of the parent process
+        :param hashing_settings: The hashing settings of the parent process
+    """
+    if not settings.configured:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        django.setup()
+    for name, value in hashing_settings.items():
+        setattr(settings, name, value)
+
+
+def _make_password(password):
+    """
+        Hash a password with the preferred hasher, runs inside a worker
+        :param password: The raw password
+    """
+    return hashers.make_password(password)
+
+
+def _verify_password(password, encoded):
+    """
+        Check a password against its hash, runs inside a worker
+        :param password: The raw password
+        :param encoded: The stored hash
+        :return: A (is_correct, must_update) tuple, must_update being True
+            when the hash was made by another hasher or with another cost
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False, False
+    preferred = hashers.get_hasher('default')
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False, False
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    is_correct = hasher.verify(password, encoded)
+    if not is_correct and not hasher_changed and must_update:
+        hasher.harden_runtime(password, encoded)
+    return is_correct, is_correct and must_update
+
+
+def get_mp_context():
+    """
+        Return how the workers are started. They are never forked from
+        the server process, whose threads may hold locks that would stay
+        locked forever inside the children
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def get_executor():
+    """
+        Return the process pool hashing the passwords, None when the
+        NOTES_HASHING_WORKERS setting is 0 and they are hashed inline.
+        The pool bounds the number of cores spent on hashing, a burst
+        of registrations queues instead of taking every core
+    """
+    global _executor
+    workers = getattr(settings, 'NOTES_HASHING_WORKERS', 0)
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_mp_context(),
+                                            initializer=_setup_worker,
+                                            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', ''),
+                                                      get_hashing_settings()))
+        return _executor
+
+
+def shutdown_executor():
+    """
+        Stop the worker processes, the next hash starts a new pool
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    """
+        Restart the pool when the hashing settings change, the workers
+        read them when they start
+        :param setting: The name of the changed setting
+    """
+    if setting == 'NOTES_HASHING_WORKERS' or is_hashing_setting(setting):
+        shutdown_executor()
+
+
+def discard_executor(executor):
+    """
+        Drop a broken pool, a worker died (killed, out of memory) and
+        it rejects every task. The next hash starts a new pool
+        :param executor: The broken pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def _run(function, *args):
+    executor = get_executor()
+    if executor is None:
+        return function(*args)
+    try:
+        return executor.submit(function, *args).result()
+    except BrokenProcessPool:
+        discard_executor(executor)
+        return function(*args)
+
+
+async def _arun(function, *args):
+    executor = get_executor()
+    if executor is None:
+        return function(*args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+    except BrokenProcessPool:
+        discard_executor(executor)
+        return function(*args)
+
+
+def make_password(password):
+    """
+        Hash a password inside the pool, the calling thread only waits
+        :param password: The raw password, None makes an unusable password
+    """
+    if password is None:
+        return hashers.make_password(None)
+    return _run(_make_password, password)
+
+
+def verify_password(password, encoded):
+    """
+        Check a password inside the pool
+        :param password: The raw password
+        :param encoded: The stored hash
+        :return: A (is_correct, must_update) tuple
+    """
+    return _run(_verify_password, password, encoded)
+
+
+async def amake_password(password):
+    """
+        Asynchronous counterpart of make_password
+        :param password: The raw password
+    """
+    if password is None:
+        return hashers.make_password(None)
+    return await _arun(_make_password, password)
+
+
+async def averify_password(password, encoded):
+    """
+        Asynchronous counterpart of verify_password
+        :param password: The raw password
+        :param encoded: The stored hash
+    """
+    return await _arun(_verify_password, password, encoded)
@@ -0,0 +1,66 @@
+import hashlib
+import time
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from .throttling import reset_requests, take_request
+
+LOGIN_KIND = 'login'
+IP_SCOPE = 'ip'
+EMAIL_SCOPE = 'email'
+DEFAULT_RATES = {IP_SCOPE: '30/min', EMAIL_SCOPE: '5/min'}
+
+
+def get_rate(scope):
+    """
+        Return the rate of a scope from the NOTES_LOGIN_THROTTLE_RATES setting
+        :param scope: IP_SCOPE or EMAIL_SCOPE
+    """
+    return getattr(settings, 'NOTES_LOGIN_THROTTLE_RATES', DEFAULT_RATES).get(scope, DEFAULT_RATES[scope])
+
+
+def get_throttle_ident(ident):
+    """
+        Return the ident used inside the cache keys, it is hashed so that
+        any email is a valid key
+        :param ident: The ip address or the email
+    """
+    return hashlib.md5(ident.encode('utf-8')).hexdigest()
+
+
+def take_token(scope, ident):
+    """
+        Count a login attempt of an ip address or an email inside the
+        sliding window of its scope
+        :param scope: IP_SCOPE or EMAIL_SCOPE
+        :param ident: The ip address or the email
+        :return: 0 when the attempt is allowed, else the seconds to wait
+    """
+    return take_request(LOGIN_KIND, scope, get_throttle_ident(ident), get_rate(scope), time.time())
+
+
+def check_login(request, email):
+    """
+        Count the attempt for the client ip address and for the email
+        before checking the password, so that floods of login attempts
+        are rejected without any hashing. The address is the one the API
+        throttles use, X-Forwarded-For only counts behind NUM_PROXIES
+        :param request: The login request
+        :param email: The email sent by the client
+        :raise Throttled: When one of them made too many attempts
+    """
+    wait = max(take_token(IP_SCOPE, BaseThrottle().get_ident(request)),
+               take_token(EMAIL_SCOPE, email.strip().lower()))
+    if wait:
+        raise Throttled(wait)
+
+
+def reset_login(email):
+    """
+        Forget the attempts made for an email after a successful login
+        :param email: The email of the user
+    """
+    reset_requests(LOGIN_KIND, EMAIL_SCOPE, get_throttle_ident(email.strip().lower()), get_rate(EMAIL_SCOPE),
+                   time.time())
@@ -0,0 +1,68 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from notes import urls_name, views
+from notes.models import UserModel
+from rest_framework.reverse import reverse
+
+
+class Command(BaseCommand):
+    """
+        Compare the notes created per second by one POST per notes on the
+        notes list and by one POST on the bulk endpoint. Each request is
+        committed like in production, the benchmark user and its notes
+        are deleted at the end
+    """
+    help = 'Benchmark the single and the bulk notes creation'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--notes', type=int, nargs='+', default=[100, 1000, 10000])
+
+    # The benchmark client would be throttled like any other
+    @override_settings(NOTES_THROTTLE_RATES={})
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print one line per number of notes
+        """
+        self.request_factory = RequestFactory()
+        owner = UserModel.objects.create(email='bench.bulk.notes@localhost')
+        try:
+            for count in options['notes']:
+                notes = [{'title': 'title %d' % index, 'body': 'body ' * 20, 'tags': 'created'}
+                         for index in range(count)]
+                single_rate = count / self.__measure(lambda: [
+                    self.__post(views.ListNotes, urls_name.NOTES_LIST_NAME, owner, item) for item in notes])
+                bulk_rate = count / self.__measure(lambda: self.__post(views.BulkNotes, urls_name.NOTES_BULK,
+                                                                       owner, notes))
+                self.stdout.write('%8d notes  single %10.0f notes/s  bulk %10.0f notes/s  x%.1f'
+                                  % (count, single_rate, bulk_rate, bulk_rate / single_rate))
+        finally:
+            owner.delete()
+
+    def __post(self, view, url_name, owner, data):
+        """
+            Post json data to a view
+            :param view: The view class
+            :param url_name: The name of the url of the view
+            :param owner: The user making the request
+            :param data: The json body
+        """
+        request = self.request_factory.post(reverse(url_name), json.dumps(data), content_type='application/json')
+        request.user = owner
+        request._dont_enforce_csrf_checks = True
+        return view.as_view()(request)
+
+    def __measure(self, run):
+        """
+            Return the seconds taken by a run
+            :param run: Callable creating the notes
+        """
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
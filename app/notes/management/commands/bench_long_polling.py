@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+
+from notes import async_views, constants, urls_name, views
+from notes.models import Notes, UserModel
+from rest_framework.reverse import reverse
+
+
+class Command(BaseCommand):
+    """
+        Compare clients waiting for a change of their notes list through
+        the synchronous list polled every --interval seconds, each request
+        holding one of --workers threads like a WSGI server, and through
+        one ?wait= long-polling request per client on the asynchronous list.
+        A notes is created after --delay seconds, the command prints how
+        many requests were needed and how long the clients took to see it
+    """
+    help = 'Benchmark synchronous polling against asynchronous long polling of the notes list'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--clients', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--interval', type=float, default=0.5)
+        parser.add_argument('--delay', type=float, default=2)
+
+    # The benchmark client would be throttled like any other
+    @override_settings(NOTES_THROTTLE_RATES={})
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print one line per number of clients
+        """
+        self.workers = options['workers']
+        self.interval = options['interval']
+        self.delay = options['delay']
+        owner = UserModel.objects.create(email='bench.long.polling@localhost')
+        try:
+            for clients in options['clients']:
+                for name, run in (('sync polling', self.__run_sync), ('async long polling', self.__run_async)):
+                    requests, latencies = run(owner, clients)
+                    self.stdout.write('%6d clients  %-18s %8d requests  %8.3fs mean  %8.3fs max to see the change'
+                                      % (clients, name, requests, sum(latencies) / len(latencies), max(latencies)))
+        finally:
+            owner.delete()
+
+    def __etag(self, owner):
+        """
+            Return the current ETag of the notes list of the owner
+            :param owner: The user polling its notes
+        """
+        request = RequestFactory().get(reverse(urls_name.NOTES_LIST_NAME))
+        request.user = owner
+        return views.ListNotes.as_view()(request)['ETag']
+
+    def __create_notes(self, owner):
+        """
+            :param owner: The owner of the new notes
+        """
+        Notes.objects.create(title='changed', body='changed', tags='created', owner=owner)
+
+    def __run_sync(self, owner, clients):
+        """
+            Poll the synchronous list until every client saw the change
+            :param owner: The user polling its notes
+            :param clients: The number of clients
+            :return: A (number of requests, latencies) tuple
+        """
+        etag = self.__etag(owner)
+        request_factory = RequestFactory()
+        counter = {'requests': 0}
+        lock = threading.Lock()
+        changed_at = []
+
+        def poll():
+            request = request_factory.get(reverse(urls_name.NOTES_LIST_NAME), HTTP_IF_NONE_MATCH=etag)
+            request.user = owner
+            try:
+                return views.ListNotes.as_view()(request).status_code
+            finally:
+                close_old_connections()
+
+        def client(pool):
+            while True:
+                response_status = pool.submit(poll).result()
+                with lock:
+                    counter['requests'] += 1
+                if response_status == 200:
+                    return time.perf_counter()
+                time.sleep(self.interval)
+
+        with ThreadPoolExecutor(self.workers) as pool, ThreadPoolExecutor(clients) as client_threads:
+            futures = [client_threads.submit(client, pool) for _ in range(clients)]
+            time.sleep(self.delay)
+            changed_at.append(time.perf_counter())
+            self.__create_notes(owner)
+            seen_at = [future.result() for future in futures]
+        return counter['requests'], [max(seen - changed_at[0], 0) for seen in seen_at]
+
+    def __run_async(self, owner, clients):
+        """
+            Long poll the asynchronous list until every client saw the change
+            :param owner: The user polling its notes
+            :param clients: The number of clients
+            :return: A (number of requests, latencies) tuple
+        """
+        request_factory = AsyncRequestFactory()
+        url = '%s?%s=%d' % (reverse(urls_name.ASYNC_NOTES_LIST_NAME), constants.WAIT_QUERY_PARAM,
+                            self.delay * 2 + 1)
+
+        async def get(etag=None):
+            request = request_factory.get(url)
+            # The asynchronous factory does not turn its extra arguments into headers
+            if etag is not None:
+                request.META['HTTP_IF_NONE_MATCH'] = etag
+            request.user = owner
+            return await async_views.list_notes(request)
+
+        async def client(etag):
+            await get(etag)
+            return time.perf_counter()
+
+        async def change():
+            await asyncio.sleep(self.delay)
+            changed_at = time.perf_counter()
+            await sync_to_async(self.__create_notes)(owner)
+            return changed_at
+
+        async def run():
+            etag = (await get())['ETag']
+            return await asyncio.gather(change(), *[client(etag) for _ in range(clients)])
+
+        changed_at, *seen_at = async_to_sync(run)()
+        return clients, [max(seen - changed_at, 0) for seen in seen_at]
@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import override_settings
+
+from notes import hashing
+from notes.models import UserModel
+
+
+class Command(BaseCommand):
+    """
+        Measure the registrations per second made by --threads request
+        threads for every size of the hashing pool, and the registrations
+        per second of each core of the pool. The hasher and its cost come
+        from the settings, the benchmark users are deleted after each run
+    """
+    help = 'Benchmark the registrations per second for every size of the hashing pool'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--registrations', type=int, default=50)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print one line per size of the pool
+        """
+        registrations = options['registrations']
+        self.stdout.write('hasher %s' % settings.PASSWORD_HASHERS[0])
+        for workers in options['workers']:
+            with override_settings(NOTES_HASHING_WORKERS=workers):
+                # Start the worker processes before measuring
+                hashing.make_password('warm up')
+                emails = ['bench.hashing.%d.%d@localhost' % (workers, index) for index in range(registrations)]
+                try:
+                    start = time.perf_counter()
+                    with ThreadPoolExecutor(options['threads']) as threads:
+                        list(threads.map(self.__register, emails))
+                    rate = registrations / (time.perf_counter() - start)
+                finally:
+                    UserModel.objects.filter(email__in=emails).delete()
+                    hashing.shutdown_executor()
+            self.stdout.write('%4d workers  %10.1f registrations/s  %10.1f registrations/s per core'
+                              % (workers, rate, rate / max(workers, 1)))
+
+    def __register(self, email):
+        """
+            Register a user like the registration view
+            :param email: The email of the new user
+        """
+        try:
+            return UserModel.objects.create_user(email=email, password='bench password')
+        finally:
+            close_old_connections()
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from notes import compression, renderers, urls_name
+from notes.models import Notes, UserModel
+from rest_framework.reverse import reverse
+
+# The JSON encoders compared, orjson is skipped when it is not installed
+ENCODERS = (('stdlib', False), ('orjson', True))
+# The Accept-Encoding of the clients compared, br is skipped without the brotli package
+ACCEPT_ENCODINGS = ('identity', 'gzip', 'br')
+
+
+class Command(BaseCommand):
+    """
+        Measure the bytes per second of JSON rendered by the notes list
+        for pages of --page-size notes, with every JSON encoder and every
+        compression. The pages are served from the list cache so the
+        rendering and the compression are what is measured. The notes are
+        inserted inside a transaction rolled back at the end
+    """
+    help = 'Benchmark the JSON rendering and the compression of large notes lists'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--page-size', type=int, default=1000)
+        parser.add_argument('--fields', default='id,created,title,tags,owner,preview')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    # The benchmark client would be throttled like any other
+    @override_settings(NOTES_THROTTLE_RATES={})
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print one line per encoder and compression
+        """
+        page_size = options['page_size']
+        with transaction.atomic(), override_settings(NOTES_MAX_PAGE_SIZE=page_size):
+            owner = UserModel.objects.create(email='bench.renderers@localhost')
+            Notes.objects.bulk_create([
+                Notes(title='title %d' % index, body='body of the notes %d ' % index * 20, tags='created',
+                      owner=owner) for index in range(page_size)], batch_size=1000)
+            client = Client()
+            client.force_login(owner)
+            url = reverse(urls_name.NOTES_LIST_NAME)
+            params = {'page_size': page_size, 'fields': options['fields']}
+            for name, fast_json in ENCODERS:
+                if fast_json and renderers.orjson is None:
+                    continue
+                for accept_encoding in ACCEPT_ENCODINGS:
+                    if accept_encoding != 'identity' and accept_encoding not in compression.get_encodings():
+                        continue
+                    with override_settings(NOTES_FAST_JSON=fast_json):
+                        rendered, sent, elapsed = self.__measure(client, url, params, accept_encoding,
+                                                                 options['repeat'])
+                    self.stdout.write('%-8s %-10s %10d bytes  %10d sent  %8.1f MB/s rendered' % (
+                        name, accept_encoding, rendered, sent, rendered / elapsed / 10 ** 6))
+            transaction.set_rollback(True)
+
+    def __measure(self, client, url, params, accept_encoding, repeat):
+        """
+            Return the size of the JSON, the size sent and the best time out of repeat requests
+            :param client: The client logged in as the owner of the notes
+            :param url: The url of the notes list
+            :param params: The query parameters
+            :param accept_encoding: The Accept-Encoding sent
+            :param repeat: The number of requests
+        """
+        # The first request fills the list cache
+        client.get(url, params)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url, params, HTTP_ACCEPT_ENCODING=accept_encoding)
+            best = min(best, time.perf_counter() - start)
+        identity = client.get(url, params, HTTP_ACCEPT_ENCODING='identity')
+        return len(identity.content), len(response.content), best
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Notes, UserModel
+from notes.serializers import NotesReadSerializer, NotesSerializer
+
+
+class Command(BaseCommand):
+    """
+        Compare the rows per second rendered by NotesSerializer and
+        NotesReadSerializer, including the fetch of the rows.
+        The notes are inserted inside a transaction rolled back at the end
+    """
+    help = 'Benchmark the notes serializers at several table sizes'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print one line per size and serializer
+        """
+        with transaction.atomic():
+            owner = UserModel.objects.create(email='bench.serializers@localhost')
+            inserted = 0
+            for rows in sorted(options['rows']):
+                Notes.objects.bulk_create(
+                    [Notes(title='title %d' % index, body='body ' * 20, tags='created', owner=owner)
+                     for index in range(inserted, rows)], batch_size=1000)
+                inserted = rows
+                queryset = Notes.objects.with_owner().filter(owner=owner)
+                model_rate = self.__measure(lambda: NotesSerializer(queryset.all(), many=True).data,
+                                            rows, options['repeat'])
+                read_rate = self.__measure(lambda: NotesReadSerializer(NotesReadSerializer.project(queryset)).data,
+                                           rows, options['repeat'])
+                self.stdout.write('%8d rows  NotesSerializer %12.0f rows/s  NotesReadSerializer %12.0f rows/s  x%.1f'
+                                  % (rows, model_rate, read_rate, read_rate / model_rate))
+            transaction.set_rollback(True)
+
+    def __measure(self, serialize, rows, repeat):
+        """
+            Return the best rows per second out of repeat runs
+            :param serialize: Callable fetching and serializing the rows
+            :param rows: The number of rows being serialized
+            :param repeat: The number of runs
+        """
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serialize()
+            best = min(best, time.perf_counter() - start)
+        return rows / best
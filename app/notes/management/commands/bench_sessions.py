@@ -0,0 +1,92 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client, override_settings
+
+from notes import sessions, urls_name
+from notes.models import UserModel
+from rest_framework.reverse import reverse
+
+# The session engines compared, with the write-behind of notes.sessions
+ENGINES = (
+    ('db', 'django.contrib.sessions.backends.db', False),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db', False),
+    ('cache', 'notes.sessions', False),
+    ('cache+write-behind', 'notes.sessions', True),
+)
+BENCH_PASSWORD = 'bench password'
+BENCH_LOGIN_RATES = {'ip': '1000000000/s', 'email': '1000000000/s'}
+
+
+class Command(BaseCommand):
+    """
+        Measure the latency of the logins and of the authenticated GET of
+        the notes list made by --clients concurrent clients for every
+        session engine. The passwords are hashed with a cheap cost so that
+        the sessions are what is compared, the benchmark users are deleted
+    """
+    help = 'Benchmark the login and authenticated request latency of every session engine'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=20)
+
+    # The benchmark clients would be throttled like any other
+    @override_settings(NOTES_THROTTLE_RATES={}, NOTES_LOGIN_THROTTLE_RATES=BENCH_LOGIN_RATES,
+                       NOTES_HASHING_WORKERS=0, NOTES_PBKDF2_ITERATIONS=1000)
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print the p50 and p95 latencies by engine
+        """
+        self.requests = options['requests']
+        users = [UserModel.objects.create_user(email='bench.sessions.%d@localhost' % index, password=BENCH_PASSWORD)
+                 for index in range(options['clients'])]
+        try:
+            for name, engine, write_behind in ENGINES:
+                with override_settings(SESSION_ENGINE=engine, NOTES_SESSION_WRITE_BEHIND=write_behind):
+                    with ThreadPoolExecutor(len(users)) as threads:
+                        results = list(threads.map(self.__run_client, users))
+                    sessions.flush_pending_sessions()
+                logins = [latency for result in results for latency in result[0]]
+                reads = [latency for result in results for latency in result[1]]
+                self.stdout.write('%-20s login %8.2fms p50 %8.2fms p95  GET %8.2fms p50 %8.2fms p95' % (
+                    name, *self.__percentiles(logins), *self.__percentiles(reads)))
+        finally:
+            UserModel.objects.filter(id__in=[user.id for user in users]).delete()
+
+    @staticmethod
+    def __percentiles(latencies):
+        """
+            :param latencies: The latencies in seconds
+            :return: The p50 and p95 latencies in milliseconds
+        """
+        if len(latencies) < 2:
+            return latencies[0] * 1000, latencies[0] * 1000
+        cut_points = statistics.quantiles(latencies, n=20)
+        return cut_points[9] * 1000, cut_points[18] * 1000
+
+    def __run_client(self, user):
+        """
+            Log a client in and get its notes list, --requests times
+            :param user: The user of the client
+            :return: The latencies of the logins and of the GET
+        """
+        logins, reads = [], []
+        try:
+            for _ in range(self.requests):
+                client = Client()
+                start = time.perf_counter()
+                client.post(reverse(urls_name.LOGIN_NAME), {'email': user.email, 'password': BENCH_PASSWORD})
+                logins.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                client.get(reverse(urls_name.NOTES_LIST_NAME))
+                reads.append(time.perf_counter() - start)
+        finally:
+            close_old_connections()
+        return logins, reads
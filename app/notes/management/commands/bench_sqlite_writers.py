@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from notes import urls_name
+from notes.models import UserModel
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+# The journal mode is stored inside the database file, the default profile
+# has to switch it back from WAL
+DEFAULT_PRAGMAS = {'journal_mode': 'delete'}
+
+
+class Command(BaseCommand):
+    """
+        Compare the default SQLite profile with the tuned one of the
+        SQLITE_TUNED_PRAGMAS setting: for every number of --writers, each
+        writer thread creates --notes notes through the API and the command
+        prints the notes created per second and the share of failed
+        requests. The benchmark users and their notes are deleted
+    """
+    help = 'Benchmark concurrent notes writers on the default and the tuned SQLite profile'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--writers', type=int, nargs='+', default=[1, 4, 16])
+        parser.add_argument('--notes', type=int, default=50)
+
+    # The benchmark clients would be throttled like any other
+    @override_settings(NOTES_THROTTLE_RATES={})
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print one line per profile and number of writers
+        """
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not a SQLite database')
+        self.notes = options['notes']
+        users = [UserModel.objects.create_user(email='bench.sqlite.%d@localhost' % index)
+                 for index in range(max(options['writers']))]
+        try:
+            for name, pragmas in (('default', DEFAULT_PRAGMAS), ('tuned', settings.SQLITE_TUNED_PRAGMAS)):
+                with override_settings(NOTES_SQLITE_PRAGMAS=pragmas):
+                    # The next connection applies the pragmas of the profile
+                    connections.close_all()
+                    connection.ensure_connection()
+                    for writers in options['writers']:
+                        start = time.perf_counter()
+                        with ThreadPoolExecutor(writers) as threads:
+                            results = list(threads.map(self.__write, users[:writers]))
+                        elapsed = time.perf_counter() - start
+                        created = sum(result[0] for result in results)
+                        failed = sum(result[1] for result in results)
+                        self.stdout.write('%-8s %4d writers  %10.1f notes/s  %6.2f%% failed' % (
+                            name, writers, created / elapsed, 100 * failed / (created + failed)))
+        finally:
+            UserModel.objects.filter(id__in=[user.id for user in users]).delete()
+            connections.close_all()
+
+    def __write(self, user):
+        """
+            Create --notes notes of a user through the API
+            :param user: The user of the writer
+            :return: The number of notes created and of failed requests
+        """
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        created = failed = 0
+        for index in range(self.notes):
+            response = client.post(reverse(urls_name.NOTES_LIST_NAME), {
+                'title': 'bench %d' % index, 'body': 'written by a concurrent writer', 'tags': 'created'})
+            if response.status_code == status.HTTP_201_CREATED:
+                created += 1
+            else:
+                failed += 1
+        return created, failed
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from notes.models import Notes, UserModel
+from notes.serializers import NotesReadSerializer
+
+# The filters measured, on one owner or on every owner
+FILTERS = (
+    ('owner, tags=done', True, ['done']),
+    ('owner, tags=done,progress', True, ['done', 'progress']),
+    ('tags=done', False, ['done']),
+    ('tags=done,progress', False, ['done', 'progress']),
+)
+
+
+class Command(BaseCommand):
+    """
+        Measure the size of the notes table and of each of its indexes,
+        and the latency of the tags filters of FilterAPIView, with
+        --rows notes spread over --owners owners. The notes are inserted
+        inside a transaction rolled back at the end
+    """
+    help = 'Benchmark the storage of the notes and the latency of the tags filters'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--owners', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print the sizes then the latencies
+        """
+        rows = options['rows']
+        with transaction.atomic():
+            owners = [UserModel.objects.create(email='bench.tags.%d@localhost' % index)
+                      for index in range(options['owners'])]
+            choices = [tags for tags, _ in Notes.STATUS_CHOICE]
+            Notes.objects.bulk_create([
+                Notes(title='title %d' % index, body='body', tags=choices[index % len(choices)],
+                      owner=owners[index % len(owners)]) for index in range(rows)], batch_size=2000)
+            for name, size in self.__sizes():
+                self.stdout.write('%-32s %12d bytes  %8.1f bytes/notes' % (name, size, size / rows))
+            for name, by_owner, tags in FILTERS:
+                queryset = Notes.objects.with_owner().filter(tags__in=tags)
+                if by_owner:
+                    queryset = queryset.filter(owner=owners[0])
+                page = NotesReadSerializer.project(queryset.order_by('created', 'id'))[:100]
+                latencies = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    list(page.all())
+                    latencies.append(time.perf_counter() - start)
+                self.stdout.write('%-32s %8.3fms p50  %8.3fms p95' % (
+                    name, statistics.median(latencies) * 1000, statistics.quantiles(latencies, n=20)[18] * 1000))
+            transaction.set_rollback(True)
+
+    def __sizes(self):
+        """
+            Return the (name, bytes) of the notes table and of its indexes
+        """
+        table = Notes._meta.db_table
+        with connection.cursor() as cursor:
+            indexes = sorted(name for name, constraint in
+                             connection.introspection.get_constraints(cursor, table).items() if constraint['index'])
+            names = [table] + indexes
+            if connection.vendor == 'sqlite':
+                cursor.execute('SELECT name, SUM(pgsize) FROM dbstat WHERE name IN (%s) GROUP BY name'
+                               % ', '.join(['%s'] * len(names)), names)
+            elif connection.vendor == 'postgresql':
+                cursor.execute('SELECT relname, pg_relation_size(oid) FROM pg_class WHERE relname IN (%s)'
+                               % ', '.join(['%s'] * len(names)), names)
+            else:
+                return []
+            sizes = dict(cursor.fetchall())
+        return [(name, sizes.get(name, 0)) for name in names]
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from notes import throttling, urls_name
+from notes.models import UserModel
+from rest_framework.reverse import reverse
+
+# Rates high enough for the benchmark to never be rejected
+BENCH_RATES = {'%s-%s' % (kind, scope): '1000000000/min' for kind in ('user', 'ip')
+               for scope in (throttling.READ_SCOPE, throttling.WRITE_SCOPE)}
+
+
+class Command(BaseCommand):
+    """
+        Measure the time the user and ip throttles add to a request,
+        against the cache configured in the settings
+    """
+    help = 'Benchmark the time added by the throttles to every request'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--clients', type=int, default=100)
+
+    @override_settings(NOTES_THROTTLE_RATES=BENCH_RATES)
+    def handle(self, *args, **options):
+        """
+            Run the benchmark and print the time by request for reads and writes
+        """
+        request_factory = RequestFactory()
+        users = [UserModel(pk=-index, email='bench.throttling.%d@localhost' % index)
+                 for index in range(1, options['clients'] + 1)]
+        for method in ('get', 'post'):
+            requests = []
+            for index, user in enumerate(users):
+                request = getattr(request_factory, method)(reverse(urls_name.NOTES_LIST_NAME),
+                                                           REMOTE_ADDR='10.0.%d.%d' % divmod(index, 256))
+                request.user = user
+                requests.append(request)
+            start = time.perf_counter()
+            for index in range(options['requests']):
+                throttling.check_throttles(requests[index % len(requests)], None)
+            elapsed = time.perf_counter() - start
+            self.stdout.write('%-4s %8d requests  %8.1f us/request' % (
+                method.upper(), options['requests'], elapsed * 10 ** 6 / options['requests']))
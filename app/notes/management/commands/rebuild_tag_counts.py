@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from notes.models import NotesTagCount
+
+
+class Command(BaseCommand):
+    """
+        Count the notes by owner and tags again and replace the counts
+        which drifted, e.g. after writes made by raw SQL
+    """
+    help = 'Rebuild the number of notes by owner and tags'
+
+    def add_arguments(self, parser):
+        """
+            :param parser: The argument parser of the command
+        """
+        parser.add_argument('--owner', type=int, nargs='+', help='Only rebuild the counts of these owners')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """
+            Rebuild the counts and print how many were wrong
+        """
+        wrong = NotesTagCount.objects.rebuild(owner_ids=options['owner'], batch_size=options['batch_size'])
+        self.stdout.write('%d tag counts were wrong' % wrong)
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-17 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_alter_notes_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(fields=['owner', 'created', 'id'], name='notes_owner_created_idx'),
+        ),
+    ]
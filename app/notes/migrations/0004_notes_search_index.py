@@ -0,0 +1,72 @@
+from django.db import migrations
+
+SQLITE_CREATE_SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE notes_notes_fts USING fts5("
+    "title, body, content='notes_notes', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER notes_notes_fts_insert AFTER INSERT ON notes_notes BEGIN "
+    "INSERT INTO notes_notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER notes_notes_fts_delete AFTER DELETE ON notes_notes BEGIN "
+    "INSERT INTO notes_notes_fts(notes_notes_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER notes_notes_fts_update AFTER UPDATE OF title, body ON notes_notes BEGIN "
+    "INSERT INTO notes_notes_fts(notes_notes_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO notes_notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "INSERT INTO notes_notes_fts(notes_notes_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS notes_notes_fts_insert",
+    "DROP TRIGGER IF EXISTS notes_notes_fts_delete",
+    "DROP TRIGGER IF EXISTS notes_notes_fts_update",
+    "DROP TABLE IF EXISTS notes_notes_fts",
+]
+
+POSTGRESQL_CREATE_SEARCH_INDEX = [
+    "ALTER TABLE notes_notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED",
+    "CREATE INDEX notes_notes_search_idx ON notes_notes USING GIN (search_vector)",
+]
+
+POSTGRESQL_DROP_SEARCH_INDEX = [
+    "DROP INDEX IF EXISTS notes_notes_search_idx",
+    "ALTER TABLE notes_notes DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def run_statements(schema_editor, sqlite_statements, postgresql_statements):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite' and sqlite_has_fts5(schema_editor):
+        statements = sqlite_statements
+    elif vendor == 'postgresql':
+        statements = postgresql_statements
+    else:
+        statements = []
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    run_statements(schema_editor, SQLITE_CREATE_SEARCH_INDEX, POSTGRESQL_CREATE_SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    run_statements(schema_editor, SQLITE_DROP_SEARCH_INDEX, POSTGRESQL_DROP_SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_notes_owner_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
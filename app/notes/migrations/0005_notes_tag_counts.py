@@ -0,0 +1,38 @@
+# Generated by Django 4.0.10 on 2026-10-17 16:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_tags(apps, schema_editor):
+    Notes = apps.get_model('notes', 'Notes')
+    NotesTagCount = apps.get_model('notes', 'NotesTagCount')
+    db_alias = schema_editor.connection.alias
+    rows = Notes.objects.using(db_alias).order_by().values_list('owner_id', 'tags').annotate(total=models.Count('id'))
+    NotesTagCount.objects.using(db_alias).bulk_create(
+        [NotesTagCount(owner_id=owner_id, tags=tags, count=total) for owner_id, tags, total in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_notes_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotesTagCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tags', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='notestagcount',
+            constraint=models.UniqueConstraint(fields=('owner', 'tags'), name='notes_tag_count_owner_tags_uniq'),
+        ),
+        migrations.RunPython(count_tags, migrations.RunPython.noop),
+    ]
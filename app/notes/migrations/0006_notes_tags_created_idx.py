@@ -0,0 +1,21 @@
+# Generated by Django 4.0.10 on 2026-10-17 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_notes_tag_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(fields=['tags', 'created', 'id'], name='notes_tags_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(fields=['owner', 'tags', 'created', 'id'], name='notes_owner_tags_created_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+from importlib import import_module
+
+from django.db import migrations, models
+import notes.models
+
+search_index = import_module('notes.migrations.0004_notes_search_index')
+
+STATUS_NAMES = ['created', 'progress', 'done']
+# The single letter statuses of the first migration, 'C' stayed the default after them
+LEGACY_NAMES = {'C': 'created', 'P': 'progress', 'D': 'done'}
+
+
+def encode_tags(apps, schema_editor):
+    Notes = apps.get_model('notes', 'Notes')
+    notes = Notes.objects.using(schema_editor.connection.alias)
+    unknown = set(notes.exclude(tags__in=STATUS_NAMES + list(LEGACY_NAMES)).values_list('tags', flat=True).distinct())
+    if unknown:
+        raise ValueError('Notes with unknown tags, fix them before migrating: %s' % ', '.join(sorted(unknown)))
+    for name in STATUS_NAMES:
+        notes.filter(tags=name).update(tags_code=name)
+    for legacy, name in LEGACY_NAMES.items():
+        notes.filter(tags=legacy).update(tags_code=name)
+
+
+def decode_tags(apps, schema_editor):
+    Notes = apps.get_model('notes', 'Notes')
+    notes = Notes.objects.using(schema_editor.connection.alias)
+    for name in STATUS_NAMES:
+        notes.filter(tags_code=name).update(tags=name)
+
+
+def delete_counts(apps, schema_editor):
+    NotesTagCount = apps.get_model('notes', 'NotesTagCount')
+    NotesTagCount.objects.using(schema_editor.connection.alias).all().delete()
+
+
+def count_tags(apps, schema_editor):
+    Notes = apps.get_model('notes', 'Notes')
+    NotesTagCount = apps.get_model('notes', 'NotesTagCount')
+    db_alias = schema_editor.connection.alias
+    rows = Notes.objects.using(db_alias).order_by().values_list('owner_id', 'tags').annotate(total=models.Count('id'))
+    NotesTagCount.objects.using(db_alias).bulk_create(
+        [NotesTagCount(owner_id=owner_id, tags=tags, count=total) for owner_id, tags, total in rows], batch_size=1000)
+
+
+def create_search_triggers(apps, schema_editor):
+    # SQLite rebuilds the notes table to drop or alter a column, which drops its triggers
+    search_index.run_statements(schema_editor, search_index.SQLITE_DROP_SEARCH_INDEX, [])
+    search_index.run_statements(schema_editor, search_index.SQLITE_CREATE_SEARCH_INDEX, [])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_notes_tags_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_search_triggers),
+        migrations.RemoveIndex(
+            model_name='notes',
+            name='notes_tags_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notes',
+            name='notes_owner_tags_created_idx',
+        ),
+        migrations.RemoveConstraint(
+            model_name='notestagcount',
+            name='notes_tag_count_owner_tags_uniq',
+        ),
+        migrations.AddField(
+            model_name='notes',
+            name='tags_code',
+            field=notes.models.StatusField(default='created'),
+        ),
+        migrations.RunPython(encode_tags, decode_tags),
+        migrations.RemoveField(
+            model_name='notes',
+            name='tags',
+        ),
+        migrations.RenameField(
+            model_name='notes',
+            old_name='tags_code',
+            new_name='tags',
+        ),
+        # The counts are dropped while their column changes type and counted again
+        migrations.RunPython(delete_counts, count_tags),
+        migrations.AlterField(
+            model_name='notestagcount',
+            name='tags',
+            field=notes.models.StatusField(),
+        ),
+        migrations.RunPython(count_tags, delete_counts),
+        migrations.AddConstraint(
+            model_name='notestagcount',
+            constraint=models.UniqueConstraint(fields=('owner', 'tags'), name='notes_tag_count_owner_tags_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(fields=['tags', 'created', 'id'], name='notes_tags_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notes',
+            index=models.Index(fields=['owner', 'tags', 'created', 'id'], name='notes_owner_tags_created_idx'),
+        ),
+        migrations.RunPython(create_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.0.10 on 2026-10-17 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_tags_status_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('token_id', models.CharField(blank=True, default='', max_length=32)),
+                ('issued_before', models.BigIntegerField(default=0)),
+                ('expires', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='revokedtoken',
+            index=models.Index(fields=['token_id'], name='revoked_token_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revokedtoken',
+            index=models.Index(fields=['user_id', 'issued_before'], name='revoked_token_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revokedtoken',
+            index=models.Index(fields=['expires'], name='revoked_token_expires_idx'),
+        ),
+    ]
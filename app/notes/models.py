@@ -1,27 +1,350 @@
-from django.db import models, IntegrityError
+from collections import Counter
+
+from django.core import exceptions
+from django.db import connections, models, router, transaction, IntegrityError
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.utils.functional import cached_property
+from . import hashing
+from . import tokens
+from . import user_cache
+
+# The statuses of the notes, and the small integer storing each of them
+STATUS_CHOICE = [
+    ('created', 'Created'), ('progress', 'In Progress'), ('done', 'Done')
+]
+STATUS_CODES = {'created': 1, 'progress': 2, 'done': 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+class StatusField(models.PositiveSmallIntegerField):
+    """
+        Status of the notes stored as a small integer code. Python, the
+        lookups and the API only ever see the names of the statuses,
+        they are converted to their codes on the way to the database
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', STATUS_CHOICE)
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def validators(self):
+        # The range validators of the integer fields would compare the names with numbers
+        return list(self._validators)
+
+    def from_db_value(self, value, expression, connection):
+        return STATUS_NAMES.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in STATUS_CODES:
+            return value
+        if value in STATUS_NAMES:
+            return STATUS_NAMES[value]
+        raise exceptions.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                         params={'value': value})
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            try:
+                return STATUS_CODES[value]
+            except KeyError:
+                raise ValueError('Unknown status %r, expected one of %s' % (value, ', '.join(STATUS_CODES)))
+        return super().get_prep_value(value)
 
 
 # Create your models here.
+class NotesQuerySet(models.QuerySet):
+    """
+        Queryset of the notes with the projections used by the API
+    """
+
+    def with_owner(self):
+        """
+            Join the owner in the same query and only load its email,
+            which is the only field of the owner being serialized
+        """
+        return self.select_related('owner').only(
+            'id', 'created', 'title', 'body', 'tags', 'owner__id', 'owner__email')
+
+    def summaries(self):
+        """
+            with_owner() without the body, which only the detail view returns
+        """
+        return self.with_owner().defer('body')
+
+    def count_tags(self):
+        """
+            Count the notes of the queryset by owner and tags
+            :return: A {(owner id, tags): number of notes} counter
+        """
+        rows = self.order_by().values_list('owner_id', 'tags').annotate(total=models.Count('id'))
+        return Counter({(owner_id, tags): total for owner_id, tags, total in rows})
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+            Create the notes and add them to the tag counts in the same transaction
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            NotesTagCount.objects.using(self.db).add_counts(Counter(
+                (notes.owner_id, notes.tags) for notes in created))
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+            Update the notes and move the ones whose tags changed between
+            the tag counts in the same transaction
+        """
+        if 'tags' not in fields:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            previous = dict(self.model.objects.using(self.db).filter(pk__in=[notes.pk for notes in objs])
+                            .select_for_update().values_list('pk', 'tags'))
+            # Through a plain queryset, whose update() does not count the tags again
+            updated = models.QuerySet(self.model, using=self.db).bulk_update(objs, fields, *args, **kwargs)
+            deltas = Counter()
+            for notes in objs:
+                if notes.pk in previous and previous[notes.pk] != notes.tags:
+                    deltas[notes.owner_id, previous[notes.pk]] -= 1
+                    deltas[notes.owner_id, notes.tags] += 1
+            NotesTagCount.objects.using(self.db).add_counts(deltas)
+        return updated
+
+    def lock_tags(self):
+        """
+            Lock the notes of the queryset until the end of the transaction
+            and read their owner and tags, so that the deltas applied to
+            the tag counts come from the rows actually written
+            :return: A {pk: (owner id, tags)} dict
+        """
+        return {pk: (owner_id, tags) for pk, owner_id, tags in
+                self.order_by().select_for_update().values_list('pk', 'owner_id', 'tags')}
+
+    def update(self, **kwargs):
+        """
+            Update the notes and move them between the tag counts when
+            the tags changed, in the same transaction. Tags computed by
+            an expression make the tags of the owners counted again
+        """
+        if 'tags' not in kwargs:
+            return super().update(**kwargs)
+        tags = kwargs['tags']
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = self.lock_tags()
+            # Only the locked notes are updated, through a plain queryset
+            # whose update() does not count the tags again
+            updated = models.QuerySet(self.model, using=self.db).filter(pk__in=rows).update(**kwargs)
+            if hasattr(tags, 'resolve_expression'):
+                NotesTagCount.objects.using(self.db).rebuild({owner_id for owner_id, _ in rows.values()})
+                return updated
+            deltas = Counter()
+            for owner_id, previous_tags in rows.values():
+                deltas[owner_id, previous_tags] -= 1
+                deltas[owner_id, tags] += 1
+            NotesTagCount.objects.using(self.db).add_counts(deltas)
+        return updated
+
+    def delete(self):
+        """
+            Delete the notes and remove them from the tag counts in the same transaction
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = self.lock_tags()
+            deleted = models.QuerySet(self.model, using=self.db).filter(pk__in=rows).delete()
+            NotesTagCount.objects.using(self.db).add_counts(
+                {key: -total for key, total in Counter(rows.values()).items()})
+        return deleted
+
+    def bulk_delete(self, batch_size=500):
+        """
+            Delete the notes with plain DELETE statements, without loading
+            them nor sending the model signals like bulk_create and
+            bulk_update, and remove them from the tag counts in the same
+            transaction. No model references the notes, so nothing has to cascade
+            :param batch_size: The number of notes deleted by statement
+            :return: The number of deleted notes
+        """
+        connection = connections[self.db]
+        sql = 'DELETE FROM %s WHERE %s IN (%%s)' % (connection.ops.quote_name(self.model._meta.db_table),
+                                                    connection.ops.quote_name(self.model._meta.pk.column))
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = self.lock_tags()
+            pks = list(rows)
+            with connection.cursor() as cursor:
+                for start in range(0, len(pks), batch_size):
+                    batch = pks[start:start + batch_size]
+                    cursor.execute(sql % ', '.join(['%s'] * len(batch)), batch)
+            NotesTagCount.objects.using(self.db).add_counts(
+                {key: -total for key, total in Counter(rows.values()).items()})
+        return len(pks)
+
+
 class Notes(models.Model):
     """
         Describe the model of a Notes and generate an ORM
     """
-    STATUS_CHOICE = [
-        ('created', 'Created'), ('progress', 'In Progress'), ('done', 'Done')
-    ]
+    STATUS_CHOICE = STATUS_CHOICE
 
     created = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=200)
     body = models.TextField()
-    tags = models.CharField(choices=STATUS_CHOICE, default='C', max_length=100)
+    tags = StatusField(default='created')
     owner = models.ForeignKey('UserModel', related_name='tasks', on_delete=models.CASCADE)
 
+    objects = NotesQuerySet.as_manager()
+
     class Meta:
         """
             Some optional field like ordering to sort the table
         """
         ordering = ('created',)
+        indexes = [
+            models.Index(fields=['owner', 'created', 'id'], name='notes_owner_created_idx'),
+            models.Index(fields=['tags', 'created', 'id'], name='notes_tags_created_idx'),
+            models.Index(fields=['owner', 'tags', 'created', 'id'], name='notes_owner_tags_created_idx'),
+        ]
+
+    def get_stored_row(self, using):
+        """
+            Lock the row of the notes until the end of the transaction and
+            read its stored owner and tags, the instance may be stale
+            :param using: The database alias of the write
+            :return: An (owner id, tags) tuple, None when there is no row
+        """
+        if self.pk is None:
+            return None
+        return Notes.objects.using(using).filter(pk=self.pk).lock_tags().get(self.pk)
+
+    def save(self, *args, **kwargs):
+        """
+            Save the notes and update the tag counts of its owner in the same transaction
+        """
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'tags' not in update_fields and 'owner' not in update_fields:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=using, savepoint=False):
+            previous = self.get_stored_row(using)
+            super().save(*args, **kwargs)
+            current = (self.owner_id, self.tags)
+            if update_fields is not None and previous is not None:
+                # The fields left out of update_fields keep their stored values
+                current = (self.owner_id if 'owner' in update_fields else previous[0],
+                           self.tags if 'tags' in update_fields else previous[1])
+            deltas = Counter({current: 1})
+            if previous is not None:
+                deltas[previous] -= 1
+            NotesTagCount.objects.using(using).add_counts(deltas)
+
+    def delete(self, using=None, keep_parents=False):
+        """
+            Delete the notes and remove it from the tag counts of its owner
+            in the same transaction, a notes already deleted changes nothing
+        """
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            previous = self.get_stored_row(using)
+            deleted = super().delete(using=using, keep_parents=keep_parents)
+            if previous is not None and deleted[0]:
+                NotesTagCount.objects.using(using).add_counts({previous: -1})
+        return deleted
+
+
+UPSERT_TAG_COUNTS_SQL = (
+    'INSERT INTO {table} ({owner}, {tags}, {count}) VALUES {values} '
+    'ON CONFLICT ({owner}, {tags}) DO UPDATE SET {count} = {table}.{count} + excluded.{count}'
+)
+
+
+class NotesTagCountQuerySet(models.QuerySet):
+    """
+        Queryset of the tag counts, which are only written by the
+        writes of the notes and by rebuild()
+    """
+
+    def add_counts(self, deltas, batch_size=300):
+        """
+            Add the deltas to the counts, the missing ones are created by
+            the same statement (an upsert supported by SQLite and PostgreSQL)
+            :param deltas: A {(owner id, tags): delta} mapping
+            :param batch_size: The number of counts written by statement
+        """
+        connection = connections[self.db]
+        tags_field = self.model._meta.get_field('tags')
+        rows = [(owner_id, tags_field.get_db_prep_value(tags, connection), delta)
+                for (owner_id, tags), delta in deltas.items() if delta]
+        if not rows:
+            return
+        names = {name: connection.ops.quote_name(column) for name, column in (
+            ('table', self.model._meta.db_table), ('owner', 'owner_id'), ('tags', 'tags'), ('count', 'count'))}
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(UPSERT_TAG_COUNTS_SQL.format(values=', '.join(['(%s, %s, %s)'] * len(batch)), **names),
+                               [value for row in batch for value in row])
+
+    def rebuild(self, owner_ids=None, batch_size=1000):
+        """
+            Count the notes again and replace the counts
+            :param owner_ids: The owners to count again, None for every owner
+            :param batch_size: The number of counts inserted by query
+            :return: The number of counts which were wrong
+        """
+        notes = Notes.objects.using(self.db)
+        counts = self
+        if owner_ids is not None:
+            notes = notes.filter(owner_id__in=owner_ids)
+            counts = counts.filter(owner_id__in=owner_ids)
+        with transaction.atomic(using=self.db, savepoint=False):
+            expected = notes.count_tags()
+            current = Counter({(owner_id, tags): count for owner_id, tags, count
+                               in counts.select_for_update().values_list('owner_id', 'tags', 'count')})
+            wrong = sum(1 for key in expected.keys() | current.keys() if expected[key] != current[key])
+            if wrong:
+                counts.delete()
+                self.bulk_create([NotesTagCount(owner_id=owner_id, tags=tags, count=count)
+                                  for (owner_id, tags), count in expected.items()], batch_size=batch_size)
+        return wrong
+
+
+class NotesTagCount(models.Model):
+    """
+        Number of notes of an owner by tags, kept up to date by the
+        writes of the notes so that the stats never count the notes
+    """
+    owner = models.ForeignKey('UserModel', related_name='tag_counts', on_delete=models.CASCADE)
+    tags = StatusField()
+    count = models.IntegerField(default=0)
+
+    objects = NotesTagCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'tags'], name='notes_tag_count_owner_tags_uniq'),
+        ]
+
+
+class UserQuerySet(models.QuerySet):
+    """
+        Queryset of the users, whose update() does what the signals of a
+        save do: it drops the cached copies of the users and rejects
+        their tokens
+    """
+
+    def update(self, **kwargs):
+        """
+            Update the users, then drop their cached copies and reject the
+            tokens carrying their previous flags. Updating only the last
+            login date keeps the tokens, like a save
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            user_ids = list(self.values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+            user_cache.invalidate_users(user_ids, using=self.db)
+            if set(kwargs) != {'last_login'}:
+                for user_id in user_ids:
+                    tokens.revoke_user_tokens(user_id)
+        return updated
 
 
 class UserManager(BaseUserManager):
@@ -44,7 +367,9 @@ class UserManager(BaseUserManager):
             user.is_staff = is_staff
             user.is_superuser = is_superuser
             user.set_password(password)
-            user.save(using=self._db)
+            # A savepoint, so that a duplicate email leaves any outer transaction usable
+            with transaction.atomic(using=self._db):
+                user.save(using=self._db)
             return user
         except IntegrityError:
             return None
@@ -82,7 +407,7 @@ class UserModel(AbstractBaseUser):
     """
         Define the model of the user
     """
-    objects = UserManager()
+    objects = UserManager.from_queryset(UserQuerySet)()
 
     username = None
     email = models.EmailField(('email address'), unique=True)
@@ -91,3 +416,55 @@ class UserModel(AbstractBaseUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
+
+    def get_session_auth_hash(self):
+        """
+            Return the hash stored with a cached user, whose password is
+            not loaded, or compute it from the password
+        """
+        session_auth_hash = getattr(self, '_session_auth_hash', None)
+        if session_auth_hash is not None:
+            return session_auth_hash
+        return super().get_session_auth_hash()
+
+    def set_password(self, raw_password):
+        """
+            Hash the password inside the hashing pool
+            :param raw_password: The raw password, None makes it unusable
+        """
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+            Check the password inside the hashing pool and rehash it
+            when it was made by another hasher or with another cost
+            :param raw_password: The raw password
+        """
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+        if must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
+
+
+class RevokedToken(models.Model):
+    """
+        Revocation of the signed tokens, kept inside the database so that
+        a logout or a ban is never undone by the eviction of a cache.
+        A row with a token id rejects that token, a row without one
+        rejects every token of the user issued before issued_before.
+        The rows are useless once the tokens they reject have expired
+    """
+    user_id = models.BigIntegerField()
+    token_id = models.CharField(max_length=32, blank=True, default='')
+    issued_before = models.BigIntegerField(default=0)
+    expires = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token_id'], name='revoked_token_id_idx'),
+            models.Index(fields=['user_id', 'issued_before'], name='revoked_token_user_idx'),
+            models.Index(fields=['expires'], name='revoked_token_expires_idx'),
+        ]
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.db import DEFAULT_DB_ALIAS
+
+from . import user_cache
+from . import versions
+
+NOTES_VERSION_KEY = 'notes-version:%s'
+NOTES_LIST_KEY = 'notes-list:%s:%s:%s:%s'
+GLOBAL_SCOPE = 'all'
+
+
+def get_scope(owner):
+    """
+        Return the cache scope of a list of notes
+        :param owner: The owner the notes are restricted to, None for every notes
+    """
+    return GLOBAL_SCOPE if owner is None else owner.pk
+
+
+def get_notes_version(owner):
+    """
+        Return the version of the notes of an owner, it changes on every
+        write of one of its notes
+        :param owner: The owner of the notes, None for every notes
+    """
+    return versions.get_version(NOTES_VERSION_KEY % get_scope(owner))
+
+
+async def aget_notes_version(owner):
+    """
+        Asynchronous counterpart of get_notes_version
+        :param owner: The owner of the notes, None for every notes
+    """
+    return await versions.aget_version(NOTES_VERSION_KEY % get_scope(owner))
+
+
+def bump_notes_version(owner_id, using=DEFAULT_DB_ALIAS):
+    """
+        Change the version of the notes of an owner and of the global
+        scope. Called by the signals on save and delete, writes skipping
+        the signals (bulk_create, update, ...) must call it themselves
+        :param owner_id: The primary key of the owner whose notes changed
+        :param using: The database alias of the write
+    """
+    versions.bump_versions([NOTES_VERSION_KEY % owner_id, NOTES_VERSION_KEY % GLOBAL_SCOPE], using=using)
+
+
+def get_url_hash(request):
+    """
+        Return a digest of the absolute url of a request
+        :param request: The request
+    """
+    return hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+
+
+def get_list_cache_key(owner, request, version=None, users_version=None):
+    """
+        Return the key of a cached list response, it also identifies
+        the response inside its ETag. The lists hold the email of the
+        owners, so the version of the users is part of the key
+        :param owner: The owner the notes are restricted to, None for every notes
+        :param request: The list request, its url and query parameters are part of the key
+        :param version: The version of the notes of the owner, read from the cache when None
+        :param users_version: The version of the users, read from the cache when None
+    """
+    if version is None:
+        version = get_notes_version(owner)
+    if users_version is None:
+        users_version = user_cache.get_users_version()
+    return NOTES_LIST_KEY % (get_scope(owner), version, users_version, get_url_hash(request))
@@ -0,0 +1,150 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class NotesCursorPagination(BasePagination):
+    """
+        Keyset pagination over the (created, id) ordering of the notes.
+        The cursor is the position of the last row seen, so every page
+        is a range scan starting right after it and deep pages cost
+        the same as the first one (no OFFSET involved)
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        """
+            Read the page size from the query parameters, capped by
+            the NOTES_MAX_PAGE_SIZE setting
+            :param request: The request being paginated
+            :return: The number of rows to return
+        """
+        page_size = getattr(settings, 'NOTES_PAGE_SIZE', 100)
+        max_page_size = getattr(settings, 'NOTES_MAX_PAGE_SIZE', 1000)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+            if requested > 0:
+                page_size = requested
+        except (KeyError, ValueError):
+            pass
+        return min(page_size, max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+            Return the page of rows following (or preceding) the cursor
+            :param queryset: The filtered queryset of the view
+            :param request: The request being paginated
+            :param view: The view using the paginator
+            :return: The list of rows of the page
+        """
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        is_reverse = cursor is not None and cursor[2]
+
+        if cursor is None:
+            queryset = queryset.order_by('created', 'id')
+        elif is_reverse:
+            created, pk = cursor[0], cursor[1]
+            queryset = queryset.filter(Q(created__lt=created) | Q(created=created, id__lt=pk))
+            queryset = queryset.order_by('-created', '-id')
+        else:
+            created, pk = cursor[0], cursor[1]
+            queryset = queryset.filter(Q(created__gt=created) | Q(created=created, id__gt=pk))
+            queryset = queryset.order_by('created', 'id')
+
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if is_reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next, self.has_previous = has_following, cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        """
+            Wrap the serialized page with the links to its neighbours
+            :param data: The serialized rows of the page
+        """
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        """
+            Build the url of the page following the current one
+        """
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], is_reverse=False)
+
+    def get_previous_link(self):
+        """
+            Build the url of the page preceding the current one
+        """
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], is_reverse=True)
+
+    def get_position(self, row):
+        """
+            Extract the (created, id) keyset position of a row
+            :param row: A notes instance
+        """
+        return row.created, row.id
+
+    def encode_cursor(self, row, is_reverse):
+        """
+            Build an opaque cursor pointing right after (or before) the row
+            :param row: The boundary row of the current page
+            :param is_reverse: True if the cursor walks backward
+            :return: The url carrying the cursor
+        """
+        created, pk = self.get_position(row)
+        tokens = {'c': created.isoformat(), 'i': pk}
+        if is_reverse:
+            tokens['r'] = 1
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+            Decode the cursor sent by the client
+            :param request: The request being paginated
+            :return: A (created, id, is_reverse) tuple or None if there is no cursor
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            created = parse_datetime(tokens['c'][0])
+            pk = int(tokens['i'][0])
+            is_reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created, pk, is_reverse
@@ -1,13 +1,20 @@
 from .authentication import EmailBackendModel
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import authenticate, login, logout, user_logged_in
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from django.core.cache import cache
 from .serializers import UserSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.fields import BooleanField
+from . import authentication
+from . import constants
+from . import login_throttle
 from . import request_utils
+from . import throttling
+from . import tokens
+from . import user_cache
 from . import models
 
 
@@ -15,16 +22,103 @@ def retrieve_email_and_password(request):
     """
         Extract the email and the password from a request
         :param request: The request
+        :raise ParseError: When the email or the password is not a string
     """
     email = request.data.get('email', '')
     password = request.data.get('password', '')
+    if not isinstance(email, str) or not isinstance(password, str):
+        raise ParseError('The email and the password must be strings')
     return email, password
 
 
+def is_token_requested(request):
+    """
+        Check if the client asked for a token instead of a session
+        :param request: The login request
+    """
+    return request.data.get(constants.TOKEN_PARAM) in BooleanField.TRUE_VALUES
+
+
+def authenticate_and_login(request, email, password, issue_token=False):
+    """
+        Authenticate the user and attach it to the session of the request,
+        or give it a signed token when issue_token is True
+        :param request: The request
+        :param email: The email of the user
+        :param password: The password of the user
+        :param issue_token: True to answer with a token and open no session
+        :return: A (data, status) tuple, data being the user or the errors
+        :raise Throttled: When the client or the email made too many attempts
+    """
+    login_throttle.check_login(request, email)
+    authentication_backend = EmailBackendModel()
+    user = authentication_backend.authenticate(request, username=email, password=password)
+    if user is None:
+        return {'errors': 'The requested user does not exist'}, status.HTTP_400_BAD_REQUEST
+    if user.is_ban:
+        return {'errors': 'The requested user is banned'}, status.HTTP_400_BAD_REQUEST
+    login_throttle.reset_login(email)
+    if issue_token:
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+    else:
+        login(request, user)
+        user_cache.cache_user(user)
+    data = UserSerializer(user, context={'request': request}).data
+    if issue_token:
+        data[constants.TOKEN_PARAM] = tokens.create_token(user)
+        data['expires_in'] = tokens.get_max_age()
+    return data, status.HTTP_200_OK
+
+
+def is_valid_email(email):
+    """
+        Check if the email is correct
+        :param email: The email being validated
+    """
+    try:
+        validate_email(email)
+        return True
+    except ValidationError:
+        return False
+
+
+def register_user(email, password):
+    """
+        Create a new user
+        :param email: The email of the user
+        :param password: The password of the user
+        :return: A (data, status) tuple, data being None or the errors
+    """
+    if not is_valid_email(email):
+        return {'errors': 'The provided email is not valid'}, status.HTTP_400_BAD_REQUEST
+    user = models.UserModel.objects.create_user(email=email, password=password)
+    if not user:
+        return {'errors': 'The email already exist'}, status.HTTP_400_BAD_REQUEST
+    return None, status.HTTP_200_OK
+
+
+def logout_user(request, token_payload=None):
+    """
+        Revoke the token of the request, or close its session
+        :param request: The request
+        :param token_payload: The payload of the token authenticating the request, None for the session
+        :return: A (data, status) tuple, data being None or the errors
+    """
+    if token_payload is not None:
+        tokens.revoke_token(token_payload)
+        return None, status.HTTP_200_OK
+    if not request_utils.is_user_authenticated(request):
+        return {'errors': 'User is not authenticated'}, status.HTTP_400_BAD_REQUEST
+    logout(request)
+    return None, status.HTTP_200_OK
+
+
 class UserAuthenticationView(APIView):
     """
         Post and generate the authentication as well as login
     """
+    throttle_scope = throttling.AUTH_SCOPE
+
     def post(self, request, format=None):
         """
             Post method used to authenticate the user
@@ -34,32 +128,15 @@ class UserAuthenticationView(APIView):
             :param format: The request format
         """
         email, password = retrieve_email_and_password(request)
-        authentication_backend = EmailBackendModel()
-        user = authentication_backend.authenticate(username=email, password=password)
-        if user is None:
-            return Response({'errors': 'The requested user does not exist'}, status=status.HTTP_400_BAD_REQUEST)
-        if user.is_ban:
-            return Response({'errors': 'The requested user is banned'}, status=status.HTTP_400_BAD_REQUEST)
-        login(request, user)
-        cache.set(request.session.session_key, user.email, 60*60*24)
-        serializer = UserSerializer(user, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data, response_status = authenticate_and_login(request, email, password, is_token_requested(request))
+        return Response(data, status=response_status)
 
 
 class UserRegistrationView(APIView):
     """
         Post to register an user
     """
-    def __is_valid_email(self, email: str) -> bool:
-        """
-            Check if the email is correct
-            :param email: The email being validated
-        """
-        try:
-            validate_email(email)
-            return True
-        except ValidationError:
-            return False
+    throttle_scope = throttling.AUTH_SCOPE
 
     def post(self, request, format=None):
         """
@@ -70,12 +147,8 @@ class UserRegistrationView(APIView):
         if request_utils.is_user_authenticated(request):
             return Response({'errors': 'User is authenticated'}, status=status.HTTP_400_BAD_REQUEST)
         email, password = retrieve_email_and_password(request)
-        if not self.__is_valid_email(email=email):
-            return Response({'errors': 'The provided email is not valid'}, status=status.HTTP_400_BAD_REQUEST)
-        user = models.UserModel.objects.create_user(email=email, password=password)
-        if not user:
-            return Response({'errors': 'The email already exist'}, status=status.HTTP_400_BAD_REQUEST)
-        return Response(status=status.HTTP_200_OK)
+        data, response_status = register_user(email, password)
+        return Response(data, status=response_status)
 
 
 class LogoutView(APIView):
@@ -88,8 +161,6 @@ class LogoutView(APIView):
             :param request: The request
             :param format: The format of the request
         """
-        if not request_utils.is_user_authenticated(request):
-            return Response({'errors': 'User is not authenticated'}, status=status.HTTP_400_BAD_REQUEST)
-        cache.delete(request.session.session_key)
-        logout(request)
-        return Response(status=status.HTTP_200_OK)
+        is_token = isinstance(request.successful_authenticator, authentication.TokenAuthentication)
+        data, response_status = logout_user(request, request.auth if is_token else None)
+        return Response(data, status=response_status)
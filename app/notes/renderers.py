@@ -0,0 +1,63 @@
+"""
+    JSON encoding of the API. orjson is used when it is installed and
+    NOTES_FAST_JSON is on, it writes the datetimes, the uuids and the
+    containers itself and only calls back into python for the other
+    types. Without it the encoder of the REST framework is used, both
+    produce the same compact UTF-8 JSON
+"""
+import json
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+# Valid JSON but not valid javascript, escaped like the JSON renderer of the REST framework
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def is_fast_json():
+    """
+        Check if the data is encoded by orjson
+    """
+    return orjson is not None and getattr(settings, 'NOTES_FAST_JSON', True)
+
+
+def dumps(data):
+    """
+        Encode data the same way the JSON renderer of the API does
+        :param data: The data to encode
+        :return: The UTF-8 encoded JSON
+    """
+    if is_fast_json():
+        encoded = orjson.dumps(data, default=encoders.JSONEncoder().default, option=ORJSON_OPTIONS)
+    else:
+        encoded = json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    for separator, escaped in LINE_SEPARATORS:
+        if separator in encoded:
+            encoded = encoded.replace(separator, escaped)
+    return encoded
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+        JSONRenderer encoding through dumps(), the indented output asked
+        by some clients is still rendered by the REST framework
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+            :param data: The data to render
+            :param accepted_media_type: The media type negotiated with the client
+            :param renderer_context: The view, the request and the response
+        """
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,68 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# True while a view lists rows that may be read from a replica
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replicas():
+    """
+        Return the aliases of the read replicas from the NOTES_DB_REPLICAS setting
+    """
+    return getattr(settings, 'NOTES_DB_REPLICAS', [])
+
+
+@contextmanager
+def read_from_replica():
+    """
+        Send the reads made inside the block to a replica. The replicas
+        lag behind the primary, so only the lists which can be a little
+        late use it, the writes and the reads of a single row stay on
+        the primary
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+        Route the reads made inside read_from_replica() to a random
+        replica and every other query to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        """
+            :param model: The model read
+        """
+        replicas = get_replicas()
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        """
+            :param model: The model written
+        """
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+            The replicas hold the same rows as the primary
+        """
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+            The replicas are migrated through the replication of the primary
+        """
+        return db not in get_replicas()
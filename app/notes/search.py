@@ -0,0 +1,156 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from .models import Notes
+
+SQLITE_SEARCH_TABLE = 'notes_notes_fts'
+MAX_TERMS = 16
+TERM_PATTERN = re.compile(r'(\w+)(\*?)')
+
+# The search backend class of each database alias
+backend_classes = {}
+
+
+def parse_terms(query: str):
+    """
+        Split a user query into words, a word ending with * is a
+        prefix term. Everything else than words is dropped so the
+        terms can safely be used inside the engine query syntax
+        :param query: The raw search query
+        :return: A list of (word, is_prefix) tuples
+    """
+    return [(word.lower(), bool(star)) for word, star in TERM_PATTERN.findall(query)][:MAX_TERMS]
+
+
+class SqliteSearchBackend:
+    """
+        Search through the FTS5 table kept in sync by triggers,
+        results are ranked with bm25
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, terms, owner, limit):
+        """
+            Return the ids of the best matching notes
+            :param terms: The parsed search terms
+            :param owner: The owner the notes are restricted to, None for every notes
+            :param limit: The maximum number of ids returned
+        """
+        match = ' '.join('"%s"%s' % (word, '*' if is_prefix else '') for word, is_prefix in terms)
+        sql = 'SELECT notes.id FROM %s AS fts JOIN notes_notes AS notes ON notes.id = fts.rowid ' \
+              'WHERE %s MATCH %%s' % (SQLITE_SEARCH_TABLE, SQLITE_SEARCH_TABLE)
+        params = [match]
+        if owner is not None:
+            sql += ' AND notes.owner_id = %s'
+            params.append(owner.pk)
+        sql += ' ORDER BY fts.rank LIMIT %s'
+        params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresqlSearchBackend:
+    """
+        Search through the generated tsvector column and its GIN index,
+        results are ranked with ts_rank
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, terms, owner, limit):
+        """
+            Return the ids of the best matching notes
+            :param terms: The parsed search terms
+            :param owner: The owner the notes are restricted to, None for every notes
+            :param limit: The maximum number of ids returned
+        """
+        tsquery = ' & '.join('%s%s' % (word, ':*' if is_prefix else '') for word, is_prefix in terms)
+        sql = "SELECT id FROM notes_notes, to_tsquery('simple', %s) AS query WHERE search_vector @@ query"
+        params = [tsquery]
+        if owner is not None:
+            sql += ' AND owner_id = %s'
+            params.append(owner.pk)
+        sql += ' ORDER BY ts_rank(search_vector, query) DESC, id LIMIT %s'
+        params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class FallbackSearchBackend:
+    """
+        Unindexed search used when the database has no full-text
+        engine, every term must be contained in the title or the body
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, terms, owner, limit):
+        """
+            Return the ids of the most recent matching notes
+            :param terms: The parsed search terms
+            :param owner: The owner the notes are restricted to, None for every notes
+            :param limit: The maximum number of ids returned
+        """
+        queryset = Notes.objects.using(self.connection.alias)
+        if owner is not None:
+            queryset = queryset.filter(owner=owner)
+        for word, _ in terms:
+            queryset = queryset.filter(Q(title__icontains=word) | Q(body__icontains=word))
+        return list(queryset.order_by('-created', '-id').values_list('id', flat=True)[:limit])
+
+
+def get_search_backend_class(connection):
+    """
+        Return the search backend class matching the database engine,
+        the SQLite one needs the FTS5 table of the migrations
+        :param connection: The database connection
+    """
+    if connection.vendor == 'postgresql':
+        return PostgresqlSearchBackend
+    if connection.vendor == 'sqlite' and SQLITE_SEARCH_TABLE in connection.introspection.table_names():
+        return SqliteSearchBackend
+    return FallbackSearchBackend
+
+
+def get_search_backend(using='default'):
+    """
+        Return the search backend matching the database engine, decided
+        once per database alias and kept until the next migrate
+        :param using: The database alias
+    """
+    connection = connections[using]
+    backend_class = backend_classes.get(using)
+    if backend_class is None:
+        backend_class = backend_classes[using] = get_search_backend_class(connection)
+    return backend_class(connection)
+
+
+def reset_search_backends():
+    """
+        Forget the search backends decided, a migrate can add or drop
+        the FTS5 table
+    """
+    backend_classes.clear()
+
+
+def search_notes(query, owner, limit, using='default'):
+    """
+        Search the notes matching the query
+        :param query: The raw search query
+        :param owner: The owner the notes are restricted to, None for every notes
+        :param limit: The maximum number of ids returned
+        :param using: The database alias
+        :return: The ids of the matching notes, the most relevant first
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    return get_search_backend(using).search(terms, owner, limit)
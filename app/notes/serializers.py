@@ -1,5 +1,12 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.db.models.functions import Substr
+from django.utils import timezone
 from .models import Notes, UserModel
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from . import constants
 from . import urls_name
 
 
@@ -19,12 +26,124 @@ class NotesSerializer(serializers.ModelSerializer):
         fields = ('id', 'created', 'title', 'body', 'tags', 'owner',)
 
 
+class NotesReadSerializer:
+    """
+        Read only serializer building the notes representation straight
+        from value rows, skipping the field by field work of the
+        ModelSerializer. The output has the same shape as NotesSerializer,
+        or only the fields asked for
+    """
+    # The output fields and the value each one is read from
+    field_sources = {'id': 'id', 'created': 'created', 'title': 'title', 'body': 'body', 'tags': 'tags',
+                     'owner': 'owner__email'}
+    default_fields = ('id', 'created', 'title', 'body', 'tags', 'owner')
+    # Always read, the keyset pagination needs the position of the rows
+    position_fields = ('id', 'created')
+    created_field = serializers.DateTimeField()
+
+    def __init__(self, rows, fields=None):
+        """
+            :param rows: The rows returned by a projected queryset
+            :param fields: The fields to output, default_fields if None
+        """
+        self.rows = rows
+        self.fields = self.default_fields if fields is None else fields
+
+    @classmethod
+    def get_fields(cls, request):
+        """
+            Read the sparse fieldset of ?fields=, a comma separated list
+            of the fields of field_sources
+            :param request: The get request
+            :return: The fields to output, None when the parameter is missing
+            :raise ValidationError: When a field is unknown
+        """
+        value = request.query_params.get(constants.FIELDS_QUERY_PARAM)
+        if not value:
+            return None
+        fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+        unknown = [field for field in fields if field not in cls.field_sources]
+        if unknown or not fields:
+            raise serializers.ValidationError({constants.FIELDS_QUERY_PARAM: 'Fields supported: %s' % ', '.join(
+                cls.field_sources)})
+        return fields
+
+    @classmethod
+    def project(cls, queryset, fields=None):
+        """
+            Restrict a notes queryset to the columns being serialized
+            :param queryset: The notes queryset
+            :param fields: The fields to output, default_fields if None
+            :return: A queryset of named tuples
+        """
+        fields = cls.default_fields if fields is None else fields
+        names = dict.fromkeys(cls.position_fields + tuple(fields))
+        return queryset.values_list(*[cls.field_sources[name] for name in names], named=True)
+
+    def __iter__(self):
+        """
+            Lazily yield the serialized notes one row at a time
+        """
+        created_to_representation = self.get_created_representation()
+        getters = [(name, attrgetter(self.field_sources[name])) for name in self.fields]
+        for row in self.rows:
+            item = {name: getter(row) for name, getter in getters}
+            if created_to_representation is not None and 'created' in item:
+                item['created'] = created_to_representation(item['created'])
+            yield item
+
+    @classmethod
+    def get_created_representation(cls):
+        """
+            Return the function building the representation of the created
+            datetimes, None when the datetimes can be left to the JSON
+            encoders of the API: they write the same ISO 8601 form as
+            DateTimeField as long as the current timezone is UTC
+        """
+        if (api_settings.DATETIME_FORMAT == ISO_8601 and settings.USE_TZ
+                and timezone.get_current_timezone_name() == 'UTC'):
+            return None
+        return cls.created_field.to_representation
+
+    @property
+    def data(self):
+        """
+            Build the list of serialized notes
+        """
+        return list(self)
+
+
+class NotesSummarySerializer(NotesReadSerializer):
+    """
+        Read serializer of the notes lists. The body is left to the
+        detail view, the lists only carry a preview of its first
+        NOTES_PREVIEW_LENGTH characters when ?fields= asks for it, cut
+        by the database so the full bodies never leave it
+    """
+    field_sources = {'id': 'id', 'created': 'created', 'title': 'title', 'tags': 'tags', 'owner': 'owner__email',
+                     'preview': 'preview'}
+    default_fields = ('id', 'created', 'title', 'tags', 'owner')
+
+    @classmethod
+    def project(cls, queryset, fields=None):
+        """
+            Restrict a notes queryset to the columns being serialized,
+            the preview is computed by the query
+            :param queryset: The notes queryset
+            :param fields: The fields to output, default_fields if None
+            :return: A queryset of named tuples
+        """
+        if fields is not None and 'preview' in fields:
+            queryset = queryset.annotate(preview=Substr('body', 1, getattr(settings, 'NOTES_PREVIEW_LENGTH', 200)))
+        return super().project(queryset, fields)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
         Class used for the JSON serialization and
         SQL deserialization
     """
-    tasks = serializers.HyperlinkedRelatedField(many=True, view_name=urls_name.NOTES_DETAIL_NAME, read_only=True)
+    tasks = serializers.HyperlinkedRelatedField(many=True, view_name=urls_name.NOTES_UPDATE, read_only=True)
 
     def create(self, validated_data):
         """
@@ -0,0 +1,149 @@
+"""
+    Session engine keeping the sessions inside the cache.
+
+    A session is only written when its data changed, the middleware marks
+    it as modified as soon as a key is assigned, even to the same value.
+    With NOTES_SESSION_WRITE_BEHIND the sessions are also copied to the
+    database for durability, but outside of the requests: the writes are
+    queued and flushed once the response is sent, at most every
+    NOTES_SESSION_FLUSH_INTERVAL seconds, and a session missing from the
+    cache is read back from the database. The deletions are written to
+    the database at once, a logout is never undone by that read
+"""
+import atexit
+import logging
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.backends.base import VALID_KEY_CHARS, CreateError
+from django.core.signals import request_finished
+from django.db import DatabaseError, router, transaction
+from django.dispatch import receiver
+from django.utils.crypto import get_random_string
+
+SESSION_CACHE_KEY_PREFIX = 'session:'
+
+logger = logging.getLogger(__name__)
+_pending = {}
+_pending_lock = Lock()
+_last_flush = time.monotonic()
+
+
+def is_write_behind():
+    """
+        Check if the sessions are copied to the database
+    """
+    return getattr(settings, 'NOTES_SESSION_WRITE_BEHIND', False)
+
+
+class SessionStore(cached_db.SessionStore):
+    """
+        Cache based session store, see the module documentation
+    """
+    cache_key_prefix = SESSION_CACHE_KEY_PREFIX
+
+    def dump_state(self, data):
+        """
+            Serialize the data of the session to compare it with its last saved state
+            :param data: The data of the session
+        """
+        return self.serializer().dumps(data)
+
+    def load(self):
+        if is_write_behind():
+            data = super().load()
+        else:
+            data = self._cache.get(self.cache_key)
+            if data is None:
+                self._session_key = None
+                data = {}
+        self._saved_state = self.dump_state(data)
+        return data
+
+    def exists(self, session_key):
+        if is_write_behind():
+            return super().exists(session_key)
+        return bool(session_key) and (self.cache_key_prefix + session_key) in self._cache
+
+    def _get_new_session_key(self):
+        # The collisions are caught by the cache.add() of save(must_create=True),
+        # checking the database first would cost a query for every new session
+        return get_random_string(32, VALID_KEY_CHARS)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        state = self.dump_state(data)
+        if not must_create and state == getattr(self, '_saved_state', None):
+            return
+        if must_create:
+            if not self._cache.add(self.cache_key, data, self.get_expiry_age()):
+                raise CreateError
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+        if is_write_behind():
+            queue_session(self.session_key, (self.encode(data), self.get_expiry_date()))
+        self._saved_state = state
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        if is_write_behind():
+            # A queued write would create the session again
+            with _pending_lock:
+                _pending.pop(session_key, None)
+            self.model.objects.filter(session_key=session_key).delete()
+        self._cache.delete(self.cache_key_prefix + session_key)
+
+
+def queue_session(session_key, value):
+    """
+        Queue the write of a session to the database
+        :param session_key: The key of the session
+        :param value: A (session data, expire date) tuple
+    """
+    with _pending_lock:
+        _pending[session_key] = value
+
+
+def flush_pending_sessions():
+    """
+        Write the queued sessions to the database in one transaction,
+        they are queued again if the database fails
+    """
+    global _last_flush
+    with _pending_lock:
+        pending = _pending.copy()
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    model = SessionStore.get_model_class()
+    using = router.db_for_write(model)
+    try:
+        with transaction.atomic(using=using):
+            for session_key, value in pending.items():
+                model(session_key=session_key, session_data=value[0], expire_date=value[1]).save(using=using)
+    except DatabaseError:
+        logger.exception('Could not write %d sessions, they are kept for the next flush', len(pending))
+        with _pending_lock:
+            for session_key, value in pending.items():
+                _pending.setdefault(session_key, value)
+
+
+@receiver(request_finished)
+def flush_after_response(**kwargs):
+    """
+        Flush the queued sessions once the response is sent
+    """
+    interval = getattr(settings, 'NOTES_SESSION_FLUSH_INTERVAL', 5)
+    if _pending and time.monotonic() - _last_flush >= interval:
+        flush_pending_sessions()
+
+
+atexit.register(flush_pending_sessions)
@@ -0,0 +1,94 @@
+import django
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import notes_cache, search, tokens, user_cache
+from .models import Notes, UserModel
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    """
+        Drop the cached copy of the user when it is updated, banned
+        or deleted so that the next request reloads it
+        :param sender: The user model
+        :param instance: The saved or deleted user
+        :param using: The database alias of the write
+    """
+    user_cache.invalidate_user(instance.pk)
+    user_cache.bump_users_version(using=using)
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def revoke_user_tokens(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+        Reject the tokens issued to the user before it changed, they
+        carry its previous flags. The login only saving the last login
+        date keeps them
+        :param sender: The user model
+        :param instance: The saved or deleted user
+        :param created: True when the user was just created
+        :param update_fields: The fields saved, None for all of them
+    """
+    if created or update_fields == frozenset(['last_login']):
+        return
+    tokens.revoke_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Notes)
+@receiver(post_delete, sender=Notes)
+def bump_owner_notes_version(sender, instance, using, **kwargs):
+    """
+        Change the version of the notes of the owner when one of them
+        is created, updated or deleted, the cached lists become unreachable
+        :param sender: The notes model
+        :param instance: The saved or deleted notes
+        :param using: The database alias of the write
+    """
+    notes_cache.bump_notes_version(instance.owner_id, using=using)
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    """
+        Close the persistent connections the database dropped while they
+        were idle, the request opens a new one instead of failing on its
+        first query. Done by Django itself from 4.1 on, with the same
+        CONN_HEALTH_CHECKS database setting
+    """
+    if django.VERSION >= (4, 1):
+        return
+    for connection in connections.all():
+        if connection.settings_dict.get('CONN_HEALTH_CHECKS') and connection.connection is not None \
+                and not connection.is_usable():
+            connection.close()
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """
+        Apply the NOTES_SQLITE_PRAGMAS setting to every new SQLite connection
+        :param sender: The class of the database wrapper
+        :param connection: The new connection
+    """
+    pragmas = getattr(settings, 'NOTES_SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA %s = %s' % (name, value))
+
+
+@receiver(post_migrate)
+def reset_search_backends(**kwargs):
+    """
+        Decide the search backends again after a migrate, the FTS5 table
+        may have been created or dropped
+    """
+    search.reset_search_backends()
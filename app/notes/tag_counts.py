@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from django.db.models import Sum
+
+from . import notes_cache
+from .models import Notes, NotesTagCount
+
+TAG_COUNTS_KEY = 'notes-stats:%s:%s'
+
+
+def get_tag_counts(owner):
+    """
+        Return the number of notes by tags from the maintained counts,
+        cached under the version of the notes of the scope so that any
+        write of a notes is seen at once
+        :param owner: The owner of the notes, None for every notes
+        :return: A {tags: number of notes} dict holding every status
+    """
+    key = TAG_COUNTS_KEY % (notes_cache.get_scope(owner), notes_cache.get_notes_version(owner))
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+    counts = dict.fromkeys((tags for tags, _ in Notes.STATUS_CHOICE), 0)
+    queryset = NotesTagCount.objects.all() if owner is None else NotesTagCount.objects.filter(owner=owner)
+    for tags, total in queryset.order_by().values_list('tags').annotate(total=Sum('count')):
+        if total or tags in counts:
+            counts[tags] = total
+    cache.set(key, counts)
+    return counts
@@ -1,5 +1,33 @@
-from django.test import TestCase, RequestFactory
-from . import models, urls_name, views
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from unittest import mock, skipUnless
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Value
+from django.test import AsyncRequestFactory, TestCase, RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from . import (async_views, authentication, caching, compression, hashing, login_throttle, models, notes_cache,
+               renderers, routers, search, serializers, sessions, tag_counts, throttling, tokens, urls_name, user_cache,
+               views)
+from .management.commands import bench_sessions
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.reverse import reverse
 from rest_framework import status
 
@@ -82,7 +110,7 @@ class NotesModelTest(TestCase):
         note_custom2 = models.Notes(title='custom notes', body='custom notes', tags='done', owner=self.user)
         note_custom.save()
         note_custom2.save()
-        notes_queryset = models.Notes.objects.filter(tags__contains='created')
+        notes_queryset = models.Notes.objects.filter(tags='created')
         notes_queryset_owner = models.Notes.objects.filter(owner__email='test.test@gmail.com')
         self.assertEqual(1, notes_queryset.count())
         self.assertEqual(2, notes_queryset_owner.count())
@@ -104,23 +132,30 @@ class AuthTest(TestCase):
 
     def setUp(self):
         """Setup the tests"""
-        self.user = models.UserModel(email='toto.titi@epitech.eu', password='toto')
-        self.banned_user = models.UserModel(email='titi.toto@epitech.eu', password='test', is_ban=True)
+        cache.clear()
+        self.password = 'toto'
+        self.user = models.UserModel(email='toto.titi@epitech.eu')
+        self.user.set_password(self.password)
+        self.banned_user = models.UserModel(email='titi.toto@epitech.eu', is_ban=True)
+        self.banned_user.set_password(self.password)
 
     def test_api_can_signin_user(self):
         """Test if the user can authenticate with the api"""
         self.user.save()
         self.banned_user.save()
         response = self.client.post(reverse(urls_name.LOGIN_NAME),
-                                    {'email': self.user.email, 'password': self.user.password})
+                                    {'email': self.user.email, 'password': self.password})
         response_is_ban = self.client.post(reverse(urls_name.LOGIN_NAME),
-                                           {'email': self.banned_user.email, 'password': self.banned_user.password})
+                                           {'email': self.banned_user.email, 'password': self.password})
         response_unknown_user = self.client.post(reverse(urls_name.LOGIN_NAME),
                                                  {'email': 'unknown.user@epitech.eu', 'password': 'unknown'})
+        response_wrong_password = self.client.post(reverse(urls_name.LOGIN_NAME),
+                                                   {'email': self.user.email, 'password': 'wrong'})
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response_is_ban.status_code)
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response_unknown_user.status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response_wrong_password.status_code)
 
     def test_api_can_register_user(self):
         """Test if the API can register an user"""
@@ -129,7 +164,7 @@ class AuthTest(TestCase):
         response = self.client.post(reverse(urls_name.REGISTER_NAME),
                                     {'email': 'test.register@gmail.com', 'password': 'test-password'})
         response_user_already_exist = self.client.post(reverse(urls_name.REGISTER_NAME),
-                                                       {'email': self.user.email, 'password': self.user.password})
+                                                       {'email': self.user.email, 'password': self.password})
         response_user_email_invalid = self.client.post(reverse(urls_name.REGISTER_NAME),
                                                        {'email': 'bad-email', 'password': 'unknown'})
 
@@ -142,7 +177,7 @@ class AuthTest(TestCase):
         self.user.save()
 
         login_response = self.client.post(reverse(urls_name.LOGIN_NAME),
-                                          {'email': self.user.email, 'password': self.user.password})
+                                          {'email': self.user.email, 'password': self.password})
         response_logout = self.client.get(reverse(urls_name.LOGOUT_NAME))
         response_logout_without_auth = self.client.get(reverse(urls_name.LOGOUT_NAME))
 
@@ -182,6 +217,7 @@ class NotesListView(TestCase):
 
     def setUp(self):
         """Setup the test"""
+        cache.clear()
         self.request_factory = RequestFactory()
         self.user = models.UserModel(email='toto.titi-list-view-test@epitech.eu', password='toto')
         self.admin = models.UserModel(email='admin.admin-list-view-test@gmail.com', password='admin', is_superuser=True)
@@ -267,6 +303,7 @@ class NotesAPIView(TestCase):
 
     def setUp(self):
         """Setup the test"""
+        cache.clear()
         self.request_factory = RequestFactory()
         self.user = models.UserModel(email='toto.titi@tutu.com', password='test')
         self.user_banned = models.UserModel(email='banned.user@gmail.com', password='test', is_ban=True)
@@ -560,3 +597,1815 @@ class UserDetailTest(TestCase):
         self.admin_user.save()
         response = self.__execute_delete_request(id=self.admin_user.id, user=self.admin_user)
         self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+
+
+class NotesPaginationTest(TestCase):
+    """Test the keyset pagination of the notes list"""
+
+    def __execute_get_request(self, user, params=None):
+        """
+            Execute a get request on the notes list and return the response
+            :param user: The user used inside the request
+            :param params: The query parameters of the request
+            :return: An http response
+        """
+        request_get = self.request_factory.get(reverse(urls_name.NOTES_LIST_NAME), params or {})
+        request_get.user = user
+        notesListView = views.ListNotes.as_view()
+        return notesListView(request_get)
+
+    def __cursor_of(self, link):
+        """
+            Extract the cursor query parameter of a pagination link
+            :param link: The next or previous link of a page
+        """
+        return parse_qs(urlparse(link).query)['cursor'][0]
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='pagination.user@test.com', password='test')
+        self.user.save()
+        for index in range(7):
+            models.Notes(title='notes %d' % index, body='body', owner=self.user).save()
+        # Force identical timestamps so that the id tiebreak is exercised
+        models.Notes.objects.filter(id__lte=models.Notes.objects.order_by('id')[3].id) \
+            .update(created=timezone.now())
+
+    def test_pages_cover_all_notes_once(self):
+        """Walking the next links returns every notes exactly once in order"""
+        expected_ids = list(models.Notes.objects.order_by('created', 'id').values_list('id', flat=True))
+        seen_ids = []
+        params = {'page_size': 3}
+        while True:
+            response = self.__execute_get_request(self.user, params)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            seen_ids += [notes['id'] for notes in response.data['results']]
+            if response.data['next'] is None:
+                break
+            params = {'page_size': 3, 'cursor': self.__cursor_of(response.data['next'])}
+        self.assertEqual(expected_ids, seen_ids)
+
+    def test_previous_link_returns_previous_page(self):
+        """The previous link of the second page gives back the first page"""
+        first_page = self.__execute_get_request(self.user, {'page_size': 3})
+        second_page = self.__execute_get_request(self.user, {'page_size': 3,
+                                                             'cursor': self.__cursor_of(first_page.data['next'])})
+        previous_page = self.__execute_get_request(self.user, {
+            'page_size': 3, 'cursor': self.__cursor_of(second_page.data['previous'])})
+
+        self.assertIsNone(first_page.data['previous'])
+        self.assertEqual([notes['id'] for notes in first_page.data['results']],
+                         [notes['id'] for notes in previous_page.data['results']])
+
+    @override_settings(NOTES_MAX_PAGE_SIZE=2)
+    def test_page_size_is_capped(self):
+        """The requested page size cannot exceed the configured maximum"""
+        response = self.__execute_get_request(self.user, {'page_size': 50})
+        self.assertEqual(2, len(response.data['results']))
+
+    def test_invalid_cursor_is_rejected(self):
+        """A cursor that cannot be decoded returns a 404"""
+        response = self.__execute_get_request(self.user, {'cursor': 'not-a-cursor'})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+class NotesOwnerScopeTest(TestCase):
+    """Test that the notes lists are scoped to the requesting user"""
+
+    def __execute_get_request(self, view, url, user, params=None):
+        """
+            Execute a get request on a notes list view and return the listed ids
+            :param view: The list view class
+            :param url: The url of the view
+            :param user: The user used inside the request
+            :param params: The query parameters of the request
+            :return: The set of the returned notes ids
+        """
+        request_get = self.request_factory.get(url, params or {})
+        request_get.user = user
+        response = view.as_view()(request_get)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return {notes['id'] for notes in response.data['results']}
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='scope.user@test.com', password='test')
+        self.other_user = models.UserModel(email='scope.other@test.com', password='test')
+        self.admin = models.UserModel(email='scope.admin@test.com', password='admin', is_superuser=True)
+        self.user.save()
+        self.other_user.save()
+        self.admin.save()
+        self.user_notes = models.Notes.objects.create(title='mine', body='body', tags='created', owner=self.user)
+        self.other_notes = models.Notes.objects.create(title='other', body='body', tags='created',
+                                                       owner=self.other_user)
+        self.admin_notes = models.Notes.objects.create(title='admin', body='body', tags='created', owner=self.admin)
+
+    def test_user_only_lists_its_notes(self):
+        """A user only gets its own notes, even when asking for the global scope"""
+        list_url = reverse(urls_name.NOTES_LIST_NAME)
+        self.assertEqual({self.user_notes.id}, self.__execute_get_request(views.ListNotes, list_url, self.user))
+        self.assertEqual({self.user_notes.id},
+                         self.__execute_get_request(views.ListNotes, list_url, self.user, {'scope': 'all'}))
+        self.assertEqual({self.user_notes.id},
+                         self.__execute_get_request(views.FilterAPIView, reverse(urls_name.FILTER_TAGS), self.user,
+                                                    {'search': 'created'}))
+
+    def test_admin_can_opt_into_global_scope(self):
+        """An administrator lists its own notes by default and every notes with scope=all"""
+        list_url = reverse(urls_name.NOTES_LIST_NAME)
+        self.assertEqual({self.admin_notes.id}, self.__execute_get_request(views.ListNotes, list_url, self.admin))
+        self.assertEqual({self.user_notes.id, self.other_notes.id, self.admin_notes.id},
+                         self.__execute_get_request(views.ListNotes, list_url, self.admin, {'scope': 'all'}))
+
+
+class NotesQueryCountTest(TestCase):
+    """
+        Assert the exact number of queries issued by the notes endpoints
+        so that owner lookups can never go back to one query per row
+    """
+    NOTES_COUNTS = (1, 100, 10000)
+
+    def __execute_request(self, view, request, **kwargs):
+        """
+            Execute a request on a view and return the response
+            :param view: The view class
+            :param request: The request built by the factory
+            :param kwargs: The url parameters of the view
+        """
+        request._dont_enforce_csrf_checks = True
+        response = view.as_view()(request, **kwargs)
+        response.render()
+        return response
+
+    def __grow_notes(self, count):
+        """
+            Insert notes until the user owns count of them
+            :param count: The number of notes the user must own
+        """
+        missing = count - models.Notes.objects.filter(owner=self.user).count()
+        models.Notes.objects.bulk_create(
+            [models.Notes(title='title', body='body', tags='created', owner=self.user) for _ in range(missing)])
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='query.count@test.com', password='test')
+        self.admin = models.UserModel(email='query.count.admin@test.com', password='admin', is_superuser=True)
+        self.user.save()
+        self.admin.save()
+
+    def test_list_and_filter_use_a_single_query(self):
+        """Listing and filtering the notes always takes one query"""
+        for count in self.NOTES_COUNTS:
+            self.__grow_notes(count)
+            # Measure the queries of the uncached lists
+            cache.clear()
+            with self.subTest(count=count):
+                request_get = self.request_factory.get(reverse(urls_name.NOTES_LIST_NAME), {'page_size': 1000})
+                request_get.user = self.user
+                with self.assertNumQueries(1):
+                    response = self.__execute_request(views.ListNotes, request_get)
+                self.assertEqual(min(count, 1000), len(response.data['results']))
+
+                request_search = self.request_factory.get(reverse(urls_name.FILTER_TAGS),
+                                                          {'search': 'created', 'page_size': 1000})
+                request_search.user = self.user
+                with self.assertNumQueries(1):
+                    self.__execute_request(views.FilterAPIView, request_search)
+
+    def test_detail_uses_a_single_query(self):
+        """Retrieving a notes joins its owner in the same query"""
+        for count in self.NOTES_COUNTS:
+            self.__grow_notes(count)
+            notes = models.Notes.objects.filter(owner=self.user).last()
+            with self.subTest(count=count):
+                request_get = self.request_factory.get(reverse(urls_name.NOTES_UPDATE, kwargs={'pk': notes.id}))
+                request_get.user = self.user
+                with self.assertNumQueries(1):
+                    response = self.__execute_request(views.UpdateAPIView, request_get, pk=notes.id)
+                self.assertEqual(self.user.email, response.data['owner'])
+
+    def test_admin_create_uses_one_lookup_and_one_insert(self):
+        """Creating a notes as an administrator fetches the owner once and counts its tags with one statement"""
+        for count in self.NOTES_COUNTS:
+            self.__grow_notes(count)
+            with self.subTest(count=count):
+                request_post = self.request_factory.post(reverse(urls_name.ME_NOTES), {
+                    'title': 'admin notes', 'body': 'body', 'owner': self.user.email})
+                request_post.user = self.admin
+                with self.assertNumQueries(3):
+                    response = self.__execute_request(views.CreateAdminNotes, request_post)
+                self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+                self.assertEqual(self.user.email, response.data['owner'])
+
+
+class NotesReadSerializerTest(TestCase):
+    """Test the read only fast path serializer of the notes"""
+
+    def setUp(self):
+        """Setup the test"""
+        self.user = models.UserModel(email='read.serializer@test.com', password='test')
+        self.user.save()
+        models.Notes.objects.create(title='first', body='first body', tags='created', owner=self.user)
+        models.Notes.objects.create(title='second', body='second body', tags='done', owner=self.user)
+
+    def test_output_matches_model_serializer(self):
+        """The read serializer renders the same representation as NotesSerializer"""
+        queryset = models.Notes.objects.with_owner()
+        expected = json.loads(JSONRenderer().render(serializers.NotesSerializer(queryset, many=True).data))
+        rendered = json.loads(JSONRenderer().render(
+            serializers.NotesReadSerializer(serializers.NotesReadSerializer.project(queryset)).data))
+        self.assertEqual(expected, rendered)
+
+    def test_benchmark_command_runs(self):
+        """The serializers benchmark prints one line per size"""
+        output = StringIO()
+        call_command('bench_serializers', rows=[5, 10], repeat=1, stdout=output)
+        self.assertEqual(2, len(output.getvalue().splitlines()))
+
+
+class NotesExportTest(TestCase):
+    """Test the streaming export of the notes"""
+
+    def __execute_export_request(self, user, params=None):
+        """
+            Execute an export request and return the response
+            :param user: The user used inside the request
+            :param params: The query parameters of the request
+            :return: An http response
+        """
+        request_get = self.request_factory.get(reverse(urls_name.NOTES_EXPORT), params or {})
+        request_get.user = user
+        return views.ExportNotes.as_view()(request_get)
+
+    def setUp(self):
+        """Setup the test"""
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='export.user@test.com', password='test')
+        self.other_user = models.UserModel(email='export.other@test.com', password='test')
+        self.user.save()
+        self.other_user.save()
+        for index in range(5):
+            models.Notes.objects.create(title='notes %d' % index, body='body', tags='created', owner=self.user)
+        models.Notes.objects.create(title='other', body='body', tags='created', owner=self.other_user)
+
+    @override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+    def test_export_streams_a_json_array(self):
+        """The export streams the notes of the user as a JSON array"""
+        response = self.__execute_export_request(self.user)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.streaming)
+        exported = json.loads(b''.join(response.streaming_content))
+        expected = serializers.NotesSerializer(models.Notes.objects.filter(owner=self.user), many=True).data
+        self.assertEqual(json.loads(JSONRenderer().render(expected)), exported)
+
+    @override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+    def test_export_streams_ndjson(self):
+        """The export can stream one notes per line"""
+        response = self.__execute_export_request(self.user, {'export_format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        self.assertEqual(5, len(lines))
+        self.assertEqual('notes 0', json.loads(lines[0])['title'])
+
+    def test_export_of_no_notes_is_an_empty_array(self):
+        """A user without notes exports an empty array"""
+        models.Notes.objects.filter(owner=self.user).delete()
+        response = self.__execute_export_request(self.user)
+        self.assertEqual([], json.loads(b''.join(response.streaming_content)))
+
+    def test_export_rejects_unknown_format(self):
+        """An unsupported export format returns a 400"""
+        response = self.__execute_export_request(self.user, {'export_format': 'xml'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+class NotesSearchTest(TestCase):
+    """Test the full-text search of the notes"""
+
+    def __execute_search_request(self, user, params):
+        """
+            Execute a search request and return the response
+            :param user: The user used inside the request
+            :param params: The query parameters of the request
+            :return: An http response
+        """
+        request_get = self.request_factory.get(reverse(urls_name.NOTES_SEARCH), params)
+        request_get.user = user
+        return views.SearchNotes.as_view()(request_get)
+
+    def __search_titles(self, user, query, **params):
+        """
+            Search the notes and return the titles of the results
+            :param user: The user used inside the request
+            :param query: The search query
+        """
+        response = self.__execute_search_request(user, dict(params, q=query))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [notes['title'] for notes in response.data['results']]
+
+    def setUp(self):
+        """Setup the test"""
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='search.user@test.com', password='test')
+        self.other_user = models.UserModel(email='search.other@test.com', password='test')
+        self.user.save()
+        self.other_user.save()
+        models.Notes.objects.create(title='groceries', body='buy milk and bread', tags='created', owner=self.user)
+        models.Notes.objects.create(title='milk', body='milk milk milk for the cat', tags='created',
+                                    owner=self.user)
+        models.Notes.objects.create(title='holidays', body='book the flights', tags='done', owner=self.user)
+        models.Notes.objects.create(title='secret milk', body='not yours', tags='done', owner=self.other_user)
+
+    def test_search_ranks_best_matches_first(self):
+        """Notes matching the words the most come first and other users notes are excluded"""
+        self.assertEqual(['milk', 'groceries'], self.__search_titles(self.user, 'milk'))
+
+    def test_search_prefix_terms(self):
+        """A word ending with a star matches as a prefix"""
+        self.assertEqual([], self.__search_titles(self.user, 'fli'))
+        self.assertEqual(['holidays'], self.__search_titles(self.user, 'fli*'))
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """The search index is kept in sync when notes are updated or deleted"""
+        holidays = models.Notes.objects.get(title='holidays')
+        holidays.body = 'book the train'
+        holidays.save()
+        self.assertEqual([], self.__search_titles(self.user, 'flights'))
+        self.assertEqual(['holidays'], self.__search_titles(self.user, 'train'))
+        holidays.delete()
+        self.assertEqual([], self.__search_titles(self.user, 'train'))
+
+    def test_search_limit_and_empty_query(self):
+        """The number of results is bounded and a query without words is rejected"""
+        self.assertEqual(1, len(self.__search_titles(self.user, 'milk', page_size=1)))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST,
+                         self.__execute_search_request(self.user, {'q': '"*'}).status_code)
+
+    def test_fallback_backend_matches_every_word(self):
+        """The unindexed backend used without full-text engine gives the same matches"""
+        ids = search.FallbackSearchBackend(connection).search(search.parse_terms('milk cat'), self.user, 10)
+        self.assertEqual(['milk'], list(models.Notes.objects.filter(id__in=ids).values_list('title', flat=True)))
+
+    def test_search_backend_is_decided_once(self):
+        """The tables are only inspected by the first search of a database alias"""
+        search.reset_search_backends()
+        backend = search.get_search_backend()
+        with self.assertNumQueries(0):
+            self.assertIs(type(backend), type(search.get_search_backend()))
+
+
+class CachedUserTest(TestCase):
+    """Test that the authenticated user is served from the cache"""
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.user = models.UserModel.objects.create_user(email='cached.user@test.com', password='test')
+        self.backend = authentication.EmailBackendModel()
+
+    def test_cached_user_skips_the_database(self):
+        """Once loaded, the user is returned without any query"""
+        self.backend.get_user(self.user.id)
+        with self.assertNumQueries(0):
+            cached_user = self.backend.get_user(str(self.user.id))
+        self.assertEqual(self.user, cached_user)
+        self.assertEqual(self.user.email, cached_user.email)
+        self.assertFalse(cached_user.is_ban)
+        self.assertEqual(self.user.get_session_auth_hash(), cached_user.get_session_auth_hash())
+
+    def test_password_hash_is_not_cached(self):
+        """Only the session auth hash derived from the password is stored inside the cache"""
+        user_cache.cache_user(self.user)
+        self.assertNotIn(self.user.password, cache.get(user_cache.get_user_cache_key(self.user.id)))
+
+    def test_ban_and_delete_invalidate_the_cached_user(self):
+        """Saving or deleting the user drops its cached copy"""
+        self.backend.get_user(self.user.id)
+        self.user.is_ban = True
+        self.user.save()
+        self.assertTrue(self.backend.get_user(self.user.id).is_ban)
+        self.user.delete()
+        self.assertIsNone(self.backend.get_user(self.user.id))
+
+    def test_queryset_update_invalidates_the_cached_user(self):
+        """A queryset update, which sends no signal, drops the cached copy too"""
+        self.backend.get_user(self.user.id)
+        models.UserModel.objects.filter(pk=self.user.pk).update(is_ban=True)
+        self.assertTrue(self.backend.get_user(self.user.id).is_ban)
+
+    @override_settings(SESSION_ENGINE='notes.sessions')
+    def test_authenticated_requests_do_not_load_the_user(self):
+        """After the login, a request only reads the notes, the session comes from the cache"""
+        self.client.post(reverse(urls_name.LOGIN_NAME), {'email': self.user.email, 'password': 'test'})
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse(urls_name.NOTES_LIST_NAME))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+
+class TieredCacheTest(TestCase):
+    """Test the in-process tier in front of the shared cache"""
+
+    def __build_worker_cache(self, worker):
+        """
+            Build the cache of one worker, every worker shares the same file based cache
+            :param worker: The name of the worker, its local tier is named after it and the test
+            :return: A tiered cache
+        """
+        return caching.TieredCache('%s:%s' % (self.id(), worker), {'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 2,
+            'NAMESPACES': {
+                'user': {'TIMEOUT': 600, 'LOCAL_TIMEOUT': 0},
+                'versioned': {'TIMEOUT': 30, 'LOCAL_TIMEOUT': 60},
+            },
+        }})
+
+    def setUp(self):
+        """Setup the test"""
+        self.shared_directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                       'LOCATION': self.shared_directory.name},
+        })
+        self.settings_override.enable()
+        self.worker = self.__build_worker_cache('worker')
+        self.other_worker = self.__build_worker_cache('other')
+
+    def tearDown(self):
+        """Remove the shared cache"""
+        self.settings_override.disable()
+        self.shared_directory.cleanup()
+
+    def test_delete_is_seen_by_every_worker(self):
+        """A namespace without local tier always reflects the shared cache"""
+        self.worker.set('user:1', 'foo')
+        self.assertEqual('foo', self.other_worker.get('user:1'))
+        self.worker.delete('user:1')
+        self.assertIsNone(self.other_worker.get('user:1'))
+        self.assertEqual({'local_hits': 0, 'local_misses': 2, 'shared_hits': 1, 'shared_misses': 1},
+                         self.other_worker.get_stats()['user'])
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Values of a namespace with a local timeout are read from the process"""
+        self.worker.set('versioned:1', {'results': []})
+        self.worker.get('versioned:1')['results'].append('mutated')
+        self.assertEqual({'results': []}, self.worker.get('versioned:1'))
+        self.assertEqual(2, self.worker.get_stats()['versioned']['local_hits'])
+        self.assertEqual(0, self.worker.get_stats()['versioned']['shared_hits'])
+
+    def test_local_tier_is_shared_by_the_threads(self):
+        """The caches built for each thread of a worker share its local tier and its stats"""
+        thread_cache = self.__build_worker_cache('worker')
+        self.worker.set('versioned:1', 'foo')
+        with mock.patch.object(self.worker.shared, 'get') as shared_get:
+            self.assertEqual('foo', thread_cache.get('versioned:1'))
+        shared_get.assert_not_called()
+        self.assertEqual(1, self.worker.get_stats()['versioned']['local_hits'])
+
+    def test_local_tier_evicts_least_recently_used(self):
+        """The local tier never grows over its maximum number of entries"""
+        for index in range(3):
+            self.worker.set('versioned:%d' % index, index)
+        self.worker.get('versioned:0')
+        self.assertEqual(1, self.worker.get_stats()['versioned']['shared_hits'])
+
+    def test_namespace_timeouts(self):
+        """The namespace decides the default timeout, an explicit one wins"""
+        self.assertEqual(600, self.worker.get_namespace_timeout('user:1'))
+        self.assertEqual(5, self.worker.get_namespace_timeout('user:1', 5))
+        self.assertEqual(30, self.worker.get_local_timeout('versioned:1', 30))
+
+
+class NotesListCacheTest(TestCase):
+    """Test the cache of the notes list responses"""
+
+    def __execute_get_request(self, user, params=None):
+        """
+            Execute a get request on the notes list and return the response
+            :param user: The user used inside the request
+            :param params: The query parameters of the request
+            :return: An http response
+        """
+        request_get = self.request_factory.get(reverse(urls_name.NOTES_LIST_NAME), params or {})
+        request_get.user = user
+        return views.ListNotes.as_view()(request_get)
+
+    def __titles(self, response):
+        """
+            Return the titles of a list response
+            :param response: The list response
+        """
+        return [notes['title'] for notes in response.data['results']]
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='list.cache@test.com', password='test')
+        self.admin = models.UserModel(email='list.cache.admin@test.com', password='admin', is_superuser=True)
+        self.user.save()
+        self.admin.save()
+        self.notes = models.Notes.objects.create(title='first', body='body', tags='created', owner=self.user)
+
+    def test_repeated_reads_skip_the_database(self):
+        """A second identical list request is served without any query"""
+        self.__execute_get_request(self.user)
+        with self.assertNumQueries(0):
+            response = self.__execute_get_request(self.user)
+        self.assertEqual(['first'], self.__titles(response))
+
+    def test_writes_invalidate_the_cached_list(self):
+        """Creating, updating or deleting a notes is visible on the next read"""
+        self.__execute_get_request(self.user)
+        request_post = self.request_factory.post(reverse(urls_name.NOTES_LIST_NAME),
+                                                 {'title': 'second', 'body': 'body', 'tags': 'created'})
+        request_post.user = self.user
+        request_post._dont_enforce_csrf_checks = True
+        views.ListNotes.as_view()(request_post)
+        self.assertEqual(['first', 'second'], self.__titles(self.__execute_get_request(self.user)))
+
+        request_put = self.request_factory.put(reverse(urls_name.NOTES_UPDATE, kwargs={'pk': self.notes.id}),
+                                               {'title': 'renamed', 'body': 'body'},
+                                               content_type='application/json')
+        request_put.user = self.user
+        request_put._dont_enforce_csrf_checks = True
+        views.UpdateAPIView.as_view()(request_put, pk=self.notes.id)
+        self.assertEqual(['renamed', 'second'], self.__titles(self.__execute_get_request(self.user)))
+
+        request_delete = self.request_factory.delete(reverse(urls_name.NOTES_DELETE, kwargs={'pk': self.notes.id}))
+        request_delete.user = self.user
+        request_delete._dont_enforce_csrf_checks = True
+        views.DestroyAPIView.as_view()(request_delete, pk=self.notes.id)
+        self.assertEqual(['second'], self.__titles(self.__execute_get_request(self.user)))
+
+    def test_owner_email_change_invalidates_the_cached_list(self):
+        """The lists hold the email of the owner, changing it is visible on the next read"""
+        self.__execute_get_request(self.user)
+        self.user.email = 'list.cache.renamed@test.com'
+        self.user.save()
+        response = self.__execute_get_request(self.user)
+        self.assertEqual(['list.cache.renamed@test.com'], [notes['owner'] for notes in response.data['results']])
+
+    def test_global_scope_follows_every_owner(self):
+        """The global list of the administrator is invalidated by the writes of any user"""
+        self.__execute_get_request(self.admin, {'scope': 'all'})
+        models.Notes.objects.create(title='second', body='body', tags='created', owner=self.user)
+        self.assertEqual(['first', 'second'], self.__titles(self.__execute_get_request(self.admin, {'scope': 'all'})))
+        self.assertEqual([], self.__titles(self.__execute_get_request(self.admin)))
+
+
+class ConditionalGetTest(TestCase):
+    """Test the ETag and Last-Modified validators of the notes and users endpoints"""
+
+    def __execute_get_request(self, view, url, user, headers=None, **kwargs):
+        """
+            Execute a get request and return the response
+            :param view: The view class
+            :param url: The url of the view
+            :param user: The user used inside the request
+            :param headers: The conditional headers of the request
+            :param kwargs: The url parameters of the view
+        """
+        request_get = self.request_factory.get(url, **(headers or {}))
+        request_get.user = user
+        return view.as_view()(request_get, **kwargs)
+
+    def __assert_not_modified_until_change(self, view, url, user, change, **kwargs):
+        """
+            Check that a response is answered with a 304 until the change is made
+            :param view: The view class
+            :param url: The url of the view
+            :param user: The user used inside the request
+            :param change: Callable modifying the data of the response
+            :param kwargs: The url parameters of the view
+        """
+        response = self.__execute_get_request(view, url, user, **kwargs)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag_headers = {'HTTP_IF_NONE_MATCH': response['ETag']}
+        not_modified = self.__execute_get_request(view, url, user, etag_headers, **kwargs)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+        date_headers = {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED,
+                         self.__execute_get_request(view, url, user, date_headers, **kwargs).status_code)
+        change()
+        modified = self.__execute_get_request(view, url, user, etag_headers, **kwargs)
+        self.assertEqual(status.HTTP_200_OK, modified.status_code)
+        self.assertNotEqual(response['ETag'], modified['ETag'])
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='etag.user@test.com', password='test')
+        self.admin = models.UserModel(email='etag.admin@test.com', password='admin', is_superuser=True)
+        self.user.save()
+        self.admin.save()
+        self.notes = models.Notes.objects.create(title='first', body='body', tags='created', owner=self.user)
+
+    def test_notes_list(self):
+        """The notes list is not modified until one of the notes of the user changes"""
+        def change():
+            models.Notes.objects.create(title='second', body='body', tags='created', owner=self.user)
+        self.__assert_not_modified_until_change(views.ListNotes, reverse(urls_name.NOTES_LIST_NAME), self.user,
+                                                change)
+
+    def test_notes_list_follows_the_owner_email(self):
+        """The notes list holds the email of the owner, it is modified when the email changes"""
+        def change():
+            self.user.email = 'etag.renamed@test.com'
+            self.user.save()
+        self.__assert_not_modified_until_change(views.ListNotes, reverse(urls_name.NOTES_LIST_NAME), self.user,
+                                                change)
+
+    def test_not_modified_skips_the_serialization(self):
+        """A 304 on the notes list runs no query"""
+        response = self.__execute_get_request(views.ListNotes, reverse(urls_name.NOTES_LIST_NAME), self.user)
+        with self.assertNumQueries(0):
+            not_modified = self.__execute_get_request(views.ListNotes, reverse(urls_name.NOTES_LIST_NAME),
+                                                      self.user, {'HTTP_IF_NONE_MATCH': response['ETag']})
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+
+    def test_notes_detail(self):
+        """The notes detail is not modified until the notes changes"""
+        def change():
+            self.notes.title = 'renamed'
+            self.notes.save()
+        self.__assert_not_modified_until_change(views.UpdateAPIView,
+                                                reverse(urls_name.NOTES_UPDATE, kwargs={'pk': self.notes.id}),
+                                                self.user, change, pk=self.notes.id)
+
+    def test_user_detail_and_list(self):
+        """The users are not modified until a user or its notes change"""
+        def change_user():
+            self.user.is_ban = True
+            self.user.save()
+
+        def delete_notes():
+            self.notes.delete()
+        self.__assert_not_modified_until_change(views.DetailUser,
+                                                reverse(urls_name.USER_DETAIL_NAME, kwargs={'pk': self.user.id}),
+                                                self.admin, delete_notes, pk=self.user.id)
+        self.__assert_not_modified_until_change(views.ListUser, reverse(urls_name.USER_LIST_NAME), self.admin,
+                                                change_user)
+
+
+class BulkNotesTest(TestCase):
+    """Test the bulk creation, update and deletion of notes"""
+
+    def __execute_request(self, method, user, data):
+        """
+            Execute a request on the bulk endpoint and return the response
+            :param method: The http method of the request
+            :param user: The user used inside the request
+            :param data: The json body of the request
+            :return: An http response
+        """
+        request = getattr(self.request_factory, method)(reverse(urls_name.NOTES_BULK), json.dumps(data),
+                                                        content_type='application/json')
+        request.user = user
+        request._dont_enforce_csrf_checks = True
+        return views.BulkNotes.as_view()(request)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel(email='bulk.user@test.com', password='test')
+        self.other_user = models.UserModel(email='bulk.other@test.com', password='test')
+        self.user.save()
+        self.other_user.save()
+        self.other_notes = models.Notes.objects.create(title='other', body='body', tags='created',
+                                                       owner=self.other_user)
+
+    @override_settings(NOTES_BULK_CHUNK_SIZE=2)
+    def test_bulk_create(self):
+        """Every notes is created for the user, by chunks"""
+        response = self.__execute_request('post', self.user, [
+            {'title': 'notes %d' % index, 'body': 'body', 'tags': 'created'} for index in range(5)])
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(['notes %d' % index for index in range(5)], [notes['title'] for notes in response.data])
+        self.assertEqual(5, models.Notes.objects.filter(owner=self.user).count())
+
+    def test_bulk_create_is_all_or_nothing(self):
+        """An invalid notes prevents the creation and its errors are reported at its position"""
+        response = self.__execute_request('post', self.user, [
+            {'title': 'valid', 'body': 'body', 'tags': 'created'}, {'title': 'missing body'}])
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual({}, response.data[0])
+        self.assertIn('body', response.data[1])
+        self.assertEqual(0, models.Notes.objects.filter(owner=self.user).count())
+
+    def test_bulk_update(self):
+        """Owned notes are updated, the others are reported as not found"""
+        notes = models.Notes.objects.create(title='mine', body='body', tags='created', owner=self.user)
+        response = self.__execute_request('patch', self.user, [
+            {'id': notes.id, 'tags': 'done'}, {'id': self.other_notes.id, 'tags': 'done'}])
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([status.HTTP_200_OK, status.HTTP_404_NOT_FOUND], [item['status'] for item in response.data])
+        self.assertEqual('done', response.data[0]['data']['tags'])
+        self.assertEqual('done', models.Notes.objects.get(id=notes.id).tags)
+        self.assertEqual('created', models.Notes.objects.get(id=self.other_notes.id).tags)
+
+    def test_bulk_delete(self):
+        """Owned notes are deleted, the others are reported as not found"""
+        notes = models.Notes.objects.create(title='mine', body='body', tags='created', owner=self.user)
+        response = self.__execute_request('delete', self.user, {'ids': [notes.id, self.other_notes.id]})
+        self.assertEqual([status.HTTP_204_NO_CONTENT, status.HTTP_404_NOT_FOUND],
+                         [item['status'] for item in response.data])
+        self.assertFalse(models.Notes.objects.filter(id=notes.id).exists())
+        self.assertTrue(models.Notes.objects.filter(id=self.other_notes.id).exists())
+
+    def test_bulk_delete_bumps_each_owner_once(self):
+        """The bulk deletion sends no signal per notes and changes the version of the owner once"""
+        ids = [notes.id for notes in models.Notes.objects.bulk_create([
+            models.Notes(title='mine %d' % index, body='body', tags='done', owner=self.user) for index in range(5)])]
+        version = notes_cache.get_notes_version(self.user)
+        with mock.patch.object(notes_cache, 'bump_notes_version', wraps=notes_cache.bump_notes_version) as bump:
+            self.__execute_request('delete', self.user, {'ids': ids})
+        bump.assert_called_once_with(self.user.id)
+        self.assertNotEqual(version, notes_cache.get_notes_version(self.user))
+        self.assertEqual(0, tag_counts.get_tag_counts(self.user)['done'])
+
+    @override_settings(NOTES_BULK_MAX_ITEMS=1)
+    def test_bulk_rejects_malformed_requests(self):
+        """A body that is not a list of the expected items, or too long, is rejected"""
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.__execute_request('post', self.user, {}).status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST,
+                         self.__execute_request('delete', self.user, {'ids': ['a']}).status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST,
+                         self.__execute_request('delete', self.user, {'ids': [True]}).status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST,
+                         self.__execute_request('delete', self.user, {'ids': [1, 2]}).status_code)
+
+    def test_bulk_writes_invalidate_the_cached_list(self):
+        """The bulk writes change the version of the notes of the user"""
+        version = notes_cache.get_notes_version(self.user)
+        self.__execute_request('post', self.user, [{'title': 'new', 'body': 'body', 'tags': 'created'}])
+        self.assertNotEqual(version, notes_cache.get_notes_version(self.user))
+
+    def test_benchmark_command_runs(self):
+        """The bulk benchmark prints one line per number of notes and removes its notes"""
+        output = StringIO()
+        call_command('bench_bulk_notes', notes=[3], stdout=output)
+        self.assertEqual(1, len(output.getvalue().splitlines()))
+        self.assertFalse(models.UserModel.objects.filter(email='bench.bulk.notes@localhost').exists())
+
+
+class AdminBulkNotesTest(TestCase):
+    """Test the bulk creation of notes for many owners by an administrator"""
+
+    def __execute_post_request(self, user, data):
+        """
+            Execute a post request on the admin notes creation and return the response
+            :param user: The user used inside the request
+            :param data: The json body of the request
+            :return: An http response
+        """
+        request_post = self.request_factory.post(reverse(urls_name.ME_NOTES), json.dumps(data),
+                                                 content_type='application/json')
+        request_post.user = user
+        request_post._dont_enforce_csrf_checks = True
+        return views.CreateAdminNotes.as_view()(request_post)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.admin = models.UserModel(email='bulk.admin@test.com', password='admin', is_superuser=True)
+        self.admin.save()
+        self.owners = [models.UserModel.objects.create(email='bulk.owner.%d@test.com' % index) for index in range(3)]
+
+    def test_owners_are_resolved_with_one_query(self):
+        """The owners are fetched once, the notes inserted and their tags counted in one statement each"""
+        notes = [{'owner': owner.email, 'title': 'seeded', 'body': 'body', 'tags': 'created'}
+                 for owner in self.owners for _ in range(4)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.__execute_post_request(self.admin, notes)
+        statements = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(3, len(statements))
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(12, len(response.data['created']))
+        for owner in self.owners:
+            self.assertEqual(4, models.Notes.objects.filter(owner=owner).count())
+
+    def test_unknown_owners_are_reported(self):
+        """The notes of unknown owners are skipped and their emails reported"""
+        response = self.__execute_post_request(self.admin, [
+            {'owner': self.owners[0].email, 'title': 'seeded', 'body': 'body', 'tags': 'created'},
+            {'owner': 'unknown@test.com', 'title': 'lost', 'body': 'body', 'tags': 'created'}])
+        self.assertEqual(['unknown@test.com'], response.data['unknown_owners'])
+        self.assertEqual([self.owners[0].email], [notes['owner'] for notes in response.data['created']])
+
+    def test_invalid_notes_prevent_the_creation(self):
+        """A notes without owner or body is reported and nothing is written"""
+        response = self.__execute_post_request(self.admin, [
+            {'owner': self.owners[0].email, 'title': 'seeded', 'body': 'body', 'tags': 'created'},
+            {'title': 'no owner', 'tags': 'created'}])
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(['body', 'owner'], sorted(response.data[1]))
+        self.assertEqual(0, models.Notes.objects.count())
+
+    def test_only_administrators_can_seed_notes(self):
+        """A regular user cannot create notes for other users"""
+        response = self.__execute_post_request(self.owners[0], [
+            {'owner': self.owners[1].email, 'title': 'seeded', 'body': 'body', 'tags': 'created'}])
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+
+@override_settings(NOTES_LONG_POLL_INTERVAL=0.01)
+class AsyncNotesTest(TestCase):
+    """Test the asynchronous notes list, notes detail and login views"""
+
+    async def __execute_get_request(self, view, url, user, headers=None, **kwargs):
+        """
+            Execute a get request on an asynchronous view and return the response
+            :param view: The view function
+            :param url: The url of the view
+            :param user: The user used inside the request
+            :param headers: The conditional headers of the request
+            :param kwargs: The url parameters of the view
+        """
+        request_get = self.request_factory.get(url)
+        # The asynchronous factory does not turn its extra arguments into headers
+        request_get.META.update(headers or {})
+        request_get.user = user
+        return await view(request_get, **kwargs)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = AsyncRequestFactory()
+        self.user = models.UserModel.objects.create_user(email='async.user@test.com', password='test')
+        self.other = models.UserModel.objects.create(email='async.other@test.com')
+        self.notes = models.Notes.objects.create(title='first', body='body', tags='created', owner=self.user)
+        models.Notes.objects.create(title='other', body='body', tags='created', owner=self.other)
+
+    async def test_list_matches_the_synchronous_list(self):
+        """The asynchronous list returns the notes of the user like the synchronous one"""
+        response = await self.__execute_get_request(async_views.list_notes,
+                                                    reverse(urls_name.ASYNC_NOTES_LIST_NAME), self.user)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        results = json.loads(response.content)['results']
+        self.assertEqual([self.notes.id], [notes['id'] for notes in results])
+        self.assertEqual(self.user.email, results[0]['owner'])
+        self.assertTrue(response.has_header('ETag'))
+
+    async def test_list_follows_the_owner_email(self):
+        """A change of the owner email makes the asynchronous list modified"""
+        url = reverse(urls_name.ASYNC_NOTES_LIST_NAME)
+        response = await self.__execute_get_request(async_views.list_notes, url, self.user)
+        self.user.email = 'async.renamed@test.com'
+        await sync_to_async(self.user.save)()
+        modified = await self.__execute_get_request(async_views.list_notes, url, self.user,
+                                                    {'HTTP_IF_NONE_MATCH': response['ETag']})
+        self.assertEqual(status.HTTP_200_OK, modified.status_code)
+        self.assertEqual('async.renamed@test.com', json.loads(modified.content)['results'][0]['owner'])
+
+    async def test_long_polling_returns_on_change(self):
+        """A waiting client is answered as soon as one of its notes is created"""
+        url = reverse(urls_name.ASYNC_NOTES_LIST_NAME) + '?wait=10'
+        response = await self.__execute_get_request(async_views.list_notes, url, self.user)
+        headers = {'HTTP_IF_NONE_MATCH': response['ETag']}
+
+        async def change():
+            await asyncio.sleep(0.05)
+            await sync_to_async(models.Notes.objects.create)(title='second', body='body', tags='created',
+                                                              owner=self.user)
+        start = time.monotonic()
+        modified, _ = await asyncio.gather(
+            self.__execute_get_request(async_views.list_notes, url, self.user, headers), change())
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(status.HTTP_200_OK, modified.status_code)
+        self.assertEqual(2, len(json.loads(modified.content)['results']))
+
+    async def test_long_polling_times_out(self):
+        """A waiting client is answered with a 304 once the delay is over"""
+        url = reverse(urls_name.ASYNC_NOTES_LIST_NAME) + '?wait=0.05'
+        response = await self.__execute_get_request(async_views.list_notes, url, self.user)
+        not_modified = await self.__execute_get_request(async_views.list_notes, url, self.user,
+                                                        {'HTTP_IF_NONE_MATCH': response['ETag']})
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+
+    async def test_long_polling_needs_an_etag(self):
+        """If-Modified-Since alone, with its one second resolution, is answered without waiting"""
+        url = reverse(urls_name.ASYNC_NOTES_LIST_NAME) + '?wait=10'
+        response = await self.__execute_get_request(async_views.list_notes, url, self.user)
+        start = time.monotonic()
+        not_modified = await self.__execute_get_request(async_views.list_notes, url, self.user,
+                                                        {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']})
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+
+    async def test_long_polling_rejects_non_finite_waits(self):
+        """A nan or infinite wait is answered at once instead of polling forever"""
+        for wait in ('nan', 'inf'):
+            url = reverse(urls_name.ASYNC_NOTES_LIST_NAME) + '?wait=' + wait
+            response = await self.__execute_get_request(async_views.list_notes, url, self.user)
+            not_modified = await asyncio.wait_for(self.__execute_get_request(
+                async_views.list_notes, url, self.user, {'HTTP_IF_NONE_MATCH': response['ETag']}), 5)
+            self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+
+    async def test_detail_is_restricted_to_the_owner(self):
+        """The notes detail is only visible to its owner"""
+        url = reverse(urls_name.ASYNC_NOTES_DETAIL_NAME, kwargs={'pk': self.notes.id})
+        response = await self.__execute_get_request(async_views.notes_detail, url, self.user, pk=self.notes.id)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('first', json.loads(response.content)['title'])
+        forbidden = await self.__execute_get_request(async_views.notes_detail, url, self.other, pk=self.notes.id)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, forbidden.status_code)
+        missing = await self.__execute_get_request(async_views.notes_detail, url, self.user, pk=0)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, missing.status_code)
+
+    async def test_login_opens_a_session(self):
+        """The asynchronous login authenticates the user through the asgi handler"""
+        response = await self.async_client.post(reverse(urls_name.ASYNC_LOGIN_NAME),
+                                                {'email': 'async.user@test.com', 'password': 'test'},
+                                                content_type='application/json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('async.user@test.com', response.json()['email'])
+        listed = await self.async_client.get(reverse(urls_name.ASYNC_NOTES_LIST_NAME))
+        self.assertEqual(status.HTTP_200_OK, listed.status_code)
+
+    @override_settings(NOTES_HASHING_WORKERS=0, NOTES_PBKDF2_ITERATIONS=1000)
+    async def test_register_and_logout(self):
+        """The asynchronous registration creates the user and the asynchronous logout closes its session"""
+        credentials = {'email': 'async.new@test.com', 'password': 'test'}
+        response = await self.async_client.post(reverse(urls_name.ASYNC_REGISTER_NAME), credentials,
+                                                content_type='application/json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        response = await self.async_client.post(reverse(urls_name.ASYNC_REGISTER_NAME), credentials,
+                                                content_type='application/json')
+        self.assertEqual({'errors': 'The email already exist'}, response.json())
+        await self.async_client.post(reverse(urls_name.ASYNC_LOGIN_NAME), credentials, content_type='application/json')
+        response = await self.async_client.get(reverse(urls_name.ASYNC_LOGOUT_NAME))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        listed = await self.async_client.get(reverse(urls_name.ASYNC_NOTES_LIST_NAME))
+        self.assertEqual(status.HTTP_403_FORBIDDEN, listed.status_code)
+        response = await self.async_client.get(reverse(urls_name.ASYNC_LOGOUT_NAME))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_csrf_is_only_required_with_the_session(self):
+        """A token client creates notes without csrf token, a session client needs one"""
+        client = self.client_class(enforce_csrf_checks=True)
+        token = client.post(reverse(urls_name.ASYNC_LOGIN_NAME), {'email': 'async.user@test.com', 'password': 'test',
+                                                                  'token': True}).json()['token']
+        data = {'title': 'token', 'body': 'body', 'tags': 'created'}
+        response = self.client_class(enforce_csrf_checks=True).post(
+            reverse(urls_name.ASYNC_NOTES_LIST_NAME), data, HTTP_AUTHORIZATION='Bearer %s' % token)
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        client.post(reverse(urls_name.ASYNC_LOGIN_NAME), {'email': 'async.user@test.com', 'password': 'test'})
+        response = client.post(reverse(urls_name.ASYNC_NOTES_LIST_NAME), data)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+        self.assertIn('CSRF', response.json()['detail'])
+
+
+class LongPollingBenchmarkTest(TransactionTestCase):
+    """Test the long polling benchmark command"""
+
+    def test_benchmark_command_runs(self):
+        """The long polling benchmark prints one line per mode and removes its notes"""
+        output = StringIO()
+        call_command('bench_long_polling', clients=[2], workers=2, interval=0.01, delay=0.05, stdout=output)
+        self.assertEqual(2, len(output.getvalue().splitlines()))
+        self.assertFalse(models.UserModel.objects.filter(email='bench.long.polling@localhost').exists())
+
+
+@override_settings(NOTES_HASHING_WORKERS=0, NOTES_PBKDF2_ITERATIONS=1000)
+class PasswordHashingTest(TestCase):
+    """Test the tunable password hashers and the hashing pool"""
+
+    def setUp(self):
+        """Setup the test"""
+        self.user = models.UserModel.objects.create_user(email='hashing.user@test.com', password='secret')
+
+    def test_cost_comes_from_the_settings(self):
+        """The PBKDF2 iteration count is read from the settings"""
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(self.user.check_password('secret'))
+        self.assertFalse(self.user.check_password('wrong'))
+
+    def test_password_is_rehashed_on_check(self):
+        """A password hashed with a previous cost is upgraded on the next successful check"""
+        with override_settings(NOTES_PBKDF2_ITERATIONS=2000):
+            self.assertFalse(self.user.check_password('wrong'))
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+            self.assertTrue(self.user.check_password('secret'))
+            stored = models.UserModel.objects.get(pk=self.user.pk).password
+            self.assertTrue(stored.startswith('pbkdf2_sha256$2000$'))
+
+    def test_other_hasher_is_upgraded(self):
+        """A password hashed by another hasher moves to the preferred one"""
+        with override_settings(PASSWORD_HASHERS=['notes.hashers.ScryptPasswordHasher',
+                                                 'notes.hashers.PBKDF2PasswordHasher'],
+                               NOTES_SCRYPT_WORK_FACTOR=2 ** 4):
+            self.assertTrue(self.user.check_password('secret'))
+            self.assertTrue(self.user.password.startswith('scrypt$'))
+            self.assertTrue(models.UserModel.objects.get(pk=self.user.pk).check_password('secret'))
+
+    def test_pool_hashes_the_passwords(self):
+        """The hashes made by the worker processes verify inside the request thread"""
+        self.assertNotEqual('fork', hashing.get_mp_context().get_start_method())
+        with override_settings(NOTES_HASHING_WORKERS=1):
+            self.assertIsNotNone(hashing.get_executor())
+            encoded = hashing.make_password('pooled')
+            self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+            self.assertEqual((True, False), hashing.verify_password('pooled', encoded))
+        self.assertIsNone(hashing.get_executor())
+
+    def test_broken_pool_is_replaced(self):
+        """A pool whose worker died hashes the password inline and is started again"""
+        with override_settings(NOTES_HASHING_WORKERS=1):
+            executor = hashing.get_executor()
+            with self.assertRaises(BrokenProcessPool):
+                executor.submit(os._exit, 1).result()
+            encoded = hashing.make_password('pooled')
+            self.assertEqual((True, False), hashing.verify_password('pooled', encoded))
+            self.assertIsNotNone(hashing.get_executor())
+            self.assertIsNot(executor, hashing.get_executor())
+
+
+class PasswordHashingBenchmarkTest(TransactionTestCase):
+    """Test the password hashing benchmark command"""
+
+    @override_settings(NOTES_PBKDF2_ITERATIONS=1000)
+    def test_benchmark_command_runs(self):
+        """The hashing benchmark prints one line per size of the pool and removes its users"""
+        output = StringIO()
+        call_command('bench_password_hashing', registrations=3, threads=1, workers=[0, 1], stdout=output)
+        self.assertEqual(3, len(output.getvalue().splitlines()))
+        self.assertFalse(models.UserModel.objects.filter(email__startswith='bench.hashing.').exists())
+
+
+@override_settings(NOTES_HASHING_WORKERS=0, NOTES_PBKDF2_ITERATIONS=1000,
+                   NOTES_LOGIN_THROTTLE_RATES={'ip': '4/min', 'email': '2/min'})
+class LoginThrottleTest(TestCase):
+    """Test the password verification and the throttling of the login"""
+
+    def __login(self, email, password, address='127.0.0.1'):
+        """
+            Post the credentials to the login view
+            :param email: The email sent
+            :param password: The password sent
+            :param address: The ip address of the client
+        """
+        return self.client.post(reverse(urls_name.LOGIN_NAME), {'email': email, 'password': password},
+                                REMOTE_ADDR=address)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.user = models.UserModel.objects.create_user(email='throttle.user@test.com', password='secret')
+
+    def test_unknown_email_hashes_a_password(self):
+        """An unknown email costs a hash like a wrong password"""
+        backend = authentication.EmailBackendModel()
+        with mock.patch.object(hashing, 'make_password', wraps=hashing.make_password) as make_password:
+            self.assertIsNone(backend.authenticate(None, username='nobody@test.com', password='secret'))
+        make_password.assert_called_once_with('secret')
+        self.assertIsNone(backend.authenticate(None, username=self.user.email, password='wrong'))
+        self.assertEqual(self.user, backend.authenticate(None, username=self.user.email, password='secret'))
+
+    def test_email_bucket_rejects_before_hashing(self):
+        """Once the bucket of an email is empty the password is not checked"""
+        for address in ('10.0.0.1', '10.0.0.2'):
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, self.__login(self.user.email, 'wrong', address).status_code)
+        with mock.patch.object(hashing, 'verify_password') as verify_password:
+            response = self.__login(self.user.email, 'secret', '10.0.0.3')
+        verify_password.assert_not_called()
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_credentials_must_be_strings(self):
+        """An email or a password that is not a string is a bad request on both login views"""
+        for name in (urls_name.LOGIN_NAME, urls_name.ASYNC_LOGIN_NAME):
+            for credentials in ({'email': ['a'], 'password': 'x'}, {'email': self.user.email, 'password': {'a': 1}}):
+                response = self.client.post(reverse(name), credentials, content_type='application/json')
+                self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_ip_bucket_rejects_credential_stuffing(self):
+        """A client trying many emails is stopped by the bucket of its address"""
+        for index in range(4):
+            response = self.__login('stuffing.%d@test.com' % index, 'secret')
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, self.__login(self.user.email, 'secret').status_code)
+        self.assertEqual(status.HTTP_200_OK, self.__login(self.user.email, 'secret', '10.0.0.9').status_code)
+
+    def test_forged_forwarded_for_shares_the_address_bucket(self):
+        """Rotating X-Forwarded-For does not give a fresh budget to a client trying many emails"""
+        for index in range(4):
+            response = self.client.post(reverse(urls_name.LOGIN_NAME), {'email': 'forged.%d@test.com' % index,
+                                                                        'password': 'secret'},
+                                        HTTP_X_FORWARDED_FOR='10.1.0.%d' % index)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.post(reverse(urls_name.LOGIN_NAME), {'email': self.user.email, 'password': 'secret'},
+                                    HTTP_X_FORWARDED_FOR='10.1.0.9')
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+
+    def test_attempts_are_allowed_again_over_time(self):
+        """The attempts are allowed again once the sliding window moved past them"""
+        start = (time.time() // 60 + 1) * 60
+        with mock.patch.object(login_throttle.time, 'time', return_value=start + 1):
+            self.assertEqual(0, login_throttle.take_token(login_throttle.EMAIL_SCOPE, 'refill@test.com'))
+            self.assertEqual(0, login_throttle.take_token(login_throttle.EMAIL_SCOPE, 'refill@test.com'))
+            self.assertAlmostEqual(59, login_throttle.take_token(login_throttle.EMAIL_SCOPE, 'refill@test.com'))
+        with mock.patch.object(login_throttle.time, 'time', return_value=start + 121):
+            self.assertEqual(0, login_throttle.take_token(login_throttle.EMAIL_SCOPE, 'refill@test.com'))
+
+    def test_concurrent_attempts_share_the_limit(self):
+        """Attempts made at the same time are each counted"""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            waits = list(executor.map(lambda index: login_throttle.take_token(login_throttle.EMAIL_SCOPE,
+                                                                              'parallel@test.com'), range(16)))
+        self.assertEqual(2, waits.count(0))
+
+
+@override_settings(NOTES_THROTTLE_RATES={'user-read': '3/min', 'user-write': '1/min', 'ip-read': '5/min',
+                                        'ip-auth': '1/min'})
+class ThrottlingTest(TestCase):
+    """Test the sliding window throttles of the API"""
+
+    def __execute_request(self, method, user, address='127.0.0.1'):
+        """
+            Execute a request on the notes list and return the response
+            :param method: The http method of the request
+            :param user: The user used inside the request
+            :param address: The ip address of the client
+        """
+        request = getattr(self.request_factory, method)(reverse(urls_name.NOTES_LIST_NAME),
+                                                        {'title': 'title', 'body': 'body', 'tags': 'created'},
+                                                        REMOTE_ADDR=address)
+        request.user = user
+        request._dont_enforce_csrf_checks = True
+        return views.ListNotes.as_view()(request)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel.objects.create(email='throttled.user@test.com')
+        self.other_user = models.UserModel.objects.create(email='throttled.other@test.com')
+
+    def test_user_read_and_write_budgets(self):
+        """Reads and writes have their own budget and a rejection tells when to retry"""
+        for _ in range(3):
+            self.assertEqual(status.HTTP_200_OK, self.__execute_request('get', self.user).status_code)
+        response = self.__execute_request('get', self.user)
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(status.HTTP_201_CREATED, self.__execute_request('post', self.user).status_code)
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, self.__execute_request('post', self.user).status_code)
+
+    def test_ip_budget_covers_every_user(self):
+        """Users sharing an address also share the budget of the address"""
+        for _ in range(3):
+            self.__execute_request('get', self.user)
+        self.assertEqual(status.HTTP_200_OK, self.__execute_request('get', self.other_user).status_code)
+        self.assertEqual(status.HTTP_200_OK, self.__execute_request('get', self.other_user).status_code)
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS,
+                         self.__execute_request('get', self.other_user).status_code)
+        third_user = models.UserModel.objects.create(email='throttled.third@test.com')
+        self.assertEqual(status.HTTP_200_OK, self.__execute_request('get', third_user, '10.0.0.1').status_code)
+
+    def test_forwarded_for_does_not_give_a_fresh_budget(self):
+        """Without trusted proxies, a forged X-Forwarded-For still counts against the address"""
+        login = {'email': 'unknown@test.com', 'password': 'unknown'}
+        response = self.client.post(reverse(urls_name.LOGIN_NAME), login, HTTP_X_FORWARDED_FOR='1.1.1.1')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.post(reverse(urls_name.LOGIN_NAME), login, HTTP_X_FORWARDED_FOR='2.2.2.2')
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+
+    def test_token_user_budget_on_the_asynchronous_list(self):
+        """The asynchronous views count the requests of a token client against its user budget"""
+        authorization = 'Bearer %s' % tokens.create_token(self.user)
+        for index in range(3):
+            response = self.client.get(reverse(urls_name.ASYNC_NOTES_LIST_NAME), HTTP_AUTHORIZATION=authorization,
+                                       REMOTE_ADDR='10.0.1.%d' % index)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+        response = self.client.get(reverse(urls_name.ASYNC_NOTES_LIST_NAME), HTTP_AUTHORIZATION=authorization,
+                                   REMOTE_ADDR='10.0.1.9')
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+
+    def test_auth_scope(self):
+        """The login has its own budget by address"""
+        login = {'email': 'unknown@test.com', 'password': 'unknown'}
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.client.post(reverse(urls_name.LOGIN_NAME), login).status_code)
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS,
+                         self.client.post(reverse(urls_name.LOGIN_NAME), login).status_code)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.client.get(reverse(urls_name.NOTES_LIST_NAME)).status_code)
+
+    def test_previous_window_is_weighted(self):
+        """The requests of the previous window count for the part still inside the period"""
+        request = self.request_factory.get(reverse(urls_name.NOTES_LIST_NAME))
+        request.user = self.user
+        throttle = throttling.UserRateThrottle()
+        start = 60 * 1000
+        with mock.patch.object(throttling.UserRateThrottle, 'timer', return_value=start + 50):
+            for _ in range(3):
+                self.assertTrue(throttle.allow_request(request, None))
+        # A quarter of the next window has passed, the 3 requests still weigh 2.25
+        # and they lose 0.05 every second
+        with mock.patch.object(throttling.UserRateThrottle, 'timer', return_value=start + 75):
+            self.assertFalse(throttle.allow_request(request, None))
+            self.assertAlmostEqual(5, throttle.wait())
+        # Later they weigh 0.75, the 2 requests counted inside this window fit
+        with mock.patch.object(throttling.UserRateThrottle, 'timer', return_value=start + 105):
+            self.assertTrue(throttle.allow_request(request, None))
+
+    def test_benchmark_command_runs(self):
+        """The throttling benchmark prints the time added to reads and writes"""
+        output = StringIO()
+        call_command('bench_throttling', requests=10, clients=2, stdout=output)
+        self.assertEqual(2, len(output.getvalue().splitlines()))
+
+
+@override_settings(NOTES_HASHING_WORKERS=0, NOTES_PBKDF2_ITERATIONS=1000)
+class TokenAuthenticationTest(TestCase):
+    """Test the signed tokens given by the login"""
+
+    def __login(self, email, password):
+        """
+            Ask the login for a token and return it
+            :param email: The email sent
+            :param password: The password sent
+        """
+        response = self.client.post(reverse(urls_name.LOGIN_NAME), {'email': email, 'password': password,
+                                                                    'token': True})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return response.data['token']
+
+    def __get_notes(self, token):
+        """
+            Get the notes list with a token and without session
+            :param token: The token of the user
+        """
+        return self.client_class().get(reverse(urls_name.NOTES_LIST_NAME), HTTP_AUTHORIZATION='Bearer %s' % token)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.user = models.UserModel.objects.create_user(email='token.user@test.com', password='secret')
+        models.Notes.objects.create(title='first', body='body', tags='created', owner=self.user)
+
+    def test_token_login_opens_no_session(self):
+        """The token login answers with a token and sets no session cookie"""
+        token = self.__login(self.user.email, 'secret')
+        self.assertNotIn('sessionid', self.client.cookies)
+        self.assertEqual({'u': self.user.id, 'b': False, 'a': False}, {
+            key: value for key, value in tokens.read_token(token).items() if key in ('u', 'b', 'a')})
+
+    def test_token_requests_skip_the_session_and_the_user(self):
+        """A request with a token only queries the revocations and the notes"""
+        token = self.__login(self.user.email, 'secret')
+        with self.assertNumQueries(2):
+            response = self.__get_notes(token)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data['results']))
+
+    def test_invalid_tokens_are_rejected(self):
+        """Tampered and expired tokens are rejected"""
+        token = self.__login(self.user.email, 'secret')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.__get_notes(token[:-2] + 'xx').status_code)
+        with override_settings(NOTES_TOKEN_MAX_AGE=-1):
+            self.assertEqual(status.HTTP_403_FORBIDDEN, self.__get_notes(token).status_code)
+
+    def test_logout_revokes_the_token(self):
+        """The logout of a token rejects it until it expires"""
+        token = self.__login(self.user.email, 'secret')
+        other_token = self.__login(self.user.email, 'secret')
+        response = self.client_class().get(reverse(urls_name.LOGOUT_NAME), HTTP_AUTHORIZATION='Bearer %s' % token)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.__get_notes(token).status_code)
+        self.assertEqual(status.HTTP_200_OK, self.__get_notes(other_token).status_code)
+
+    def test_ban_revokes_the_tokens(self):
+        """Changing the user rejects the tokens carrying its previous flags"""
+        token = self.__login(self.user.email, 'secret')
+        self.user.is_ban = True
+        self.user.save()
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.__get_notes(token).status_code)
+        self.assertIsNone(tokens.read_token(token))
+
+    def test_revocations_survive_the_cache(self):
+        """The revocations are kept inside the database, clearing the cache does not accept the tokens again"""
+        token = self.__login(self.user.email, 'secret')
+        self.client_class().get(reverse(urls_name.LOGOUT_NAME), HTTP_AUTHORIZATION='Bearer %s' % token)
+        banned_token = self.__login(self.user.email, 'secret')
+        self.user.is_ban = True
+        self.user.save()
+        cache.clear()
+        self.assertIsNone(tokens.read_token(token))
+        self.assertIsNone(tokens.read_token(banned_token))
+
+
+@override_settings(NOTES_HASHING_WORKERS=0, NOTES_PBKDF2_ITERATIONS=1000, SESSION_ENGINE='notes.sessions',
+                   NOTES_SESSION_FLUSH_INTERVAL=3600)
+class SessionEngineTest(TestCase):
+    """Test the cache based session engine and its write-behind to the database"""
+
+    def __login(self):
+        """
+            Log the user in and return the queries made on the sessions table
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse(urls_name.LOGIN_NAME), {'email': self.user.email, 'password': 'test'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [query['sql'] for query in queries.captured_queries if 'django_session' in query['sql']]
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.user = models.UserModel.objects.create_user(email='session.user@test.com', password='test')
+
+    def tearDown(self):
+        """Drop the sessions still queued by the test"""
+        with sessions._pending_lock:
+            sessions._pending.clear()
+
+    def test_sessions_stay_in_the_cache(self):
+        """Without write-behind the login and the requests never touch the sessions table"""
+        self.assertEqual([], self.__login())
+        with self.assertNumQueries(1):
+            self.assertEqual(status.HTTP_200_OK, self.client.get(reverse(urls_name.NOTES_LIST_NAME)).status_code)
+        self.assertFalse(Session.objects.exists())
+
+    def test_unchanged_sessions_are_not_saved(self):
+        """Saving a session holding the data it was loaded with writes nothing"""
+        store = sessions.SessionStore()
+        store['key'] = 'value'
+        store.create()
+        store = sessions.SessionStore(store.session_key)
+        store['key'] = 'value'
+        with mock.patch.object(store._cache, 'set') as cache_set:
+            store.save()
+        cache_set.assert_not_called()
+
+    @override_settings(NOTES_SESSION_WRITE_BEHIND=True)
+    def test_write_behind_copies_the_sessions_after_the_response(self):
+        """With write-behind the login only queues the session, the flush writes it and the logout deletes it"""
+        self.assertEqual([], self.__login())
+        session_key = self.client.cookies['sessionid'].value
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+        sessions.flush_pending_sessions()
+        self.assertTrue(Session.objects.filter(session_key=session_key).exists())
+        # A session evicted from the cache is read back from the database
+        cache.delete(sessions.SESSION_CACHE_KEY_PREFIX + session_key)
+        self.assertEqual(status.HTTP_200_OK, self.client.get(reverse(urls_name.NOTES_LIST_NAME)).status_code)
+        self.client.get(reverse(urls_name.LOGOUT_NAME))
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+
+    @override_settings(NOTES_SESSION_WRITE_BEHIND=True)
+    def test_write_behind_deletes_at_once(self):
+        """A deleted session is not read back from the database before the flush"""
+        store = sessions.SessionStore()
+        store['_auth_user_id'] = '1'
+        store.create()
+        sessions.flush_pending_sessions()
+        store['other'] = 'value'
+        store.save()
+        store.delete()
+        self.assertEqual({}, sessions.SessionStore(store.session_key).load())
+        sessions.flush_pending_sessions()
+        self.assertFalse(Session.objects.filter(session_key=store.session_key).exists())
+
+
+class SessionsBenchmarkTest(TransactionTestCase):
+    """Test the session engines benchmark command"""
+
+    def test_benchmark_command_runs(self):
+        """The sessions benchmark prints one line per engine and removes its users"""
+        output = StringIO()
+        call_command('bench_sessions', clients=1, requests=2, stdout=output)
+        self.assertEqual(len(bench_sessions.ENGINES), len(output.getvalue().splitlines()))
+        self.assertFalse(models.UserModel.objects.filter(email__startswith='bench.sessions.').exists())
+
+
+class ReplicaRouterTest(TestCase):
+    """Test the routing of the list reads to the read replicas"""
+
+    def setUp(self):
+        """Setup the test"""
+        self.router = routers.ReplicaRouter()
+
+    @override_settings(NOTES_DB_REPLICAS=['replica_1', 'replica_2'])
+    def test_only_the_replica_reads_leave_the_primary(self):
+        """Reads go to a replica inside read_from_replica, everything else to the primary"""
+        self.assertEqual('default', self.router.db_for_read(models.Notes))
+        with routers.read_from_replica():
+            self.assertIn(self.router.db_for_read(models.Notes), ['replica_1', 'replica_2'])
+            self.assertEqual('default', self.router.db_for_write(models.Notes))
+        self.assertEqual('default', self.router.db_for_read(models.Notes))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'notes'))
+        self.assertTrue(self.router.allow_migrate('default', 'notes'))
+
+    def test_no_replica_keeps_the_reads_on_the_primary(self):
+        """Without replica the reads of the lists stay on the primary"""
+        with override_settings(NOTES_DB_REPLICAS=[]), routers.read_from_replica():
+            self.assertEqual('default', self.router.db_for_read(models.Notes))
+
+    @override_settings(NOTES_DB_REPLICA_LAG=5)
+    def test_recently_changed_lists_are_read_from_the_primary(self):
+        """A list changed within the replica lag is not read from a replica"""
+        view = views.ListNotes()
+        self.assertTrue(view.is_replica_fresh())
+        view.list_versions = [time.time_ns() - 10 * 10 ** 9]
+        self.assertTrue(view.is_replica_fresh())
+        view.list_versions.append(time.time_ns())
+        self.assertFalse(view.is_replica_fresh())
+
+
+@skipUnless(settings.NOTES_DB_REPLICAS, 'Needs stand-in replicas, run with NOTES_DB_REPLICAS=1')
+@override_settings(NOTES_DB_REPLICA_LAG=0)
+class ReplicaReadTest(TransactionTestCase):
+    """Test the views reading from the SQLite stand-in replicas"""
+    databases = '__all__'
+
+    def __replica_queries(self, request, view):
+        """
+            Run the request and return the number of queries made on the replicas
+            :param request: The request
+            :param view: The view answering the request
+        """
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in settings.NOTES_DB_REPLICAS]
+            response = view(request)
+        self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+        return sum(len(context) for context in contexts)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.admin = models.UserModel.objects.create_superuser(email='replica.admin@test.com', password='test')
+        models.Notes.objects.create(title='first', body='body', tags='created', owner=self.admin)
+        self.factory = RequestFactory()
+
+    def test_lists_read_from_the_replicas(self):
+        """The notes lists and the users list are read from a replica, the creation writes to the primary"""
+        for name, view, data in ((urls_name.NOTES_LIST_NAME, views.ListNotes, {}),
+                                 (urls_name.FILTER_TAGS, views.FilterAPIView, {'search': 'created'}),
+                                 (urls_name.USER_LIST_NAME, views.ListUser, {})):
+            request = self.factory.get(reverse(name), data)
+            request.user = self.admin
+            self.assertLess(0, self.__replica_queries(request, view.as_view()), name)
+        request = self.factory.post(reverse(urls_name.NOTES_LIST_NAME), {'title': 'second', 'body': 'body',
+                                                                         'tags': 'created'})
+        request.user = self.admin
+        request._dont_enforce_csrf_checks = True
+        self.assertEqual(0, self.__replica_queries(request, views.ListNotes.as_view()))
+
+
+class SQLitePragmasTest(TestCase):
+    """Test the pragmas set on the new SQLite connections"""
+
+    def test_new_connections_get_the_pragmas(self):
+        """A new connection gets the NOTES_SQLITE_PRAGMAS, none are set by default"""
+        for pragmas, expected in (({}, None), ({'cache_size': -1234, 'busy_timeout': 4321}, (-1234, 4321))):
+            with override_settings(NOTES_SQLITE_PRAGMAS=pragmas):
+                new_connection = connections.create_connection('default')
+                try:
+                    with new_connection.cursor() as cursor:
+                        values = tuple(cursor.execute('PRAGMA %s' % name).fetchone()[0]
+                                       for name in ('cache_size', 'busy_timeout'))
+                finally:
+                    new_connection.close()
+            if expected is None:
+                self.assertNotEqual((-1234, 4321), values)
+            else:
+                self.assertEqual(expected, values)
+
+
+class SQLiteWritersBenchmarkTest(TransactionTestCase):
+    """Test the concurrent SQLite writers benchmark command"""
+
+    def test_benchmark_command_runs(self):
+        """The writers benchmark prints one line per profile and removes its users"""
+        output = StringIO()
+        call_command('bench_sqlite_writers', writers=[1], notes=2, stdout=output)
+        self.assertEqual(2, len(output.getvalue().splitlines()))
+        self.assertFalse(models.UserModel.objects.filter(email__startswith='bench.sqlite.').exists())
+
+
+class NotesTagCountTest(TestCase):
+    """Test the number of notes by tags kept up to date by the writes"""
+
+    def __counts(self, owner=None):
+        """
+            Return the maintained counts of an owner, or of every owner, without the zero counts
+            :param owner: The owner of the notes, None for every owner
+        """
+        queryset = models.NotesTagCount.objects.all() if owner is None else owner.tag_counts.all()
+        counts = {}
+        for tags, count in queryset.values_list('tags', 'count'):
+            counts[tags] = counts.get(tags, 0) + count
+        return {tags: count for tags, count in counts.items() if count}
+
+    def __stats(self, user, scope=None):
+        """
+            Get the stats endpoint and return the response
+            :param user: The user used inside the request
+            :param scope: The value of ?scope=
+        """
+        request = self.request_factory.get(reverse(urls_name.NOTES_STATS), {'scope': scope} if scope else {})
+        request.user = user
+        return views.NotesStats.as_view()(request)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel.objects.create_user(email='tag.counts@test.com', password='test')
+        self.admin = models.UserModel.objects.create_superuser(email='tag.counts.admin@test.com', password='test')
+
+    def test_single_writes_update_the_counts(self):
+        """Creating, retagging and deleting a notes moves it between the counts"""
+        notes = models.Notes.objects.create(title='a', body='body', tags='created', owner=self.user)
+        models.Notes.objects.create(title='b', body='body', tags='created', owner=self.user)
+        self.assertEqual({'created': 2}, self.__counts(self.user))
+        notes = models.Notes.objects.with_owner().get(id=notes.id)
+        notes.tags = 'done'
+        notes.save()
+        notes.title = 'renamed'
+        notes.save(update_fields=['title'])
+        self.assertEqual({'created': 1, 'done': 1}, self.__counts(self.user))
+        notes.delete()
+        self.assertEqual({'created': 1}, self.__counts(self.user))
+
+    def test_stale_instances_keep_the_counts_right(self):
+        """Two stale copies of a notes move it once when saved and remove it once when deleted"""
+        notes = models.Notes.objects.create(title='a', body='body', tags='created', owner=self.user)
+        first, second = models.Notes.objects.get(id=notes.id), models.Notes.objects.get(id=notes.id)
+        first.tags = second.tags = 'done'
+        first.save()
+        second.save()
+        self.assertEqual({'done': 1}, self.__counts(self.user))
+        first.delete()
+        second.delete()
+        self.assertEqual({}, self.__counts(self.user))
+
+    def test_bulk_writes_update_the_counts(self):
+        """The bulk creation, update, queryset update and deletion keep the counts right"""
+        created = models.Notes.objects.bulk_create([
+            models.Notes(title=str(index), body='body', tags='created', owner=self.user) for index in range(4)])
+        created[0].tags = created[1].tags = 'progress'
+        models.Notes.objects.bulk_update(created[:2], ['tags'])
+        self.assertEqual({'created': 2, 'progress': 2}, self.__counts(self.user))
+        models.Notes.objects.filter(id=created[2].id).update(tags='done')
+        self.assertEqual({'created': 1, 'progress': 2, 'done': 1}, self.__counts(self.user))
+        models.Notes.objects.filter(id=created[3].id).update(tags=Value('progress', output_field=models.StatusField()))
+        self.assertEqual({'progress': 3, 'done': 1}, self.__counts(self.user))
+        models.Notes.objects.filter(tags='progress').delete()
+        self.assertEqual({'done': 1}, self.__counts(self.user))
+
+    def test_stats_answer_from_the_counts(self):
+        """The stats count the notes of the user, or of everyone with ?scope=all, without counting the notes"""
+        models.Notes.objects.create(title='a', body='body', tags='created', owner=self.user)
+        models.Notes.objects.create(title='b', body='body', tags='done', owner=self.admin)
+        response = self.__stats(self.user)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'tags': {'created': 1, 'progress': 0, 'done': 0}, 'total': 1}, response.data)
+        self.assertEqual({'created': 1, 'progress': 0, 'done': 1}, self.__stats(self.admin, 'all').data['tags'])
+        with self.assertNumQueries(0):
+            self.assertEqual(1, self.__stats(self.user).data['total'])
+        models.Notes.objects.create(title='c', body='body', tags='progress', owner=self.user)
+        self.assertEqual(2, self.__stats(self.user).data['total'])
+
+    def test_rebuild_command_repairs_the_counts(self):
+        """The rebuild command replaces the counts which drifted and reports them"""
+        models.Notes.objects.create(title='a', body='body', tags='created', owner=self.user)
+        models.Notes.objects.create(title='b', body='body', tags='done', owner=self.admin)
+        models.NotesTagCount.objects.filter(owner=self.user).update(count=7)
+        models.NotesTagCount.objects.create(owner=self.user, tags='progress', count=3)
+        output = StringIO()
+        call_command('rebuild_tag_counts', stdout=output)
+        self.assertEqual('2 tag counts were wrong', output.getvalue().strip())
+        self.assertEqual({'created': 1}, self.__counts(self.user))
+        self.assertEqual({'done': 1}, self.__counts(self.admin))
+
+
+class NotesFilterTest(TestCase):
+    """Test the exact filters of the notes and the indexes serving them"""
+
+    def __filter(self, user, params):
+        """
+            Filter the notes and return the response
+            :param user: The user used inside the request
+            :param params: The query parameters
+        """
+        request = self.request_factory.get(reverse(urls_name.FILTER_TAGS), params)
+        request.user = user
+        return views.FilterAPIView.as_view()(request)
+
+    def __filter_ids(self, user, params):
+        """
+            Filter the notes and return the ids found
+            :param user: The user used inside the request
+            :param params: The query parameters
+        """
+        response = self.__filter(user, params)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return {notes['id'] for notes in response.data['results']}
+
+    def __plan(self, user, params):
+        """
+            Return the query plan of the page of notes read for the filters
+            :param user: The user used inside the request
+            :param params: The query parameters
+        """
+        view = views.FilterAPIView(request=Request(self.request_factory.get(reverse(urls_name.FILTER_TAGS), params)),
+                                   format_kwarg=None)
+        view.request.user = user
+        return view.filter_queryset(view.get_queryset()).order_by('created', 'id')[:100].explain()
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel.objects.create_user(email='filter.user@test.com', password='test')
+        self.admin = models.UserModel.objects.create_superuser(email='filter.admin@test.com', password='test')
+        self.notes = {}
+        for tags, days in (('created', 10), ('progress', 5), ('done', 1)):
+            for owner in (self.user, self.admin):
+                notes = models.Notes.objects.create(title=tags, body='body', tags=tags, owner=owner)
+                models.Notes.objects.filter(id=notes.id).update(created=timezone.now() - timezone.timedelta(days=days))
+                self.notes[tags, owner.email] = notes.id
+
+    def test_exact_and_multi_value_tags(self):
+        """?tags= matches whole tags, several tags are separated by commas"""
+        self.assertEqual({self.notes['done', self.user.email]}, self.__filter_ids(self.user, {'tags': 'done'}))
+        self.assertEqual({self.notes['done', self.user.email], self.notes['progress', self.user.email]},
+                         self.__filter_ids(self.user, {'tags': 'done,progress'}))
+        self.assertEqual(set(), self.__filter_ids(self.user, {'tags': 'don'}))
+        self.assertEqual({self.notes['created', self.user.email]}, self.__filter_ids(self.user, {'search': 'created'}))
+
+    def test_created_range_and_owner(self):
+        """The created range includes its bounds, the owner filter applies to the global scope"""
+        week_ago = (timezone.now() - timezone.timedelta(days=7)).date().isoformat()
+        self.assertEqual({self.notes['progress', self.user.email], self.notes['done', self.user.email]},
+                         self.__filter_ids(self.user, {'created_after': week_ago}))
+        self.assertEqual({self.notes['created', self.user.email]},
+                         self.__filter_ids(self.user, {'created_before': week_ago}))
+        self.assertEqual({self.notes['progress', self.user.email]}, self.__filter_ids(self.admin, {
+            'scope': 'all', 'owner': self.user.email, 'tags': 'progress', 'created_after': week_ago}))
+        response = self.__filter(self.user, {'created_after': 'yesterday'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('created_after', response.data)
+
+    @skipUnless(connection.vendor == 'sqlite', 'The query plans are the ones of SQLite')
+    def test_filters_use_the_tags_indexes(self):
+        """The tags filters search the tags indexes instead of scanning the notes"""
+        plan = self.__plan(self.user, {'tags': 'done', 'created_after': '2026-01-01'})
+        self.assertIn('USING INDEX notes_owner_tags_created_idx (owner_id=? AND tags=? AND created>?)', plan)
+        plan = self.__plan(self.admin, {'scope': 'all', 'tags': 'done'})
+        self.assertIn('USING INDEX notes_tags_created_idx (tags=?)', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        for params in ({'tags': 'done,progress'}, {'scope': 'all', 'tags': 'done,progress'}):
+            self.assertNotRegex(self.__plan(self.admin, params), r'SCAN notes_notes(?! USING)')
+
+
+class NotesSummaryTest(TestCase):
+    """Test the summary representation of the notes lists and their sparse fieldsets"""
+
+    def __list(self, params=None):
+        """
+            List the notes of the user and return the response
+            :param params: The query parameters
+        """
+        request = self.request_factory.get(reverse(urls_name.NOTES_LIST_NAME), params or {})
+        request.user = self.user
+        return views.ListNotes.as_view()(request)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.request_factory = RequestFactory()
+        self.user = models.UserModel.objects.create_user(email='summary.user@test.com', password='test')
+        self.notes = [models.Notes.objects.create(title='notes %d' % index, body='a long body %d' % index,
+                                                  tags='created', owner=self.user) for index in range(3)]
+
+    def test_lists_leave_the_body_to_the_detail_view(self):
+        """The lists neither read nor return the body, the detail view returns it"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.__list()
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(['id', 'created', 'title', 'tags', 'owner'], list(response.data['results'][0]))
+        self.assertFalse([query for query in queries if 'body' in query['sql']])
+        request = self.request_factory.get(reverse(urls_name.NOTES_UPDATE, kwargs={'pk': self.notes[0].id}))
+        request.user = self.user
+        detail = views.UpdateAPIView.as_view()(request, pk=self.notes[0].id)
+        self.assertEqual('a long body 0', detail.data['body'])
+
+    @override_settings(NOTES_PREVIEW_LENGTH=6)
+    def test_sparse_fieldset_and_preview(self):
+        """?fields= picks the fields, the preview is the start of the body and paging still works"""
+        response = self.__list({'fields': 'title,preview', 'page_size': 2})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([{'title': 'notes 0', 'preview': 'a long'}, {'title': 'notes 1', 'preview': 'a long'}],
+                         response.data['results'])
+        next_page = self.__list(parse_qs(urlparse(response.data['next']).query))
+        self.assertEqual([{'title': 'notes 2', 'preview': 'a long'}], next_page.data['results'])
+        for fields in ('body', 'title,unknown', ','):
+            response = self.__list({'fields': fields})
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+            self.assertIn('fields', response.data)
+
+
+class FastJSONRendererTest(TestCase):
+    """Test the JSON renderer of the API and its stdlib fallback"""
+
+    def test_output_matches_the_rest_framework_renderer(self):
+        """Both encoders render the same bytes as the JSONRenderer of the REST framework"""
+        created = timezone.now()
+        data = {'created': created, 'date': created.date(), 'title': 'café \u2028', 'lazy': gettext_lazy('Not found.'),
+                'items': [1, 2.5, None, True], 'error': ErrorDetail('invalid')}
+        expected = JSONRenderer().render(data)
+        self.assertIn(b'\\u2028', expected)
+        for fast_json in (False, True):
+            with self.subTest(fast_json=fast_json), override_settings(NOTES_FAST_JSON=fast_json):
+                self.assertEqual(expected, renderers.FastJSONRenderer().render(data))
+        self.assertEqual(b'', renderers.FastJSONRenderer().render(None))
+
+    def test_lists_leave_the_datetimes_to_the_encoder(self):
+        """The read serializers keep the created datetimes, the list renders them like NotesSerializer"""
+        user = models.UserModel.objects.create(email='renderer.user@test.com')
+        notes = models.Notes.objects.create(title='first', body='body', tags='created', owner=user)
+        queryset = models.Notes.objects.with_owner()
+        row = serializers.NotesReadSerializer(serializers.NotesReadSerializer.project(queryset)).data[0]
+        self.assertEqual(notes.created, row['created'])
+        self.assertEqual(serializers.NotesSerializer(notes).data['created'],
+                         json.loads(renderers.dumps(row))['created'])
+        with timezone.override('Europe/Paris'):
+            row = serializers.NotesReadSerializer(serializers.NotesReadSerializer.project(queryset)).data[0]
+        self.assertIsInstance(row['created'], str)
+
+
+@override_settings(NOTES_COMPRESSION_MIN_SIZE=100, NOTES_COMPRESSION_ENCODINGS=['br', 'gzip'])
+class CompressionTest(TestCase):
+    """Test the negotiated compression of the responses"""
+
+    def __list(self, accept_encoding, **headers):
+        """
+            Get the notes list of the user
+            :param accept_encoding: The Accept-Encoding sent
+            :param headers: The other headers sent
+        """
+        return self.client.get(reverse(urls_name.NOTES_LIST_NAME), HTTP_ACCEPT_ENCODING=accept_encoding, **headers)
+
+    def setUp(self):
+        """Setup the test"""
+        cache.clear()
+        self.user = models.UserModel.objects.create(email='compression.user@test.com')
+        self.client.force_login(self.user)
+        for index in range(5):
+            models.Notes.objects.create(title='notes %d' % index, body='body', tags='created', owner=self.user)
+
+    def test_negotiation(self):
+        """The accepted encoding of highest quality wins, the order of preference breaks the ties"""
+        self.assertEqual('br', compression.negotiate_encoding('gzip, deflate, br', ['br', 'gzip']))
+        self.assertEqual('gzip', compression.negotiate_encoding('br;q=0.5, gzip', ['br', 'gzip']))
+        self.assertEqual('gzip', compression.negotiate_encoding('*', ['gzip']))
+        self.assertIsNone(compression.negotiate_encoding('gzip;q=0, identity', ['br', 'gzip']))
+        self.assertIsNone(compression.negotiate_encoding('', ['br', 'gzip']))
+
+    def test_large_responses_are_gzipped(self):
+        """The list is compressed above the threshold, its ETag becomes weak and still validates"""
+        plain = self.__list('identity')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        response = self.__list('gzip')
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(plain.content, gzip.decompress(response.content))
+        self.assertEqual('W/' + plain['ETag'], response['ETag'])
+        not_modified = self.__list('gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+        with override_settings(NOTES_COMPRESSION_MIN_SIZE=len(plain.content) + 1):
+            self.assertFalse(self.__list('gzip').has_header('Content-Encoding'))
+
+    @skipUnless(compression.brotli is not None, 'The brotli package is not installed')
+    def test_brotli_is_preferred(self):
+        """Brotli is picked when the client accepts it"""
+        response = self.__list('gzip, br')
+        self.assertEqual('br', response['Content-Encoding'])
+        self.assertEqual(self.__list('identity').content, compression.brotli.decompress(response.content))
+
+    def test_streamed_exports_are_compressed(self):
+        """The streamed export is compressed chunk by chunk"""
+        response = self.client.get(reverse(urls_name.NOTES_EXPORT), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual('gzip', response['Content-Encoding'])
+        exported = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(5, len(exported))
+
+    def test_benchmark_command_runs(self):
+        """The renderers benchmark prints one line per encoder and compression"""
+        output = StringIO()
+        call_command('bench_renderers', page_size=5, repeat=1, stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertIn('gzip', ''.join(lines))
+        self.assertTrue(all('MB/s' in line for line in lines))
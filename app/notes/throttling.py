@@ -0,0 +1,177 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_KEY = 'throttle:%s:%s:%s:%d'
+READ_SCOPE = 'read'
+WRITE_SCOPE = 'write'
+AUTH_SCOPE = 'auth'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+        Parse a rate written like the DRF throttle rates ('5/min')
+        :param rate: The rate
+        :return: A (number of requests, seconds) tuple
+    """
+    number, period = rate.split('/')
+    return int(number), PERIODS[period[0]]
+
+
+def take_request(kind, scope, ident, rate, now):
+    """
+        Count a request of a client inside the current fixed window and
+        check the estimated number of requests made during the last
+        period, the previous window being weighted by the part of it
+        still covered by the sliding window. The counters are only
+        changed by cache.add and cache.incr, so concurrent requests
+        never read the same count
+        :param kind: What the client is ('user', 'ip', ...)
+        :param scope: The budget used by the request
+        :param ident: What identifies the client inside its kind
+        :param rate: The rate of the budget ('5/min')
+        :param now: The current timestamp
+        :return: 0 when the request is allowed, else the seconds to wait
+    """
+    limit, duration = parse_rate(rate)
+    window, elapsed = divmod(now, duration)
+    key = THROTTLE_KEY % (kind, scope, ident, window)
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        # Both windows are needed until the end of the next one
+        if cache.add(key, 1, duration * 2):
+            current = 1
+        else:
+            current = cache.incr(key)
+    previous = cache.get(THROTTLE_KEY % (kind, scope, ident, window - 1), 0)
+    weight = 1 - elapsed / duration
+    if previous * weight + current <= limit:
+        return 0
+    if current > limit:
+        # Wait for the current window to become the previous one
+        return duration - elapsed
+    # Wait for the previous window to weigh little enough
+    return duration * (previous * weight + current - limit) / previous
+
+
+def reset_requests(kind, scope, ident, rate, now):
+    """
+        Forget the requests counted for a client by take_request
+        :param kind: What the client is
+        :param scope: The budget used by the requests
+        :param ident: What identifies the client inside its kind
+        :param rate: The rate of the budget
+        :param now: The current timestamp
+    """
+    window = now // parse_rate(rate)[1]
+    cache.delete_many([THROTTLE_KEY % (kind, scope, ident, window - offset) for offset in (0, 1)])
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+        Throttle counting the requests of a client inside fixed windows
+        and weighting the previous window by the part of it still covered
+        by the sliding window, which smooths the bursts allowed at the
+        window boundaries for two cache operations per request.
+
+        The counters are incremented atomically inside the shared cache,
+        so the limits hold across every worker. The budget of a request
+        is picked by the throttle_scope of the view (AUTH_SCOPE for the
+        login and the registration) or by its method (READ_SCOPE or
+        WRITE_SCOPE), and its rate is read from the NOTES_THROTTLE_RATES
+        setting under '<kind>-<scope>', a missing rate disables it
+    """
+    kind = None
+    timer = time.time
+
+    def get_client_ident(self, request):
+        """
+            Return what identifies the client, None to skip the throttle
+            :param request: The request being throttled
+        """
+        raise NotImplementedError('.get_client_ident() must be overridden')
+
+    def get_scope(self, request, view):
+        """
+            Return the budget used by the request
+            :param request: The request being throttled
+            :param view: The view of the request
+        """
+        return getattr(view, 'throttle_scope', None) or (
+            READ_SCOPE if request.method in SAFE_METHODS else WRITE_SCOPE)
+
+    def get_rate(self, scope):
+        """
+            :param scope: The budget used by the request
+            :return: The rate of the budget, None when it is not throttled
+        """
+        return getattr(settings, 'NOTES_THROTTLE_RATES', {}).get('%s-%s' % (self.kind, scope))
+
+    def allow_request(self, request, view):
+        """
+            Count the request and check the estimated number of requests
+            made during the last period
+            :param request: The request being throttled
+            :param view: The view of the request
+        """
+        scope = self.get_scope(request, view)
+        rate = self.get_rate(scope)
+        if rate is None:
+            return True
+        ident = self.get_client_ident(request)
+        if ident is None:
+            return True
+        self.retry_after = take_request(self.kind, scope, ident, rate, self.timer())
+        return not self.retry_after
+
+    def wait(self):
+        """
+            Return the seconds to wait before the next allowed request
+        """
+        return getattr(self, 'retry_after', None)
+
+
+class UserRateThrottle(SlidingWindowThrottle):
+    """
+        Limit the requests of every authenticated user, wherever they come from
+    """
+    kind = 'user'
+
+    def get_client_ident(self, request):
+        """
+            :param request: The request being throttled
+        """
+        user = request.user
+        return user.pk if user and user.is_authenticated else None
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """
+        Limit the requests of every ip address, authenticated or not
+    """
+    kind = 'ip'
+
+    def get_client_ident(self, request):
+        """
+            :param request: The request being throttled
+        """
+        return self.get_ident(request)
+
+
+def check_throttles(request, view):
+    """
+        Apply the default throttles outside of the API views
+        :param request: The request being throttled
+        :param view: The view of the request, its throttle_scope is honoured
+        :raise Throttled: When one of the throttles rejects the request
+    """
+    waits = [throttle.wait() for throttle in (UserRateThrottle(), IPRateThrottle())
+             if not throttle.allow_request(request, view)]
+    if waits:
+        raise Throttled(max(waits))
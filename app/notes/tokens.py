@@ -0,0 +1,99 @@
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils import timezone
+
+from . import models
+
+TOKEN_SALT = 'notes.tokens'
+# The fields of the user carried by the token, the others are deferred
+TOKEN_USER_FIELDS = ('id', 'is_ban', 'is_superuser')
+
+
+def get_max_age():
+    """
+        Return the lifetime of the tokens in seconds
+    """
+    return getattr(settings, 'NOTES_TOKEN_MAX_AGE', 3600)
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def create_token(user):
+    """
+        Sign a token carrying the id and the flags of the user
+        :param user: The authenticated user
+        :return: The token
+    """
+    payload = {
+        'u': user.pk,
+        'b': user.is_ban,
+        'a': user.is_superuser,
+        'i': now_ms(),
+        'j': secrets.token_urlsafe(12),
+    }
+    return signing.dumps(payload, salt=TOKEN_SALT, compress=True)
+
+
+def read_token(token):
+    """
+        Check the signature, the age and the revocation of a token
+        :param token: The token sent by the client
+        :return: The payload of the token, None when it is not valid
+    """
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=get_max_age())
+    except signing.BadSignature:
+        return None
+    if models.RevokedToken.objects.filter(Q(token_id=payload['j']) | Q(
+            user_id=payload['u'], token_id='', issued_before__gt=payload['i'])).exists():
+        return None
+    return payload
+
+
+def get_token_user(payload):
+    """
+        Build the user of a token without any query, the fields it does
+        not carry are loaded from the database when accessed
+        :param payload: The payload of a valid token
+    """
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, TOKEN_USER_FIELDS, (payload['u'], payload['b'], payload['a']))
+
+
+def revoke(user_id, token_id=''):
+    """
+        Store a revocation until the tokens it rejects expire, and drop
+        the ones that expired
+        :param user_id: The primary key of the user
+        :param token_id: The id of the rejected token, empty for every
+            token of the user issued until now
+    """
+    now = timezone.now()
+    models.RevokedToken.objects.filter(expires__lt=now).delete()
+    models.RevokedToken.objects.create(user_id=user_id, token_id=token_id, issued_before=now_ms(),
+                                expires=now + timedelta(seconds=get_max_age()))
+
+
+def revoke_token(payload):
+    """
+        Reject a token until it expires, used by the logout
+        :param payload: The payload of the token
+    """
+    revoke(payload['u'], payload['j'])
+
+
+def revoke_user_tokens(user_id):
+    """
+        Reject every token of a user issued until now, used when the
+        flags or the password of the user change
+        :param user_id: The primary key of the user
+    """
+    revoke(user_id)
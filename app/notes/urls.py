@@ -2,6 +2,7 @@ from django.urls import path
 from . import views
 from . import urls_name
 from . import registration_views
+from . import async_views
 
 
 urlpatterns = [
@@ -21,10 +22,46 @@ urlpatterns = [
          views.UpdateAPIView.as_view(),
          name=urls_name.NOTES_UPDATE),
 
+    path('notes/bulk/',
+         views.BulkNotes.as_view(),
+         name=urls_name.NOTES_BULK),
+
+    path('notes/export/',
+         views.ExportNotes.as_view(),
+         name=urls_name.NOTES_EXPORT),
+
+    path('notes/search/',
+         views.SearchNotes.as_view(),
+         name=urls_name.NOTES_SEARCH),
+
+    path('notes/stats/',
+         views.NotesStats.as_view(),
+         name=urls_name.NOTES_STATS),
+
     path('notes/filter/',
          views.FilterAPIView.as_view(),
          name=urls_name.FILTER_TAGS),
 
+    path('async/',
+         async_views.list_notes,
+         name=urls_name.ASYNC_NOTES_LIST_NAME),
+
+    path('async/<int:pk>',
+         async_views.notes_detail,
+         name=urls_name.ASYNC_NOTES_DETAIL_NAME),
+
+    path('async/auth/login/',
+         async_views.login,
+         name=urls_name.ASYNC_LOGIN_NAME),
+
+    path('async/auth/logout/',
+         async_views.logout,
+         name=urls_name.ASYNC_LOGOUT_NAME),
+
+    path('async/auth/register/',
+         async_views.register,
+         name=urls_name.ASYNC_REGISTER_NAME),
+
     path('users/(?P<pk>\d+)/',
          views.DetailUser.as_view(),
          name=urls_name.USER_DETAIL_NAME),
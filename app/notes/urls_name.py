@@ -2,6 +2,10 @@ NOTES_DETAIL_NAME = 'notes-detail'
 NOTES_LIST_NAME = 'notes-list'
 NOTES_DELETE = 'notes-delete'
 NOTES_UPDATE = 'notes-update'
+NOTES_EXPORT = 'notes-export'
+NOTES_SEARCH = 'notes-search'
+NOTES_BULK = 'notes-bulk'
+NOTES_STATS = 'notes-stats'
 FILTER_TAGS = 'filter-tags-result'
 USER_LIST_NAME = 'user-list'
 USER_DETAIL_NAME = 'user-detail'
@@ -11,3 +15,8 @@ LOGOUT_NAME = 'logout-view'
 DEFAULT_NAME = 'default'
 ME_NOTES = 'me-notes'
 ADMIN_NOTES_CREATION = 'admin-notes-creation'
+ASYNC_NOTES_LIST_NAME = 'async-notes-list'
+ASYNC_NOTES_DETAIL_NAME = 'async-notes-detail'
+ASYNC_LOGIN_NAME = 'async-login-view'
+ASYNC_LOGOUT_NAME = 'async-logout-view'
+ASYNC_REGISTER_NAME = 'async-registration-view'
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from . import versions
+
+USER_CACHE_KEY = 'user:%s'
+USERS_VERSION_KEY = 'users-version'
+# The password hash never leaves the database, the session auth hash derived
+# from it is cached next to the fields so that a password change still
+# invalidates the sessions as usual
+CACHED_USER_FIELDS = ('id', 'email', 'is_ban', 'is_superuser')
+
+
+def get_user_cache_key(user_id):
+    """
+        Return the cache key of the user
+        :param user_id: The primary key of the user
+    """
+    return USER_CACHE_KEY % get_user_model()._meta.pk.to_python(user_id)
+
+
+def get_cached_user(user_id):
+    """
+        Load the user from the cache
+        :param user_id: The primary key of the user
+        :return: The user with only the cached fields loaded, None on a miss
+    """
+    values = cache.get(get_user_cache_key(user_id))
+    # An entry of another layout, cached by a previous release, is a miss
+    if values is None or len(values) != len(CACHED_USER_FIELDS) + 1:
+        return None
+    *values, session_auth_hash = values
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
+    # Returned by get_session_auth_hash(), the password is not loaded
+    user._session_auth_hash = session_auth_hash
+    return user
+
+
+def cache_user(user):
+    """
+        Store the fields of the user needed by the authentication
+        and the permissions, and its session auth hash
+        :param user: The user to store
+    """
+    values = tuple(getattr(user, field) for field in CACHED_USER_FIELDS) + (user.get_session_auth_hash(),)
+    cache.set(get_user_cache_key(user.pk), values)
+
+
+def invalidate_user(user_id):
+    """
+        Drop the cached user, called whenever the user is saved or deleted
+        :param user_id: The primary key of the user
+    """
+    cache.delete(get_user_cache_key(user_id))
+
+
+def invalidate_users(user_ids, using=DEFAULT_DB_ALIAS):
+    """
+        Drop the cached users and change the version of the users, for
+        the writes which do not send the model signals like a queryset
+        update(), which UserQuerySet.update() already calls it for
+        :param user_ids: The primary keys of the changed users
+        :param using: The database alias of the write
+    """
+    cache.delete_many([get_user_cache_key(user_id) for user_id in user_ids])
+    bump_users_version(using=using)
+
+
+def get_users_version():
+    """
+        Return the version of the users, it changes whenever any user
+        is saved or deleted
+    """
+    return versions.get_version(USERS_VERSION_KEY)
+
+
+def bump_users_version(using=DEFAULT_DB_ALIAS):
+    """
+        Change the version of the users
+        :param using: The database alias of the write
+    """
+    versions.bump_versions([USERS_VERSION_KEY], using=using)
@@ -0,0 +1,64 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.http import quote_etag
+
+
+def get_version(key):
+    """
+        Return the version stored under a key. A version is the time in
+        nanoseconds of the last change, so a missing version restarts
+        from the current time and never collides with a previous one
+        :param key: The cache key of the version
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns())
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    """
+        Asynchronous counterpart of get_version
+        :param key: The cache key of the version
+    """
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns())
+        version = await cache.aget(key)
+    return version
+
+
+def bump_versions(keys, using=DEFAULT_DB_ALIAS):
+    """
+        Change the versions stored under the keys, anything cached
+        under the previous versions is never served again
+        :param keys: The cache keys of the versions
+        :param using: The database alias of the write causing the change
+    """
+    def bump():
+        cache.set_many({key: time.time_ns() for key in keys})
+    bump()
+    if transaction.get_connection(using).in_atomic_block:
+        # A read made before the commit could cache the previous rows
+        # under the new version, bump once more after the commit
+        transaction.on_commit(bump, using=using)
+
+
+def get_last_modified(*versions):
+    """
+        Return the time in seconds of the most recent of the versions
+        :param versions: The versions, in nanoseconds
+    """
+    return max(versions) // 10 ** 9
+
+
+def get_etag(tag):
+    """
+        Build a strong ETag from the string identifying a response
+        :param tag: The string identifying the response
+    """
+    return quote_etag(hashlib.md5(tag.encode('utf-8')).hexdigest())
@@ -1,19 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from .models import UserModel, Notes
+from .pagination import NotesCursorPagination
 from .permissions import IsAdmin, IsNotBanned, IsOwnerOrAdmin, IsSameUserOrAdmin
-from .serializers import NotesSerializer, UserSerializer
-from rest_framework import filters
+from .serializers import NotesSerializer, NotesReadSerializer, NotesSummarySerializer, UserSerializer
+from .filtering import NotesFilterBackend
+from . import constants
+from . import exports
+from . import notes_cache
+from . import user_cache
+from . import search
+from . import tag_counts
+from . import versions
+from . import request_utils
+from . import routers
 
 
 # Create your views here.
-class CreateAdminNotes(generics.CreateAPIView):
+class BulkWriteMixin:
+    """
+        Helpers of the views writing many notes at once, the notes are
+        written by chunks of NOTES_BULK_CHUNK_SIZE, one transaction per chunk
+    """
+
+    def get_chunks(self, items):
+        """
+            Split the items in the groups written by one transaction each
+            :param items: The items to write
+        """
+        return exports.batched(items, getattr(settings, 'NOTES_BULK_CHUNK_SIZE', 500))
+
+    def check_items(self, items, item_type):
+        """
+            Check the shape of the items sent by the client
+            :param items: The items of the request
+            :param item_type: The type of each item
+            :return: An error response, None if the items can be processed
+        """
+        max_items = getattr(settings, 'NOTES_BULK_MAX_ITEMS', 10000)
+        # bool is a subclass of int, true and false are not ids
+        if not isinstance(items, list) or not all(
+                isinstance(item, item_type) and not isinstance(item, bool) for item in items):
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={'errors': 'Expected a list of %s' % item_type.__name__})
+        if len(items) > max_items:
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={'errors': 'At most %d items per request' % max_items})
+        return None
+
+    def bump_versions(self, owner_ids):
+        """
+            Change the version of the notes of every owner, the bulk
+            writes do not send the model signals
+            :param owner_ids: The owners of the written notes
+        """
+        for owner_id in set(owner_ids):
+            notes_cache.bump_notes_version(owner_id)
+
+
+class CreateAdminNotes(BulkWriteMixin, generics.CreateAPIView):
     serializer_class = NotesSerializer
     permission_classes = (permissions.IsAuthenticated, IsAdmin, IsNotBanned,)
 
     """
         Only used by the administrator to create
-        notes to any users
+        notes to any users, a list of notes creates them in bulk
     """
 
     def post(self, request, format=None):
@@ -23,25 +82,255 @@ class CreateAdminNotes(generics.CreateAPIView):
             :param request: The post request
             :param format: The format of the request
         """
+        if isinstance(request.data, list):
+            return self.bulk_post(request)
         try:
             owner_email = request.data['owner']
-            notes_owner = UserModel.objects.get(email=owner_email)
-            notes = Notes(title=request.data['title'], description=request.data['body'], owner=notes_owner)
+            notes_owner = UserModel.objects.only('id', 'email').get(email=owner_email)
+            notes = Notes(title=request.data['title'], body=request.data['body'], owner=notes_owner)
             notes.save()
             serializer = NotesSerializer(notes)
             return Response(status=status.HTTP_201_CREATED, data=serializer.data)
         except KeyError:
             return Response(status=status.HTTP_400_BAD_REQUEST,
-                            data={'errors': 'Fields required: title, description and owner'})
+                            data={'errors': 'Fields required: title, body and owner'})
+        except UserModel.DoesNotExist:
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={'errors': 'The requested owner does not exist'})
+
+    def bulk_post(self, request):
+        """
+            Create a list of notes, each one holding the email of its
+            owner. Every owner is fetched by a single query, the notes
+            of unknown owners are skipped and their emails reported.
+            Nothing is written if one of the notes is invalid
+            :param request: The post request holding a list of notes
+        """
+        error = self.check_items(request.data, dict)
+        if error is not None:
+            return error
+        serializer = self.get_serializer(data=request.data, many=True)
+        errors = serializer.errors if not serializer.is_valid() else [{} for _ in request.data]
+        emails = [item.get('owner') for item in request.data]
+        for item_errors, email in zip(errors, emails):
+            if not isinstance(email, str):
+                item_errors['owner'] = ['This field is required.']
+        if any(errors):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=errors)
+        owners = {owner.email: owner for owner in UserModel.objects.only('id', 'email').filter(email__in=set(emails))}
+        notes_list = [Notes(owner=owners[email], **data)
+                      for email, data in zip(emails, serializer.validated_data) if email in owners]
+        created = []
+        for chunk in self.get_chunks(notes_list):
+            with transaction.atomic():
+                created += Notes.objects.bulk_create(chunk)
+                self.bump_versions(notes.owner_id for notes in chunk)
+        return Response(status=status.HTTP_201_CREATED, data={
+            'created': NotesSerializer(created, many=True).data,
+            'unknown_owners': sorted(set(emails) - set(owners)),
+        })
+
+
+class OwnerScopedNotesMixin:
+    """
+        Restrict the listed notes to the ones owned by the user
+        making the request, administrators can opt into the global
+        scope with ?scope=all
+    """
+
+    def get_owner_scope(self):
+        """
+            Return the user the notes are restricted to, or None
+            when an administrator asked for the global scope
+        """
+        scope = self.request.query_params.get(constants.SCOPE_QUERY_PARAM)
+        if scope == constants.SCOPE_ALL and request_utils.is_user_admin(self.request):
+            return None
+        return self.request.user
+
+    def get_queryset(self):
+        """
+            Filter the notes on the owner, which is served by the
+            (owner, created, id) index
+        """
+        queryset = super().get_queryset()
+        owner = self.get_owner_scope()
+        return queryset if owner is None else queryset.filter(owner=owner)
+
+
+class ReadSerializerListMixin:
+    """
+        List the rows through read_serializer_class when the view sets
+        one, the queryset is then projected to value rows instead of
+        model instances, restricted to the fields of ?fields=
+    """
+    read_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        """
+            Override the list from the generic views to use
+            the read serializer
+            :param request: The get request
+        """
+        if self.read_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        fields = self.read_serializer_class.get_fields(request)
+        queryset = self.read_serializer_class.project(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.read_serializer_class(page, fields).data)
+        return Response(self.read_serializer_class(queryset, fields).data)
+
+
+class ConditionalGetMixin:
+    """
+        Answer the list and retrieve requests with a 304 when the ETag
+        or the modification date known by the client are still valid.
+        The validators are built from the version counters, so a 304
+        costs neither the rows nor the serialization
+    """
+
+    def get_list_validator(self, request):
+        """
+            Return the tag and the versions identifying the list response
+            :param request: The get request
+        """
+        raise NotImplementedError
+
+    def get_object_validator(self, request, instance):
+        """
+            Return the tag and the versions identifying the retrieve response
+            :param request: The get request
+            :param instance: The retrieved instance
+        """
+        raise NotImplementedError
+
+    def get_validators(self, tag, version_list):
+        """
+            Build the ETag and the Last-Modified date
+            :param tag: The string identifying the response
+            :param version_list: The versions the response depends on
+        """
+        return versions.get_etag(tag), versions.get_last_modified(*version_list)
+
+    def set_validators(self, response, etag, last_modified):
+        """
+            Add the validators to a successful response
+            :param response: The response
+            :param etag: The ETag of the response
+            :param last_modified: The last modification time in seconds
+        """
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """
+            Return a 304 or the list with its validators
+            :param request: The get request
+        """
+        tag, self.list_versions = self.get_list_validator(request)
+        etag, last_modified = self.get_validators(tag, self.list_versions)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+            Return a 304 or the instance with its validators
+            :param request: The get request
+        """
+        instance = self.get_object()
+        etag, last_modified = self.get_validators(*self.get_object_validator(request, instance))
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self.set_validators(Response(serializer.data), etag, last_modified)
+
+
+class NotesListValidatorMixin:
+    """
+        Identify a notes list response by its scope, the version of
+        the notes of the scope, the version of the users for the owner
+        emails and its url
+    """
+
+    def get_list_validator(self, request):
+        """
+            :param request: The get request
+        """
+        owner = self.get_owner_scope()
+        list_versions = [notes_cache.get_notes_version(owner), user_cache.get_users_version()]
+        return notes_cache.get_list_cache_key(owner, request, *list_versions), list_versions
 
 
-class ListNotes(generics.ListCreateAPIView,generics.ListAPIView):
+class ReplicaReadMixin:
     """
-        List all the notes present inside the database
+        Read the rows of the list from a read replica. A list changed
+        less than NOTES_DB_REPLICA_LAG seconds ago, according to the
+        versions found by ConditionalGetMixin, is read from the primary:
+        the replica could still miss the change and the response would
+        be cached and tagged with the new version
+    """
+
+    def is_replica_fresh(self):
+        """
+            Check if the replicas had the time to receive the last change of the list
+        """
+        list_versions = getattr(self, 'list_versions', None)
+        if not list_versions:
+            return True
+        lag = getattr(settings, 'NOTES_DB_REPLICA_LAG', 5)
+        return time.time_ns() - max(list_versions) >= lag * 10 ** 9
+
+    def list(self, request, *args, **kwargs):
+        """
+            Build the list with the reads routed to a replica when it is fresh enough
+            :param request: The get request
+        """
+        if not self.is_replica_fresh():
+            return super().list(request, *args, **kwargs)
+        with routers.read_from_replica():
+            return super().list(request, *args, **kwargs)
+
+
+class CachedListMixin:
+    """
+        Cache the list responses by owner, url, version of the notes
+        of the owner and version of the users. Any write changes a
+        version so a cached response is never served once the notes or
+        the owner emails it holds changed
+    """
+
+    def list(self, request, *args, **kwargs):
+        """
+            Serve the list from the cache, or build it and cache it
+            :param request: The get request
+        """
+        # The versions already read by ConditionalGetMixin, if any
+        key = notes_cache.get_list_cache_key(self.get_owner_scope(), request, *getattr(self, 'list_versions', ()))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        return response
+
+
+class ListNotes(OwnerScopedNotesMixin, NotesListValidatorMixin, ConditionalGetMixin, CachedListMixin,
+                ReplicaReadMixin, ReadSerializerListMixin, generics.ListCreateAPIView, generics.ListAPIView):
+    """
+        List the notes of the user present inside the database
         also allows POST request to create some
     """
-    queryset = Notes.objects.all()
+    queryset = Notes.objects.summaries()
     serializer_class = NotesSerializer
+    read_serializer_class = NotesSummarySerializer
+    pagination_class = NotesCursorPagination
     permission_classes = (permissions.IsAuthenticated, IsNotBanned,)
 
     def perform_create(self, serializer):
@@ -54,25 +343,214 @@ class ListNotes(generics.ListCreateAPIView,generics.ListAPIView):
         serializer.save(owner=self.request.user)
 
 
+class ExportNotes(OwnerScopedNotesMixin, generics.GenericAPIView):
+    """
+        Stream every notes of the user as a JSON array, or as
+        newline delimited JSON with ?export_format=ndjson
+    """
+    queryset = Notes.objects.with_owner()
+    read_serializer_class = NotesReadSerializer
+    permission_classes = (permissions.IsAuthenticated, IsNotBanned,)
+
+    def get(self, request, format=None):
+        """
+            Get request streaming the export, the rows are fetched by
+            chunks so the memory used does not grow with the export size
+            :param request: The get request
+            :param format: The format of the request
+        """
+        export_format = request.query_params.get(constants.EXPORT_FORMAT_QUERY_PARAM, constants.EXPORT_FORMAT_JSON)
+        if export_format not in (constants.EXPORT_FORMAT_JSON, constants.EXPORT_FORMAT_NDJSON):
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={'errors': 'Export formats supported: json and ndjson'})
+        chunk_size = getattr(settings, 'NOTES_EXPORT_CHUNK_SIZE', 2000)
+        queryset = self.get_queryset().order_by('created', 'id')
+        rows = self.read_serializer_class.project(queryset).iterator(chunk_size=chunk_size)
+        items = self.read_serializer_class(rows)
+        if export_format == constants.EXPORT_FORMAT_NDJSON:
+            response = StreamingHttpResponse(exports.stream_ndjson(items, chunk_size),
+                                             content_type=exports.NDJSON_CONTENT_TYPE)
+        else:
+            response = StreamingHttpResponse(exports.stream_json_array(items, chunk_size),
+                                             content_type=exports.JSON_CONTENT_TYPE)
+        response['Content-Disposition'] = 'attachment; filename="notes.%s"' % export_format
+        return response
+
+
+class NotesStats(OwnerScopedNotesMixin, generics.GenericAPIView):
+    """
+        Number of notes of the user by tags, read from the counts kept
+        up to date by the writes instead of counting the notes
+    """
+    permission_classes = (permissions.IsAuthenticated, IsNotBanned,)
+
+    def get(self, request, format=None):
+        """
+            Get request answering the counts of the user, or of every
+            user for an administrator asking ?scope=all
+            :param request: The get request
+            :param format: The format of the request
+        """
+        counts = tag_counts.get_tag_counts(self.get_owner_scope())
+        return Response({'tags': counts, 'total': sum(counts.values())})
+
+
+class SearchNotes(OwnerScopedNotesMixin, generics.GenericAPIView):
+    """
+        Full-text search over the title and the body of the notes,
+        the most relevant notes come first
+    """
+    queryset = Notes.objects.with_owner()
+    read_serializer_class = NotesReadSerializer
+    permission_classes = (permissions.IsAuthenticated, IsNotBanned,)
+
+    def get(self, request, format=None):
+        """
+            Get request searching the notes with ?q=, words ending with *
+            are matched as prefixes. The number of results is bounded
+            by ?page_size= like the notes list
+            :param request: The get request
+            :param format: The format of the request
+        """
+        query = request.query_params.get(constants.SEARCH_QUERY_PARAM, '')
+        if not search.parse_terms(query):
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={'errors': 'The search query must contain at least one word'})
+        limit = NotesCursorPagination().get_page_size(request)
+        ids = search.search_notes(query, owner=self.get_owner_scope(), limit=limit)
+        rows = self.read_serializer_class.project(self.get_queryset().filter(id__in=ids))
+        rank = {notes_id: position for position, notes_id in enumerate(ids)}
+        rows = sorted(rows, key=lambda row: rank[row.id])
+        return Response({'results': self.read_serializer_class(rows).data})
+
+
+class BulkNotes(BulkWriteMixin, generics.GenericAPIView):
+    """
+        Create, partially update or delete many notes in one request.
+        The notes are written by chunks of NOTES_BULK_CHUNK_SIZE, one
+        transaction per chunk, and the response holds one result per item
+    """
+    queryset = Notes.objects.with_owner()
+    serializer_class = NotesSerializer
+    permission_classes = (permissions.IsAuthenticated, IsNotBanned,)
+    update_fields = ('title', 'body', 'tags')
+
+    def get_queryset(self):
+        """
+            Restrict the notes to the ones the user can modify
+        """
+        queryset = super().get_queryset()
+        return queryset if request_utils.is_user_admin(self.request) else queryset.filter(owner=self.request.user)
+
+    def post(self, request, format=None):
+        """
+            Create a list of notes owned by the user. Nothing is written
+            if one of the notes is invalid, the errors are then returned
+            by item
+            :param request: The post request holding a list of notes
+            :param format: The format of the request
+        """
+        error = self.check_items(request.data, dict)
+        if error is not None:
+            return error
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=serializer.errors)
+        created = []
+        for chunk in self.get_chunks(serializer.validated_data):
+            with transaction.atomic():
+                notes_list = Notes.objects.bulk_create([Notes(owner=request.user, **data) for data in chunk])
+                self.bump_versions(notes.owner_id for notes in notes_list)
+            created += notes_list
+        return Response(status=status.HTTP_201_CREATED, data=NotesSerializer(created, many=True).data)
+
+    def patch(self, request, format=None):
+        """
+            Partially update a list of notes, each item holds the id
+            of the notes and the fields to modify. Nothing is written
+            if one of the items is invalid, unknown ids are reported
+            as not found
+            :param request: The patch request holding a list of modifications
+            :param format: The format of the request
+        """
+        error = self.check_items(request.data, dict)
+        if error is not None:
+            return error
+        serializer = self.get_serializer(data=request.data, many=True, partial=True)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=serializer.errors)
+        ids = [item.get('id') for item in request.data]
+        owned_notes = self.get_queryset().in_bulk([notes_id for notes_id in ids if isinstance(notes_id, int)])
+        updated = []
+        for notes_id, data in zip(ids, serializer.validated_data):
+            notes = owned_notes.get(notes_id)
+            if notes is not None:
+                for attr, value in data.items():
+                    setattr(notes, attr, value)
+                updated.append(notes)
+        for chunk in self.get_chunks(updated):
+            with transaction.atomic():
+                Notes.objects.bulk_update(chunk, self.update_fields)
+                self.bump_versions(notes.owner_id for notes in chunk)
+        return Response(status=status.HTTP_200_OK, data=[
+            {'id': notes_id, 'status': status.HTTP_200_OK, 'data': NotesSerializer(owned_notes[notes_id]).data}
+            if notes_id in owned_notes else {'id': notes_id, 'status': status.HTTP_404_NOT_FOUND}
+            for notes_id in ids])
+
+    def delete(self, request, format=None):
+        """
+            Delete a list of notes from the ids sent as {"ids": [...]},
+            unknown ids are reported as not found
+            :param request: The delete request
+            :param format: The format of the request
+        """
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        error = self.check_items(ids, int)
+        if error is not None:
+            return error
+        owners = dict(self.get_queryset().filter(id__in=ids).values_list('id', 'owner_id'))
+        for chunk in self.get_chunks(list(owners)):
+            with transaction.atomic():
+                Notes.objects.filter(id__in=chunk).bulk_delete()
+                self.bump_versions(owners[notes_id] for notes_id in chunk)
+        return Response(status=status.HTTP_200_OK, data=[
+            {'id': notes_id,
+             'status': status.HTTP_204_NO_CONTENT if notes_id in owners else status.HTTP_404_NOT_FOUND}
+            for notes_id in ids])
+
+
 class DestroyAPIView(generics.RetrieveDestroyAPIView):
     """
     Concrete view for deleting a model instance.
     """
-    queryset = Notes.objects.all()
+    queryset = Notes.objects.with_owner()
     serializer_class = NotesSerializer
     permission_classes = (permissions.IsAuthenticated, IsOwnerOrAdmin, IsNotBanned,)
 
 
-class UpdateAPIView(generics.RetrieveUpdateDestroyAPIView):
+class UpdateAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Concrete view for updating a model instance.
     """
-    queryset = Notes.objects.all()
+    queryset = Notes.objects.with_owner()
     serializer_class = NotesSerializer
     permission_classes = (permissions.IsAuthenticated, IsOwnerOrAdmin, IsNotBanned,)
 
+    def get_object_validator(self, request, instance):
+        """
+            Identify the notes by the version of the notes of its owner,
+            and the version of the users for the owner email
+            :param request: The get request
+            :param instance: The retrieved notes
+        """
+        notes_version = notes_cache.get_notes_version(instance.owner)
+        users_version = user_cache.get_users_version()
+        tag = 'notes-detail:%s:%s:%s:%s' % (instance.pk, notes_version, users_version,
+                                            notes_cache.get_url_hash(request))
+        return tag, [notes_version, users_version]
+
 
-class ListUser(generics.ListCreateAPIView):
+class ListUser(ConditionalGetMixin, ReplicaReadMixin, generics.ListCreateAPIView):
     """
         List all users from the database
         also allows POST request to create some
@@ -81,8 +559,19 @@ class ListUser(generics.ListCreateAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAdmin, IsNotBanned,)
 
+    def get_list_validator(self, request):
+        """
+            Identify the list by the version of the users and the
+            version of every notes, which are linked from the users
+            :param request: The get request
+        """
+        users_version = user_cache.get_users_version()
+        notes_version = notes_cache.get_notes_version(None)
+        tag = 'user-list:%s:%s:%s' % (users_version, notes_version, notes_cache.get_url_hash(request))
+        return tag, [users_version, notes_version]
+
 
-class DetailUser(generics.RetrieveUpdateDestroyAPIView):
+class DetailUser(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
         Detail the specific user from the database
         also allows the update and the destroy of this
@@ -92,11 +581,26 @@ class DetailUser(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
     permission_classes = (permissions.IsAuthenticated, IsSameUserOrAdmin, IsNotBanned,)
 
+    def get_object_validator(self, request, instance):
+        """
+            Identify the user by the version of the users and the
+            version of its notes, which are linked from the user
+            :param request: The get request
+            :param instance: The retrieved user
+        """
+        users_version = user_cache.get_users_version()
+        notes_version = notes_cache.get_notes_version(instance)
+        tag = 'user-detail:%s:%s:%s:%s' % (instance.pk, users_version, notes_version,
+                                           notes_cache.get_url_hash(request))
+        return tag, [users_version, notes_version]
+
 
-class FilterAPIView(generics.ListCreateAPIView):
-    search_fields = ['tags']
-    filter_backends = (filters.SearchFilter,)
-    queryset = Notes.objects.all()
+class FilterAPIView(OwnerScopedNotesMixin, NotesListValidatorMixin, ConditionalGetMixin, CachedListMixin,
+                    ReplicaReadMixin, ReadSerializerListMixin, generics.ListCreateAPIView):
+    filter_backends = (NotesFilterBackend,)
+    queryset = Notes.objects.summaries()
     serializer_class = NotesSerializer
+    read_serializer_class = NotesSummarySerializer
+    pagination_class = NotesCursorPagination
     permission_classes = (permissions.IsAuthenticated, IsSameUserOrAdmin, IsNotBanned,)
 